@@ -30,7 +30,10 @@ def make_shell_context():
         'PaymentReceived': PaymentReceived,
         'PaymentMade': PaymentMade,
         'ChartOfAccount': ChartOfAccount,
-        'AuditLog': AuditLog
+        'AuditLog': AuditLog,
+        'CodeSequence': CodeSequence,
+        'DocumentSeries': DocumentSeries,
+        'TableVersion': TableVersion
     }
 
 
@@ -61,8 +61,8 @@ def create_app(config_name=None):
     
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User
-        return User.query.get(int(user_id))
+        from app.utils.user_cache import user_cache
+        return user_cache.load(int(user_id))
     
     # Create upload folder if it doesn't exist
     upload_folder = app.config['UPLOAD_FOLDER']
@@ -120,6 +120,12 @@ def create_app(config_name=None):
     from app.utils.filters import register_filters
     register_filters(app)
 
+    # Invalidate cached query results when their tables change
+    from app.utils.cache import register_cache_events
+    register_cache_events(app)
+    from app.utils.user_cache import register_user_cache_events
+    register_user_cache_events(app)
+
     # Make UserRole enum available in templates
     from app.models import UserRole
     app.jinja_env.globals['UserRole'] = UserRole
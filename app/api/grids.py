@@ -0,0 +1,82 @@
+"""Data-grid definitions served by /api/grid/<name>."""
+
+from app.models import B2CLead, B2BLead, Camp, Sale, Purchase, Expense, PaymentReceived, PaymentMade
+from app.utils.grid import Grid
+
+GRIDS = {
+    'b2c_leads': Grid(
+        B2CLead, 'leads_b2c',
+        columns=('enquiry_id', 'customer_name', 'contact_no', 'email', 'enquiry_date', 'status', 'source'),
+        filters={'status': 'choice', 'source': 'choice', 'customer_name': 'text',
+                 'enquiry_date': 'range'},
+        search=('enquiry_id', 'customer_name', 'contact_no', 'email'),
+        default_sort=('-enquiry_date',),
+        view=('leads_b2c.view', 'enquiry_id', 'enquiry_id'),
+    ),
+    'b2b_leads': Grid(
+        B2BLead, 'leads_b2b',
+        columns=('sr_no', 'date', 'organization_name', 'organization_email', 'location',
+                 'type_of_leads', 't4h_spoc', 'employee_size'),
+        filters={'type_of_leads': 'choice', 'location': 'text', 'organization_name': 'text',
+                 't4h_spoc': 'exact', 'date': 'range'},
+        search=('sr_no', 'organization_name', 'organization_email', 'location'),
+        default_sort=('-date',),
+        view=('leads_b2b.view', 'sr_no', 'sr_no'),
+    ),
+    'camps': Grid(
+        Camp, 'camps',
+        columns=('camp_id', 'camp_date', 'camp_location', 'org_name', 'package', 'patient_name',
+                 'age', 'gender', 'phone_no', 'test_done'),
+        filters={'camp_location': 'text', 'org_name': 'text', 'package': 'choice',
+                 'gender': 'choice', 'test_done': 'bool', 'camp_date': 'range'},
+        search=('camp_id', 'patient_name', 'phone_no', 'org_name'),
+        default_sort=('-camp_date',),
+        view=('camps.view', 'camp_id', 'camp_id'),
+    ),
+    'sales': Grid(
+        Sale, 'finance',
+        columns=('invoice_number', 'date', 'customer_name', 'product_service', 'base_amount',
+                 'gst_amount', 'amount', 'payment_status'),
+        filters={'payment_status': 'choice', 'customer_name': 'text', 'date': 'range', 'amount': 'range'},
+        search=('invoice_number', 'customer_name', 'product_service'),
+        default_sort=('-date',),
+        view=('finance.sales_view', 'id', 'id'),
+    ),
+    'purchases': Grid(
+        Purchase, 'finance',
+        columns=('bill_number', 'date', 'vendor_name', 'item_description', 'base_amount',
+                 'gst_amount', 'amount', 'payment_status'),
+        filters={'payment_status': 'choice', 'vendor_name': 'text', 'date': 'range', 'amount': 'range'},
+        search=('bill_number', 'vendor_name', 'item_description'),
+        default_sort=('-date',),
+        view=('finance.purchases_view', 'id', 'id'),
+    ),
+    'expenses': Grid(
+        Expense, 'expenses',
+        columns=('expense_code', 'date', 'category', 'sub_category', 'expense_amount'),
+        filters={'category': 'choice', 'sub_category': 'choice', 'date': 'range', 'expense_amount': 'range'},
+        search=('expense_code',),
+        default_sort=('-date',),
+        view=('expenses.view', 'id', 'id'),
+    ),
+    'payments_received': Grid(
+        PaymentReceived, 'finance',
+        columns=('reference_number', 'date', 'customer_name', 'invoice_number', 'payment_method',
+                 'amount', 'tds_amount', 'net_amount'),
+        filters={'payment_method': 'choice', 'customer_name': 'text', 'tds_applicable': 'bool',
+                 'date': 'range', 'amount': 'range'},
+        search=('reference_number', 'customer_name', 'invoice_number'),
+        default_sort=('-date',),
+        view=('finance.payments_received_view', 'id', 'id'),
+    ),
+    'payments_made': Grid(
+        PaymentMade, 'finance',
+        columns=('reference_number', 'date', 'payee_name', 'bill_number', 'category',
+                 'payment_method', 'amount', 'tds_amount', 'net_amount'),
+        filters={'payment_method': 'choice', 'category': 'choice', 'payee_name': 'text',
+                 'date': 'range', 'amount': 'range'},
+        search=('reference_number', 'payee_name', 'bill_number'),
+        default_sort=('-date',),
+        view=('finance.payments_made_view', 'id', 'id'),
+    ),
+}
@@ -1,9 +1,73 @@
 """API routes."""
 
+from datetime import date
+
+from flask import jsonify, request, abort
+from flask_login import login_required, current_user
+
 from app.api import bp
+from app.follow_ups.agenda import agenda_owner, agenda_window, owner_agenda
+from app.api.grids import GRIDS
+from app.utils.exports import EXPORTS
+from app.utils.grid import GridError
 
 
 @bp.route('/')
 def index():
     """Placeholder route for API blueprint."""
-    return "API module"
\ No newline at end of file
+    return "API module"
+
+
+@bp.route('/grid/<name>')
+@login_required
+def grid(name):
+    """One filtered, sorted slice of a data grid, as JSON."""
+    grid = GRIDS.get(name)
+    if grid is None:
+        abort(404)
+    if not current_user.has_module_access(grid.module):
+        abort(403)
+
+    try:
+        return jsonify(grid.data(request.args))
+    except GridError as e:
+        return jsonify({'error': 'Bad Request', 'message': str(e)}), 400
+
+
+@bp.route('/export/<name>')
+@login_required
+def export(name):
+    """Download a registered export as CSV or XLSX (``format=xlsx``)."""
+    export = EXPORTS.get(name)
+    if export is None:
+        abort(404)
+    if not current_user.has_module_access(export.module):
+        abort(403)
+
+    try:
+        return export.response(request.args, request.args.get('format', 'csv'))
+    except ValueError as e:
+        return jsonify({'error': 'Bad Request', 'message': str(e)}), 400
+
+
+@bp.route('/follow-ups/agenda')
+@login_required
+def follow_up_agenda():
+    """A follow-up owner's agenda (default: the current user), as JSON."""
+    if not current_user.has_module_access('follow_ups'):
+        abort(403)
+    owner = agenda_owner(request.args.get('owner_id', type=int))
+    try:
+        today = date.fromisoformat(request.args['date']) if request.args.get('date') else date.today()
+    except ValueError:
+        return jsonify({'error': 'Bad Request', 'message': 'date must be YYYY-MM-DD'}), 400
+
+    start, end = agenda_window(today)
+    agenda = owner_agenda(owner.id, today)
+    return jsonify({
+        'owner': {'id': owner.id, 'full_name': owner.full_name},
+        'date': today.isoformat(),
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        **{name: [dict(item.to_dict(), url=item.lead_url) for item in items] for name, items in agenda.items()},
+    })
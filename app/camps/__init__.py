@@ -4,4 +4,4 @@ from flask import Blueprint
 
 bp = Blueprint('camps', __name__)
 
-from app.camps import routes
+from app.camps import routes, exports
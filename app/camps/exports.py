@@ -0,0 +1,30 @@
+"""Camp exports."""
+
+from app.models import Camp, Employee
+from app.utils.exports import Export, register_export
+
+register_export(Export(
+    'camps', 'camps', Camp,
+    columns=[
+        ('Camp ID', Camp.camp_id),
+        ('Camp Date', Camp.camp_date),
+        ('Location', Camp.camp_location),
+        ('Org Name', Camp.org_name),
+        ('Package', Camp.package),
+        ('Diagnostic Partner', Camp.diagnostic_partner),
+        ('Patient Name', Camp.patient_name),
+        ('Age', Camp.age),
+        ('Gender', Camp.gender),
+        ('Phone No', Camp.phone_no),
+        ('Test Done', Camp.test_done, lambda done: 'Yes' if done else 'No'),
+        ('Staff', Employee.name),
+    ],
+    joins=[(Employee, Camp.staff_id == Employee.id)],
+    filters={
+        'camp_date': ('range', Camp.camp_date),
+        'org_name': ('text', Camp.org_name),
+        'gender': ('choice', Camp.gender),
+        'test_done': ('bool', Camp.test_done),
+    },
+    order_by=(Camp.camp_date.desc(), Camp.id.desc()),
+))
@@ -4,7 +4,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, DateField, SelectField, BooleanField, SubmitField
 from wtforms.validators import DataRequired, Optional
 
-from app.models import Employee, Setting
+from app.utils.choices import employee_options, setting_options
 
 
 class CampForm(FlaskForm):
@@ -39,11 +39,8 @@ class CampForm(FlaskForm):
         super(CampForm, self).__init__(*args, **kwargs)
         # Populate staff name choices from employees
         self.t4h_staff.choices = [('', 'Select Staff')] + [
-            (str(emp.id), f"{emp.name} ({emp.employee_code})")
-            for emp in Employee.query.filter_by().order_by(Employee.name).all()
+            (str(emp_id), f"{name} ({employee_code})")
+            for emp_id, name, employee_code in employee_options()
         ]
         # Populate package choices from settings
-        self.package.choices = [('', 'Select Package')] + [
-            (setting.key, setting.value) 
-            for setting in Setting.get_options('CampPackage')
-        ]
+        self.package.choices = [('', 'Select Package')] + list(setting_options('CampPackage'))
@@ -7,6 +7,7 @@ from app import db, require_module_access
 from app.camps import bp
 from app.camps.forms import CampForm
 from app.models import Camp, CampDefault, UserRole
+from app.utils.pagination import keyset_paginate
 
 
 @bp.route('/')
@@ -14,8 +15,8 @@ from app.models import Camp, CampDefault, UserRole
 @require_module_access('camps')
 def index():
     """Display all camp entries."""
-    camps = Camp.query.order_by(Camp.camp_date.desc(), Camp.created_at.desc()).all()
-    return render_template('camps/index.html', title='Health Camps', camps=camps)
+    page = keyset_paginate(Camp.query, (Camp.camp_date.desc(), Camp.id.desc()), tables=('camp',))
+    return render_template('camps/index.html', title='Health Camps', camps=page.items, page=page)
 
 
 @bp.route('/add', methods=['GET', 'POST'])
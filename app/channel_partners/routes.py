@@ -7,6 +7,7 @@ from app import db, require_module_access
 from app.channel_partners import bp
 from app.channel_partners.forms import ChannelPartnerForm
 from app.models import ChannelPartner
+from app.utils.pagination import keyset_paginate
 
 
 @bp.route('/')
@@ -14,8 +15,10 @@ from app.models import ChannelPartner
 @require_module_access('channel_partners')
 def index():
     """Display all channel partners."""
-    channel_partners = ChannelPartner.query.order_by(ChannelPartner.created_at.desc()).all()
-    return render_template('channel_partners/index.html', title='Channel Partners', channel_partners=channel_partners)
+    page = keyset_paginate(ChannelPartner.query, (ChannelPartner.created_at.desc(), ChannelPartner.id.desc()),
+                           tables=('channel_partner',))
+    return render_template('channel_partners/index.html', title='Channel Partners',
+                           channel_partners=page.items, page=page)
 
 
 @bp.route('/add', methods=['GET', 'POST'])
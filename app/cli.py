@@ -2,10 +2,13 @@
 
 import click
 from datetime import date, datetime
+from flask import current_app
 from flask.cli import with_appcontext
 
 from app import db
-from app.models import User, UserRole, Setting, AuditLog
+from app.utils.cache import mark_tables_changed
+from app.models import (User, UserRole, Setting, AuditLog, CodeSequence, CODE_SEQUENCE_COLUMNS, FinanceMonthlyRollup,
+                        SearchDocument, SEARCH_ENTITIES, ContactIndex)
 
 
 @click.command()
@@ -113,22 +116,43 @@ def seed():
 
 
 @click.command()
-@click.argument('filepath')
+@click.argument('filepath', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows inserted and committed at a time')
+@click.option('--dry-run', is_flag=True, help='Only validate the rows; nothing is imported')
+@click.option('--report', type=click.Path(dir_okay=False, writable=True),
+              help='Write the row errors (all of them with --dry-run) to this CSV file')
 @with_appcontext
-def import_xlsx(filepath):
+def import_xlsx(filepath, chunk_size, dry_run, report):
     """Import data from XLSX file."""
-    click.echo(f'Importing data from {filepath}...')
+    click.echo(f'{"Validating" if dry_run else "Importing"} data from {filepath}...')
     
     try:
-        import pandas as pd
-        from app.utils.importers import import_from_excel
-        
-        result = import_from_excel(filepath)
-        click.echo(f'Import completed: {result}')
+        from app.utils.importers import import_from_excel, write_error_report
+
+        results = import_from_excel(filepath, chunk_size=chunk_size, dry_run=dry_run,
+                                    workers=current_app.config['IMPORT_VALIDATION_WORKERS'])
     except ImportError:
-        click.echo('Error: pandas is required for XLSX import')
+        click.echo('Error: openpyxl is required for XLSX import')
+        return
     except Exception as e:
         click.echo(f'Error importing data: {e}')
+        return
+
+    if not results:
+        click.echo('No importable sheets found.')
+    for name, result in results.items():
+        click.echo(f'{name}: {result}')
+        for error in result.errors:
+            click.echo(f'  {error}')
+        if result.error_count > len(result.errors):
+            click.echo(f'  ... and {result.error_count - len(result.errors)} more errors')
+        if result.resume_row:
+            click.echo(f'  Stopped at row {result.resume_row}; rows before it were saved.')
+    if report:
+        with open(report, 'w', encoding='utf-8', newline='') as f:
+            count = write_error_report(results.values(), f)
+        click.echo(f'Wrote {count} errors to {report}')
+    click.echo('Validation completed, nothing was imported.' if dry_run else 'Import completed!')
 
 
 @click.command()
@@ -199,6 +223,181 @@ def list_users():
         click.echo(f'  {user.email} - {user.full_name} ({user.role.value}) [{status}]')
 
 
+@click.command()
+@with_appcontext
+def backfill_code_sequences():
+    """Seed the entity code counters from the codes already in use."""
+    click.echo('Backfilling code sequences...')
+
+    try:
+        for prefix in CODE_SEQUENCE_COLUMNS:
+            last_value = CodeSequence.backfill(prefix)
+            click.echo(f'  {prefix}: next code {CodeSequence.format_code(prefix, last_value + 1)}')
+        db.session.commit()
+        click.echo('Code sequences backfilled successfully!')
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'Error backfilling code sequences: {e}')
+
+
+@click.command()
+@click.option('--verify', is_flag=True, help='Only compare the rollup with the ledgers, do not rewrite it')
+@with_appcontext
+def rebuild_finance_rollups(verify):
+    """Recompute the monthly finance rollup from the ledgers."""
+    if verify:
+        expected = FinanceMonthlyRollup.ledger_totals()
+        actual = FinanceMonthlyRollup.totals()
+        mismatches = []
+        for key in sorted(set(expected) | set(actual)):
+            ledger = expected.get(key, (0, 0))
+            rollup = actual.get(key, (0, 0))
+            if round(float(ledger[0]), 2) != round(float(rollup[0]), 2) or ledger[1] != rollup[1]:
+                mismatches.append((key, ledger, rollup))
+        for (year, month, metric), ledger, rollup in mismatches:
+            click.echo(f'  {year}-{month:02d} {metric}: ledger {ledger[0]} ({ledger[1]}) != rollup {rollup[0]} ({rollup[1]})')
+        if mismatches:
+            raise click.ClickException(f'{len(mismatches)} rollup rows differ from the ledgers; run without --verify to rebuild.')
+        click.echo('Finance rollup matches the ledgers.')
+        return
+
+    click.echo('Rebuilding finance rollups...')
+
+    try:
+        rows = FinanceMonthlyRollup.rebuild()
+        mark_tables_changed(db.session(), FinanceMonthlyRollup.__tablename__)
+        db.session.commit()
+        click.echo(f'Finance rollups rebuilt successfully! ({rows} rows)')
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'Error rebuilding finance rollups: {e}')
+
+
+@click.command()
+@click.option('--entity', type=click.Choice(list(SEARCH_ENTITIES)), multiple=True,
+              help='Only reindex these entities (default: all)')
+@with_appcontext
+def reindex_search(entity):
+    """Rebuild the global search index from the CRM tables."""
+    click.echo('Reindexing search...')
+
+    try:
+        counts = SearchDocument.reindex(entities=entity or None)
+        db.session.commit()
+        for name, count in counts.items():
+            click.echo(f'  {name}: {count} records')
+        click.echo('Search index rebuilt successfully!')
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'Error reindexing search: {e}')
+
+
+@click.command()
+@with_appcontext
+def reindex_contacts():
+    """Rebuild the normalized phone/email contact index."""
+    click.echo('Reindexing contacts...')
+
+    try:
+        counts = ContactIndex.reindex()
+        db.session.commit()
+        for name, count in counts.items():
+            click.echo(f'  {name}: {count} records')
+        click.echo('Contact index rebuilt successfully!')
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f'Error reindexing contacts: {e}')
+
+
+@click.command()
+@click.option('--once', is_flag=True, help='Run the queued jobs and exit instead of polling')
+@click.option('--interval', default=5, show_default=True, help='Seconds between polls for new jobs')
+@with_appcontext
+def export_worker(once, interval):
+    """Run queued background export jobs (use with EXPORT_JOB_WORKERS=0)."""
+    import time
+    from app.utils.export_jobs import fail_stale_jobs, purge_expired_jobs, run_pending_jobs
+
+    click.echo('Export worker started.' if not once else 'Running queued export jobs...')
+    while True:
+        failed = fail_stale_jobs()
+        db.session.commit()
+        if failed:
+            click.echo(f'  Failed {failed} export jobs whose worker stopped')
+        purged = purge_expired_jobs()
+        if purged:
+            click.echo(f'  Removed {purged} expired export jobs')
+        ran = run_pending_jobs()
+        if ran:
+            click.echo(f'  Ran {ran} export jobs')
+        if once:
+            break
+        time.sleep(interval)
+
+
+@click.command()
+@click.option('--date', 'digest_date', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Build the digests for this day instead of today')
+@click.option('--daily-at', metavar='HH:MM', help='Keep running and rebuild the digests every day at this time')
+@with_appcontext
+def follow_up_digest(digest_date, daily_at):
+    """Snapshot each user's follow-up agenda into the daily digest table."""
+    import time
+    from datetime import timedelta
+    from app.follow_ups.digest import build_digests, purge_digests
+
+    def run(day):
+        try:
+            count = build_digests(day)
+            purged = purge_digests()
+            click.echo(f'Built {count} follow-up digests for {day.isoformat()}'
+                       + (f' (removed {purged} expired)' if purged else ''))
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'Error building follow-up digests: {e}')
+
+    if not daily_at:
+        run(digest_date.date() if digest_date else date.today())
+        return
+
+    try:
+        at = datetime.strptime(daily_at, '%H:%M').time()
+    except ValueError:
+        raise click.BadParameter('expected HH:MM', param_hint='--daily-at')
+    click.echo(f'Follow-up digest job started, running daily at {daily_at}.')
+    while True:
+        now = datetime.now()
+        next_run = datetime.combine(now.date(), at)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        time.sleep((next_run - now).total_seconds())
+        run(date.today())
+
+
+@click.command()
+@click.option('--month', 'months', multiple=True, metavar='YYYY-MM',
+              help='Month to compute (repeatable; default: this month)')
+@with_appcontext
+def compute_performance_metrics(months):
+    """Compute every employee's monthly performance metrics in batch."""
+    from app.employees.attendance import parse_month
+    from app.employees.performance import save_performance_metrics
+
+    try:
+        month_starts = [datetime.strptime(month, '%Y-%m').date() for month in months] or [parse_month(None)]
+    except ValueError:
+        raise click.BadParameter('expected YYYY-MM', param_hint='--month')
+
+    for month_start in month_starts:
+        try:
+            count = save_performance_metrics(month_start)
+            db.session.commit()
+            click.echo(f'Computed performance metrics for {count} employees ({month_start.strftime("%Y-%m")})')
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'Error computing performance metrics for {month_start.strftime("%Y-%m")}: {e}')
+
+
 def register_cli_commands(app):
     """Register CLI commands with Flask app."""
     app.cli.add_command(seed)
@@ -206,4 +405,11 @@ def register_cli_commands(app):
     app.cli.add_command(init_db)
     app.cli.add_command(reset_db)
     app.cli.add_command(create_user)
-    app.cli.add_command(list_users)
\ No newline at end of file
+    app.cli.add_command(list_users)
+    app.cli.add_command(backfill_code_sequences)
+    app.cli.add_command(rebuild_finance_rollups)
+    app.cli.add_command(reindex_search)
+    app.cli.add_command(reindex_contacts)
+    app.cli.add_command(export_worker)
+    app.cli.add_command(follow_up_digest)
+    app.cli.add_command(compute_performance_metrics)
\ No newline at end of file
@@ -4,4 +4,4 @@ from flask import Blueprint
 
 bp = Blueprint('customers', __name__)
 
-from app.customers import routes
\ No newline at end of file
+from app.customers import routes, exports
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""Customer and booking exports."""
+
+from app.models import Customer, Booking, ChannelPartner, Employee
+from app.utils.exports import Export, register_export
+
+register_export(Export(
+    'customers', 'customers', Customer,
+    columns=[
+        ('Customer Code', Customer.customer_code),
+        ('Customer Name', Customer.customer_name),
+        ('Contact No', Customer.contact_no),
+        ('Email', Customer.email),
+        ('Services', Customer.services),
+        ('Channel Partner', ChannelPartner.name),
+        ('Created At', Customer.created_at),
+    ],
+    joins=[(ChannelPartner, Customer.channel_partner_id == ChannelPartner.id)],
+    filters={
+        'customer_name': ('text', Customer.customer_name),
+        'created_at': ('range', Customer.created_at),
+    },
+))
+
+register_export(Export(
+    'bookings', 'customers', Booking,
+    columns=[
+        ('Booking Code', Booking.booking_code),
+        ('Customer Name', Booking.customer_name),
+        ('Customer Mobile', Booking.customer_mob),
+        ('Services', Booking.services),
+        ('Charge Type', Booking.charge_type),
+        ('Start Date', Booking.start_date),
+        ('End Date', Booking.end_date),
+        ('Shift Hours', Booking.shift_hours),
+        ('Service Charge', Booking.service_charge),
+        ('Other Expense', Booking.other_expanse),
+        ('GST Type', Booking.gst_type),
+        ('GST %', Booking.gst_percentage),
+        ('GST Value', Booking.gst_value),
+        ('Total Amount', Booking.total_amount),
+        ('Amount Paid', Booking.amount_paid),
+        ('Pending Amount', Booking.pending_amount),
+        ('Last Payment Date', Booking.last_payment_date),
+        ('Employee Assigned', Employee.name),
+    ],
+    joins=[(Employee, Booking.employee_assigned_id == Employee.id)],
+    filters={
+        'start_date': ('range', Booking.start_date),
+        'customer_name': ('text', Booking.customer_name),
+    },
+))
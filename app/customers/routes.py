@@ -7,6 +7,7 @@ from app import db, require_module_access
 from app.customers import bp
 from app.customers.forms import CustomerForm
 from app.models import Customer
+from app.utils.pagination import keyset_paginate
 
 
 @bp.route('/')
@@ -15,45 +16,36 @@ from app.models import Customer
 def index():
     """Display all customers and converted B2C leads."""
     from app.models import B2CLead
-    from sqlalchemy import func
-
-    customers = Customer.query.order_by(Customer.created_at.desc()).all()
-    # Query converted leads with case-insensitive comparison
-    converted_leads = B2CLead.query.filter(func.lower(B2CLead.status) == 'converted').order_by(B2CLead.created_at.desc()).all()
-
-    # Combine customers and converted leads into a single list
-    combined = []
-
-    # Add customers
-    for c in customers:
-        combined.append({
-            'id': c.id,
-            'customer_code': c.customer_code,
-            'customer_name': c.customer_name,
-            'contact_no': c.contact_no,
-            'email': c.email,
-            'services': c.services,
-            'is_converted_lead': False,
-            'lead_id': None
-        })
-
-    # Add converted leads
-    for l in converted_leads:
-        combined.append({
-            'id': l.enquiry_id,  # Use enquiry_id as id for leads
-            'customer_code': l.enquiry_id,
-            'customer_name': l.customer_name,
-            'contact_no': l.contact_no,
-            'email': l.email,
-            'services': l.services,
-            'is_converted_lead': True,
-            'lead_id': l.enquiry_id
-        })
-
-    # Sort combined list by customer_code or some other field (assuming customer_code is sortable)
-    combined.sort(key=lambda x: x['customer_code'], reverse=True)
-
-    return render_template('customers/index.html', title='Customers', customers=combined)
+    from sqlalchemy import func, literal, select, union_all
+
+    # Customers and converted B2C leads (case-insensitive status) as one list
+    customers = select(
+        Customer.id.cast(db.String).label('id'),
+        Customer.customer_code.label('customer_code'),
+        Customer.customer_name.label('customer_name'),
+        Customer.contact_no.label('contact_no'),
+        Customer.email.label('email'),
+        Customer.services.label('services'),
+        literal(False).label('is_converted_lead'),
+        literal(None, db.String).label('lead_id'),
+    )
+    converted_leads = select(
+        B2CLead.enquiry_id.label('id'),  # Use enquiry_id as id for leads
+        B2CLead.enquiry_id.label('customer_code'),
+        B2CLead.customer_name.label('customer_name'),
+        B2CLead.contact_no.label('contact_no'),
+        B2CLead.email.label('email'),
+        B2CLead.services.label('services'),
+        literal(True).label('is_converted_lead'),
+        B2CLead.enquiry_id.label('lead_id'),
+    ).where(func.lower(B2CLead.status) == 'converted')
+    combined = union_all(customers, converted_leads).subquery()
+
+    # Sorted by customer_code; lead IDs and customer codes never collide
+    page = keyset_paginate(db.session.query(combined), (combined.c.customer_code.desc(), combined.c.id.desc()),
+                           tables=('customer', 'b2c_lead'))
+
+    return render_template('customers/index.html', title='Customers', customers=page.items, page=page)
 
 
 @bp.route('/add', methods=['GET', 'POST'])
@@ -1,16 +1,19 @@
 """Dashboard routes with comprehensive CRM statistics."""
 
-from datetime import datetime, date, timedelta
-from flask import render_template, request, jsonify
+import gzip
+import os
+from datetime import date, timedelta
+from flask import (render_template, request, jsonify, flash, redirect, url_for, abort,
+                   send_file, Response)
 from flask_login import login_required, current_user
-from sqlalchemy import func, and_, or_
 
-from app import db
 from app.dashboard import bp
-from app.models import (
-    B2CLead, B2BLead, FollowUp, Customer, Employee,
-    Expense, ChannelPartner, LeadStatus, LeadType
-)
+from app.dashboard.stats import (LEAD_STATUSES, b2c_lead_stats, dashboard_stats, monthly_activity,
+                                 owner_follow_up_stats)
+from app.utils.export_jobs import artifact_path, enqueue_export
+from app.utils.exports import EXPORTS, iter_file
+from app.utils.search import global_search, contact_matches
+from app.models import ExportJob, ExportJobStatus
 
 
 @bp.route('/')
@@ -25,79 +28,16 @@ def index():
         # Get user's allowed modules
         allowed_modules = current_user.allowed_modules
 
-        # Initialize stats as None - only populate if user has access
-        b2c_stats = None
-        b2b_stats = None
-        follow_up_stats = None
-        customer_stats = None
-        booking_stats = None
-        employee_stats = None
-        expense_stats = None
-        channel_partner_stats = None
-
-        # Only populate statistics for modules user has access to
-        if 'leads_b2c' in allowed_modules:
-            b2c_stats = {
-                'total': B2CLead.query.count(),
-                'today': B2CLead.query.filter_by(enquiry_date=today).count(),
-                'new': B2CLead.query.filter(func.upper(B2CLead.status) == 'NEW').count(),
-                'follow_up': B2CLead.query.filter(func.upper(B2CLead.status) == 'FOLLOW_UP').count(),
-                'prospect': B2CLead.query.filter(func.upper(B2CLead.status) == 'PROSPECT').count(),
-                'converted': B2CLead.query.filter(func.upper(B2CLead.status) == 'CONVERTED').count(),
-                'lost': B2CLead.query.filter(func.upper(B2CLead.status) == 'LOST').count(),
-            }
-
-        if 'leads_b2b' in allowed_modules:
-            b2b_stats = {
-                'total': B2BLead.query.count(),
-                'today': B2BLead.query.filter_by(date=today).count(),
-            }
-
-        if 'follow_ups' in allowed_modules:
-            follow_up_stats = {
-                'due_today': FollowUp.query.filter_by(follow_up_on=today).count(),
-                'due_tomorrow': FollowUp.query.filter_by(follow_up_on=today + timedelta(days=1)).count(),
-                'overdue': FollowUp.query.filter(FollowUp.follow_up_on < today).count(),
-                'total': FollowUp.query.count(),
-            }
-
-        if 'customers' in allowed_modules:
-            customer_stats = {
-                'total': Customer.query.count(),
-            }
-
-
-        if 'employees' in allowed_modules:
-            employee_stats = {
-                'total': Employee.query.count(),
-            }
-
-        if 'expenses' in allowed_modules:
-            expense_stats = {
-                'total': Expense.query.count(),
-                'last_30_days': Expense.query.filter(Expense.date >= today - timedelta(days=30)).count(),
-                'amount_last_30_days': db.session.query(func.sum(Expense.expense_amount)).filter(Expense.date >= today - timedelta(days=30)).scalar() or 0,
-                'total_amount': db.session.query(func.sum(Expense.expense_amount)).scalar() or 0,
-            }
-
-        if 'channel_partners' in allowed_modules:
-            channel_partner_stats = {
-                'total': ChannelPartner.query.count(),
-                'with_customers': db.session.query(func.count(func.distinct(ChannelPartner.id))).filter(ChannelPartner.customers.any()).scalar() or 0,
-            }
+        # One aggregate query per module the user has access to
+        stats = dashboard_stats(allowed_modules, today)
+        if stats['follow_up_stats'] is not None:
+            stats['my_follow_up_stats'] = owner_follow_up_stats(current_user.id, today)
 
         return render_template('dashboard/index.html',
                               title='Dashboard',
-                              b2c_stats=b2c_stats,
-                              b2b_stats=b2b_stats,
-                              follow_up_stats=follow_up_stats,
-                              customer_stats=customer_stats,
-                              booking_stats=booking_stats,
-                              employee_stats=employee_stats,
-                              expense_stats=expense_stats,
-                              channel_partner_stats=channel_partner_stats,
                               today=today,
-                              allowed_modules=allowed_modules)
+                              allowed_modules=allowed_modules,
+                              **stats)
 
     except Exception as e:
         # Fallback in case of any errors
@@ -117,81 +57,7 @@ def search():
                               query=query,
                               results={})
 
-    results = {}
-
-    # Search B2C Leads
-    b2c_results = B2CLead.query.filter(
-        or_(
-            B2CLead.customer_name.ilike(f'%{query}%'),
-            B2CLead.contact_no.ilike(f'%{query}%'),
-            B2CLead.email.ilike(f'%{query}%'),
-            B2CLead.enquiry_id.ilike(f'%{query}%')
-        )
-    ).limit(10).all()
-    if b2c_results:
-        results['B2C Leads'] = b2c_results
-
-    # Search B2B Leads
-    b2b_results = B2BLead.query.filter(
-        or_(
-            B2BLead.organization_name.ilike(f'%{query}%'),
-            B2BLead.organization_email.ilike(f'%{query}%'),
-            B2BLead.t4h_spoc.ilike(f'%{query}%'),
-            B2BLead.sr_no.ilike(f'%{query}%'),
-            B2BLead.location.ilike(f'%{query}%'),
-            B2BLead.org_poc_name_and_role.ilike(f'%{query}%')
-        )
-    ).limit(10).all()
-    if b2b_results:
-        results['B2B Leads'] = b2b_results
-
-    # Search Customers
-    customer_results = Customer.query.filter(
-        or_(
-            Customer.customer_name.ilike(f'%{query}%'),
-            Customer.contact_no.ilike(f'%{query}%'),
-            Customer.email.ilike(f'%{query}%'),
-            Customer.customer_code.ilike(f'%{query}%')
-        )
-    ).limit(10).all()
-    if customer_results:
-        results['Customers'] = customer_results
-
-    # Search Employees
-    employee_results = Employee.query.filter(
-        or_(
-            Employee.name.ilike(f'%{query}%'),
-            Employee.contact_no.ilike(f'%{query}%'),
-            Employee.email.ilike(f'%{query}%'),
-            Employee.employee_code.ilike(f'%{query}%'),
-            Employee.designation.ilike(f'%{query}%')
-        )
-    ).limit(10).all()
-    if employee_results:
-        results['Employees'] = employee_results
-
-    # Search Channel Partners
-    partner_results = ChannelPartner.query.filter(
-        or_(
-            ChannelPartner.name.ilike(f'%{query}%'),
-            ChannelPartner.contact_no.ilike(f'%{query}%'),
-            ChannelPartner.email.ilike(f'%{query}%'),
-            ChannelPartner.partner_code.ilike(f'%{query}%')
-        )
-    ).limit(10).all()
-    if partner_results:
-        results['Channel Partners'] = partner_results
-
-    # Search Expenses
-    expense_results = Expense.query.filter(
-        or_(
-            Expense.expense_code.ilike(f'%{query}%'),
-            Expense.category.ilike(f'%{query}%'),
-            Expense.sub_category.ilike(f'%{query}%')
-        )
-    ).limit(10).all()
-    if expense_results:
-        results['Expenses'] = expense_results
+    results = global_search(query)
 
     return render_template('dashboard/search.html',
                           title='Search Results',
@@ -199,6 +65,80 @@ def search():
                           results=results)
 
 
+@bp.route('/api/contact-matches')
+@login_required
+def contact_matches_api():
+    """API endpoint listing every record with the given phone number or email."""
+    query = request.args.get('q', '').strip()
+    return jsonify({'query': query, 'matches': contact_matches(query) if query else []})
+
+
+@bp.route('/exports')
+@login_required
+def exports():
+    """Background export jobs requested by the current user."""
+    jobs = current_user.export_jobs.order_by(ExportJob.created_at.desc(), ExportJob.id.desc()).limit(50).all()
+    return render_template('dashboard/exports.html', title='My Exports', jobs=jobs)
+
+
+@bp.route('/exports/start/<name>')
+@login_required
+def export_start(name):
+    """Queue a background export; other query arguments are its filters."""
+    export = EXPORTS.get(name)
+    if export is None:
+        abort(404)
+    if not current_user.has_module_access(export.module):
+        abort(403)
+
+    args = {key: value for key, value in request.args.items() if key != 'format'}
+    try:
+        job = enqueue_export(name, request.args.get('format', 'xlsx'), args, current_user.id)
+    except ValueError as e:
+        flash(f'Could not start export: {e}', 'error')
+    else:
+        flash(f'Export of {export.title} started. It will be ready to download below.', 'success')
+    return redirect(url_for('dashboard.exports'))
+
+
+@bp.route('/exports/<int:id>/download')
+@login_required
+def export_download(id):
+    """Download the file of a finished export job."""
+    job = ExportJob.query.filter_by(id=id, requested_by=current_user.id).first_or_404()
+    if job.status != ExportJobStatus.COMPLETED or not os.path.exists(artifact_path(job)):
+        flash('This export is not available for download.', 'error')
+        return redirect(url_for('dashboard.exports'))
+
+    path = artifact_path(job)
+    filename = f'{job.export_name}.{job.export_format}'
+    if job.export_format != 'csv':
+        return send_file(path, as_attachment=True, download_name=filename)
+
+    # CSV files are stored gzipped: send them as-is to clients that accept gzip
+    if 'gzip' in request.accept_encodings:
+        response = send_file(path, mimetype='text/csv', as_attachment=True, download_name=filename,
+                             conditional=False)
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    # Otherwise decompress on the fly
+    return Response(iter_file(path, opener=gzip.open), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
+@bp.route('/api/export-jobs')
+@login_required
+def export_jobs_api():
+    """API endpoint with the status and progress of the user's export jobs."""
+    ids = [int(job_id) for job_id in request.args.get('ids', '').split(',') if job_id.isdigit()]
+    jobs = current_user.export_jobs
+    if ids:
+        jobs = jobs.filter(ExportJob.id.in_(ids))
+    jobs = jobs.order_by(ExportJob.created_at.desc(), ExportJob.id.desc()).limit(50).all()
+    return jsonify({'jobs': [job.to_dict() for job in jobs]})
+
+
 @bp.route('/api/chart-data')
 @login_required
 def chart_data():
@@ -214,17 +154,12 @@ def chart_data():
 
         # Lead conversion funnel data
         if 'leads_b2c' in allowed_modules:
+            lead_stats = b2c_lead_stats(end_date)
             funnel_data = {
                 'labels': ['New', 'Follow Up', 'Prospect', 'Converted', 'Lost'],
                 'datasets': [{
                     'label': 'B2C Leads',
-                    'data': [
-                        B2CLead.query.filter(func.upper(B2CLead.status) == 'NEW').count(),
-                        B2CLead.query.filter(func.upper(B2CLead.status) == 'FOLLOW_UP').count(),
-                        B2CLead.query.filter(func.upper(B2CLead.status) == 'PROSPECT').count(),
-                        B2CLead.query.filter(func.upper(B2CLead.status) == 'CONVERTED').count(),
-                        B2CLead.query.filter(func.upper(B2CLead.status) == 'LOST').count(),
-                    ],
+                    'data': [lead_stats[status.lower()] for status in LEAD_STATUSES],
                     'backgroundColor': [
                         'rgba(13, 110, 253, 0.8)',   # Blue
                         'rgba(255, 193, 7, 0.8)',    # Yellow
@@ -258,34 +193,13 @@ def chart_data():
 
         # Calculate metrics for current month
         month_start = date.today().replace(day=1)
-
-        if 'leads_b2c' in allowed_modules:
-            monthly_leads = B2CLead.query.filter(B2CLead.created_at >= month_start).count()
-        else:
-            monthly_leads = 0
-
-        if 'customers' in allowed_modules:
-            monthly_customers = Customer.query.filter(Customer.created_at >= month_start).count()
-        else:
-            monthly_customers = 0
-
-        if 'employees' in allowed_modules:
-            monthly_employees = Employee.query.filter(Employee.created_at >= month_start).count()
-        else:
-            monthly_employees = 0
-
-        if 'expenses' in allowed_modules:
-            monthly_expenses = db.session.query(func.sum(Expense.expense_amount)).filter(
-                Expense.created_at >= month_start
-            ).scalar() or 0
-        else:
-            monthly_expenses = 0
+        activity = monthly_activity(month_start, allowed_modules)
 
         performance_data['datasets'][0]['data'] = [
-            monthly_leads,
-            monthly_customers,
-            monthly_employees,
-            float(monthly_expenses)
+            activity['leads'],
+            activity['customers'],
+            activity['employees'],
+            float(activity['expenses'])
         ]
 
         chart_data['performance'] = performance_data
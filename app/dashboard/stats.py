@@ -0,0 +1,154 @@
+"""Aggregate statistics for the dashboard.
+
+Each helper computes all numbers for one module with a single CASE-based
+aggregate over its table, so the dashboard costs one query per module
+instead of one query per number. Results are cached until a write to one of
+the tables they read (see app.utils.cache).
+"""
+
+from datetime import date, timedelta
+
+from sqlalchemy import case, func, select
+
+from app import db
+from app.follow_ups.agenda import agenda_counts, owner_agenda
+from app.models import B2CLead, B2BLead, FollowUp, Customer, Employee, Expense, ChannelPartner
+from app.utils.cache import cached
+
+LEAD_STATUSES = ('NEW', 'FOLLOW_UP', 'PROSPECT', 'CONVERTED', 'LOST')
+ACTIVITY_MODULES = ('leads_b2c', 'customers', 'employees', 'expenses')
+
+
+def _count_where(condition):
+    """SUM(CASE WHEN condition THEN 1 ELSE 0 END)."""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum_where(column, condition):
+    """SUM(CASE WHEN condition THEN column ELSE 0 END)."""
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+@cached('dashboard.b2c_lead_stats', ('b2c_lead',))
+def b2c_lead_stats(today: date) -> dict:
+    """Total, today's and per-status B2C lead counts."""
+    status = func.upper(B2CLead.status)
+    row = db.session.query(
+        func.count(B2CLead.enquiry_id),
+        _count_where(B2CLead.enquiry_date == today),
+        *[_count_where(status == value) for value in LEAD_STATUSES]
+    ).one()
+    stats = {'total': row[0], 'today': row[1]}
+    stats.update({value.lower(): count for value, count in zip(LEAD_STATUSES, row[2:])})
+    return stats
+
+
+@cached('dashboard.b2b_lead_stats', ('b2b_lead',))
+def b2b_lead_stats(today: date) -> dict:
+    """Total and today's B2B lead counts."""
+    total, today_count = db.session.query(
+        func.count(B2BLead.id),
+        _count_where(B2BLead.date == today),
+    ).one()
+    return {'total': total, 'today': today_count}
+
+
+@cached('dashboard.follow_up_stats', ('follow_up',))
+def follow_up_stats(today: date) -> dict:
+    """Follow-ups due today, tomorrow, overdue and in total."""
+    due_today, due_tomorrow, overdue, total = db.session.query(
+        _count_where(FollowUp.follow_up_on == today),
+        _count_where(FollowUp.follow_up_on == today + timedelta(days=1)),
+        _count_where(FollowUp.follow_up_on < today),
+        func.count(FollowUp.id),
+    ).one()
+    return {'due_today': due_today, 'due_tomorrow': due_tomorrow, 'overdue': overdue, 'total': total}
+
+
+@cached('dashboard.owner_follow_up_stats', ('follow_up',))
+def owner_follow_up_stats(owner_id: int, today: date) -> dict:
+    """One owner's agenda counts (see app.follow_ups.agenda)."""
+    return agenda_counts(owner_agenda(owner_id, today), today)
+
+
+@cached('dashboard.customer_stats', ('customer',))
+def customer_stats() -> dict:
+    """Customer totals."""
+    return {'total': db.session.query(func.count(Customer.id)).scalar()}
+
+
+@cached('dashboard.employee_stats', ('employee',))
+def employee_stats() -> dict:
+    """Employee totals."""
+    return {'total': db.session.query(func.count(Employee.id)).scalar()}
+
+
+@cached('dashboard.expense_stats', ('expense',))
+def expense_stats(today: date) -> dict:
+    """Expense counts and amounts, overall and for the last 30 days."""
+    recent = Expense.date >= today - timedelta(days=30)
+    total, last_30_days, amount_last_30_days, total_amount = db.session.query(
+        func.count(Expense.id),
+        _count_where(recent),
+        _sum_where(Expense.expense_amount, recent),
+        func.coalesce(func.sum(Expense.expense_amount), 0),
+    ).one()
+    return {
+        'total': total,
+        'last_30_days': last_30_days,
+        'amount_last_30_days': amount_last_30_days,
+        'total_amount': total_amount,
+    }
+
+
+@cached('dashboard.channel_partner_stats', ('channel_partner', 'customer'))
+def channel_partner_stats() -> dict:
+    """Channel partner totals and how many have at least one customer."""
+    with_customers = select(func.count(func.distinct(Customer.channel_partner_id)))\
+        .where(Customer.channel_partner_id.isnot(None)).scalar_subquery()
+    total, with_customers = db.session.query(func.count(ChannelPartner.id), with_customers).one()
+    return {'total': total, 'with_customers': with_customers or 0}
+
+
+def monthly_activity(month_start: date, allowed_modules) -> dict:
+    """Records created since the start of the month, per module the user can see."""
+    return _monthly_activity(month_start, tuple(sorted(set(allowed_modules) & set(ACTIVITY_MODULES))))
+
+
+@cached('dashboard.monthly_activity', ('b2c_lead', 'customer', 'employee', 'expense'))
+def _monthly_activity(month_start: date, allowed_modules: tuple) -> dict:
+    activity = {'leads': 0, 'customers': 0, 'employees': 0, 'expenses': 0}
+    if 'leads_b2c' in allowed_modules:
+        activity['leads'] = db.session.query(func.count(B2CLead.enquiry_id))\
+            .filter(B2CLead.created_at >= month_start).scalar()
+    if 'customers' in allowed_modules:
+        activity['customers'] = db.session.query(func.count(Customer.id))\
+            .filter(Customer.created_at >= month_start).scalar()
+    if 'employees' in allowed_modules:
+        activity['employees'] = db.session.query(func.count(Employee.id))\
+            .filter(Employee.created_at >= month_start).scalar()
+    if 'expenses' in allowed_modules:
+        activity['expenses'] = db.session.query(func.coalesce(func.sum(Expense.expense_amount), 0))\
+            .filter(Expense.created_at >= month_start).scalar()
+    return activity
+
+
+# Template variable and stats helper for each module shown on the dashboard
+MODULE_STATS = {
+    'leads_b2c': ('b2c_stats', b2c_lead_stats),
+    'leads_b2b': ('b2b_stats', b2b_lead_stats),
+    'follow_ups': ('follow_up_stats', follow_up_stats),
+    'customers': ('customer_stats', lambda today: customer_stats()),
+    'employees': ('employee_stats', lambda today: employee_stats()),
+    'expenses': ('expense_stats', expense_stats),
+    'channel_partners': ('channel_partner_stats', lambda today: channel_partner_stats()),
+}
+
+
+def dashboard_stats(allowed_modules, today: date = None) -> dict:
+    """Statistics for every dashboard module, None for modules the user cannot access."""
+    today = today or date.today()
+    stats = {'booking_stats': None}
+    for module, (name, compute) in MODULE_STATS.items():
+        stats[name] = compute(today) if module in allowed_modules else None
+    return stats
@@ -4,4 +4,4 @@ from flask import Blueprint
 
 bp = Blueprint('employees', __name__)
 
-from app.employees import routes
\ No newline at end of file
+from app.employees import routes, exports
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""Monthly attendance summaries and day-by-day matrices.
+
+Both read one month with a single query: the summary is one grouped aggregate
+over employees left-joined to their attendance (status counts and working
+hours per employee), the matrix one scan of the month's attendance rows
+(served by the unique (employee_id, date) index) pivoted in Python. Results
+are plain data, cached until the employee or attendance table changes.
+
+:func:`upsert_attendance` marks a whole roster for one day with a single
+INSERT ... ON CONFLICT (employee_id, date) DO UPDATE.
+"""
+
+import calendar
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, case, func
+
+from app import db
+from app.models import Attendance, AttendanceStatus, Employee
+from app.utils.cache import cached, mark_tables_changed
+from app.utils.upsert import upsert
+
+AttendanceSummary = namedtuple('AttendanceSummary', 'employee_id employee_code name present absent '
+                                                    'half_day late total_days working_hours')
+
+# Matrix cell labels and badge colours per status
+STATUS_LABELS = {
+    AttendanceStatus.PRESENT.value: ('P', 'success'),
+    AttendanceStatus.ABSENT.value: ('A', 'danger'),
+    AttendanceStatus.HALF_DAY.value: ('H', 'warning'),
+    AttendanceStatus.LATE.value: ('L', 'info'),
+}
+
+
+def parse_month(value, default: date = None) -> date:
+    """First day of the month given as 'YYYY-MM'; ``default``'s month (today) if missing or invalid."""
+    try:
+        year, month = (int(part) for part in (value or '').split('-'))
+        return date(year, month, 1)
+    except ValueError:
+        return (default or date.today()).replace(day=1)
+
+
+def month_end(month_start: date) -> date:
+    return month_start.replace(day=calendar.monthrange(month_start.year, month_start.month)[1])
+
+
+def shift_month(month_start: date, months: int) -> date:
+    """First day of the month ``months`` before (negative) or after ``month_start``.
+
+    Clamped to the months ``date`` supports (0001-01 to 9999-12).
+    """
+    index = month_start.year * 12 + month_start.month - 1 + months
+    index = min(max(index, date.min.year * 12), date.max.year * 12 + 11)
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _count_status(status):
+    return func.coalesce(func.sum(case((Attendance.status == status, 1), else_=0)), 0)
+
+
+@cached('employees.attendance_summary', ('employee', 'attendance'))
+def attendance_summary(month_start: date) -> list:
+    """Status counts and working hours of every employee for one month, by name."""
+    in_month = and_(Attendance.employee_id == Employee.id,
+                    Attendance.date.between(month_start, month_end(month_start)))
+    rows = db.session.query(
+        Employee.id, Employee.employee_code, Employee.name,
+        _count_status(AttendanceStatus.PRESENT),
+        _count_status(AttendanceStatus.ABSENT),
+        _count_status(AttendanceStatus.HALF_DAY),
+        _count_status(AttendanceStatus.LATE),
+        func.count(Attendance.id),
+        func.coalesce(func.sum(Attendance.working_hours), 0),
+    ).outerjoin(Attendance, in_month)\
+        .group_by(Employee.id, Employee.employee_code, Employee.name)\
+        .order_by(Employee.name, Employee.id).all()
+    return [AttendanceSummary(*row) for row in rows]
+
+
+@cached('employees.attendance_matrix', ('attendance',))
+def attendance_matrix(month_start: date) -> dict:
+    """{employee id: {day of month: status value}} for one month."""
+    rows = db.session.query(Attendance.employee_id, Attendance.date, Attendance.status)\
+        .filter(Attendance.date.between(month_start, month_end(month_start))).all()
+    matrix = {}
+    for employee_id, day, status in rows:
+        matrix.setdefault(employee_id, {})[day.day] = status.value
+    return matrix
+
+
+def attendance_percentage(summary: AttendanceSummary) -> float:
+    """Share of recorded days the employee was present."""
+    return summary.present / summary.total_days * 100 if summary.total_days else 0
+
+
+def working_hours(check_in, check_out):
+    """Hours between check-in and check-out times, to 2 places; None unless both are set."""
+    if check_in is None or check_out is None:
+        return None
+    seconds = (datetime.combine(date.min, check_out) - datetime.combine(date.min, check_in)).total_seconds()
+    return round(Decimal(seconds) / 3600, 2)
+
+
+def day_roster(attendance_date: date) -> dict:
+    """{employee id: Attendance} of everything already marked on one day."""
+    return {record.employee_id: record
+            for record in Attendance.query.filter(Attendance.date == attendance_date)}
+
+
+def parse_roster(form, employee_ids) -> tuple:
+    """Read ``status_<id>``, ``check_in_<id>``, ``check_out_<id>`` and ``notes_<id>`` fields.
+
+    Employees left without a status are skipped. Returns (entries, errors):
+    entries are dicts of Attendance column values (working hours included),
+    errors are messages for rows that could not be read.
+    """
+    entries, errors = [], []
+    for employee_id in employee_ids:
+        status = (form.get(f'status_{employee_id}') or '').strip()
+        if not status:
+            continue
+        try:
+            entry = {
+                'employee_id': employee_id,
+                'status': AttendanceStatus[status],
+                'check_in_time': _time(form.get(f'check_in_{employee_id}')),
+                'check_out_time': _time(form.get(f'check_out_{employee_id}')),
+                'notes': (form.get(f'notes_{employee_id}') or '').strip() or None,
+            }
+        except (KeyError, ValueError):
+            errors.append(f'Employee {employee_id}: invalid status or time')
+            continue
+        hours = working_hours(entry['check_in_time'], entry['check_out_time'])
+        if hours is not None and hours < 0:
+            errors.append(f'Employee {employee_id}: check-out is before check-in')
+            continue
+        entry['working_hours'] = hours
+        entries.append(entry)
+    return entries, errors
+
+
+def _time(value):
+    value = (value or '').strip()
+    return datetime.strptime(value, '%H:%M').time() if value else None
+
+
+def upsert_attendance(attendance_date: date, entries, user_id: int) -> int:
+    """Mark attendance of many employees for one day in a single statement.
+
+    Existing records for the day are updated in place (keeping who created
+    them); the caller commits. Returns the number of rows written.
+    """
+    if not entries:
+        return 0
+    now = datetime.utcnow()
+    rows = [dict(entry, date=attendance_date, created_at=now, updated_at=now,
+                 created_by=user_id, updated_by=user_id) for entry in entries]
+    update_columns = ('status', 'check_in_time', 'check_out_time', 'working_hours', 'notes',
+                      'updated_at', 'updated_by')
+    session = db.session()
+    upsert(session.connection(), Attendance.__table__, rows, ('employee_id', 'date'), update_columns)
+    mark_tables_changed(session, Attendance.__tablename__)
+    return len(rows)
@@ -0,0 +1,29 @@
+"""Employee exports."""
+
+from app.models import Employee
+from app.utils.exports import Export, register_export
+
+register_export(Export(
+    'employees', 'employees', Employee,
+    columns=[
+        ('Employee Code', Employee.employee_code),
+        ('Name', Employee.name),
+        ('Employment Type', Employee.employ_type),
+        ('Designation', Employee.designation),
+        ('Gender', Employee.gender),
+        ('Date of Birth', Employee.dob),
+        ('Contact No', Employee.contact_no),
+        ('WhatsApp No', Employee.whatsapp_no),
+        ('Email', Employee.email),
+        ('Degree', Employee.degree),
+        ('Total Experience', Employee.total_experience),
+        ('Skill Set', Employee.skill_set),
+        ('Temporary Address', Employee.temporary_address),
+        ('Permanent Address', Employee.permanent_address),
+    ],
+    filters={
+        'designation': ('choice', Employee.designation),
+        'employ_type': ('choice', Employee.employ_type),
+    },
+    order_by=(Employee.name,),
+))
@@ -0,0 +1,146 @@
+"""Monthly employee performance metrics, computed in batch.
+
+``flask compute-performance-metrics`` (run nightly) builds one
+:class:`~app.models.PerformanceMetric` row per employee per month, dated the
+first of the month, from a fixed number of grouped queries whatever the
+number of employees:
+
+- tasks: completed in the month, and the distinct leads of tasks created in
+  it (assigned) together with how many of those leads are converted;
+- bookings assigned to the employee that ended in the month, and their value;
+- follow-ups done in the month by the user account with the employee's email;
+- attendance: present days over recorded days (see app.employees.attendance).
+
+All rows are written with one upsert; the customer satisfaction rating is
+not computed and keeps whatever was stored for the month. The performance
+page only reads.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import and_, case, delete, func, or_
+
+from app import db
+from app.employees.attendance import attendance_percentage, attendance_summary, month_end
+from app.models import B2CLead, Booking, Employee, FollowUp, PerformanceMetric, Task, TaskStatus, User
+from app.utils.cache import mark_tables_changed
+from app.utils.upsert import upsert
+
+COMPUTED_COLUMNS = ('leads_assigned', 'leads_converted', 'bookings_completed', 'revenue_generated',
+                    'follow_ups_done', 'tasks_completed', 'attendance_percentage')
+
+
+def _task_metrics(start: date, end: date) -> dict:
+    """{employee id: (leads assigned, leads converted, tasks completed)}."""
+    created = and_(Task.created_at >= start, Task.created_at < end + timedelta(days=1))
+    completed = and_(Task.status == TaskStatus.COMPLETED,
+                     Task.completed_at >= start, Task.completed_at < end + timedelta(days=1))
+    converted = func.lower(B2CLead.status) == 'converted'
+    rows = db.session.query(
+        Task.assigned_to,
+        func.count(func.distinct(case((created, Task.lead_id)))),
+        func.count(func.distinct(case((and_(created, converted), Task.lead_id)))),
+        func.coalesce(func.sum(case((completed, 1), else_=0)), 0),
+    ).outerjoin(B2CLead, B2CLead.enquiry_id == Task.lead_id)\
+        .filter(or_(created, completed))\
+        .group_by(Task.assigned_to).all()
+    return {employee_id: values for employee_id, *values in rows}
+
+
+def _booking_metrics(start: date, end: date) -> dict:
+    """{employee id: (bookings completed, revenue)}."""
+    rows = db.session.query(
+        Booking.employee_assigned_id,
+        func.count(Booking.id),
+        func.coalesce(func.sum(Booking.total_amount), 0),
+    ).filter(Booking.employee_assigned_id.isnot(None), Booking.end_date.between(start, end))\
+        .group_by(Booking.employee_assigned_id).all()
+    return {employee_id: values for employee_id, *values in rows}
+
+
+def _follow_up_metrics(start: date, end: date) -> dict:
+    """{employee id: follow-ups done}, matching employees to users by email."""
+    rows = db.session.query(Employee.id, func.count(FollowUp.id))\
+        .join(User, func.lower(User.email) == func.lower(Employee.email))\
+        .join(FollowUp, FollowUp.owner_id == User.id)\
+        .filter(FollowUp.follow_up_on.between(start, end))\
+        .group_by(Employee.id).all()
+    return dict(rows)
+
+
+def compute_performance_metrics(month_start: date, as_of: date = None) -> list:
+    """Metric rows (dicts of PerformanceMetric columns) of every employee for one month.
+
+    Activity dated after ``as_of`` (default today) is not counted yet.
+    """
+    as_of = as_of or date.today()
+    end = min(month_end(month_start), as_of)
+    tasks = _task_metrics(month_start, end)
+    bookings = _booking_metrics(month_start, end)
+    follow_ups = _follow_up_metrics(month_start, end)
+
+    rows = []
+    for summary in attendance_summary(month_start):
+        employee_id = summary.employee_id
+        leads_assigned, leads_converted, tasks_completed = tasks.get(employee_id, (0, 0, 0))
+        bookings_completed, revenue = bookings.get(employee_id, (0, 0))
+        rows.append({
+            'employee_id': employee_id,
+            'metric_date': month_start,
+            'leads_assigned': leads_assigned,
+            'leads_converted': leads_converted,
+            'bookings_completed': bookings_completed,
+            'revenue_generated': Decimal(revenue).quantize(Decimal('0.01')),
+            'follow_ups_done': follow_ups.get(employee_id, 0),
+            'tasks_completed': tasks_completed,
+            'attendance_percentage': round(Decimal(attendance_percentage(summary)), 2)
+            if summary.total_days else None,
+        })
+    return rows
+
+
+def _stored_ratings(month_start: date) -> dict:
+    """{employee id: customer satisfaction} stored for the month.
+
+    The month's own row wins over rows stored under later dates, which in
+    turn go latest first.
+    """
+    rows = db.session.query(PerformanceMetric.employee_id, PerformanceMetric.customer_satisfaction)\
+        .filter(PerformanceMetric.metric_date.between(month_start, month_end(month_start)),
+                PerformanceMetric.customer_satisfaction.isnot(None))\
+        .order_by(case((PerformanceMetric.metric_date == month_start, 1), else_=0),
+                  PerformanceMetric.metric_date).all()
+    return dict(rows)
+
+
+def save_performance_metrics(month_start: date, as_of: date = None) -> int:
+    """Compute and upsert one month's metrics for every employee; the caller commits.
+
+    Rows stored under other dates of the month (written before metrics were
+    kept per month) are removed, their customer satisfaction carried over.
+    Returns the number of employees written.
+    """
+    rows = compute_performance_metrics(month_start, as_of)
+    ratings = _stored_ratings(month_start)
+    now = datetime.utcnow()
+    for row in rows:
+        row.update(customer_satisfaction=ratings.get(row['employee_id']), created_at=now, updated_at=now)
+
+    session = db.session()
+    connection = session.connection()
+    table = PerformanceMetric.__table__
+    connection.execute(delete(table).where(
+        table.c.metric_date.between(month_start + timedelta(days=1), month_end(month_start))))
+    upsert(connection, table, rows, ('employee_id', 'metric_date'),
+           COMPUTED_COLUMNS + ('customer_satisfaction', 'updated_at'))
+    mark_tables_changed(session, PerformanceMetric.__tablename__)
+    return len(rows)
+
+
+def performance_rows(month_start: date) -> list:
+    """(employee, metrics) pairs for one month by name; metrics is None until computed."""
+    return db.session.query(Employee, PerformanceMetric)\
+        .outerjoin(PerformanceMetric, and_(PerformanceMetric.employee_id == Employee.id,
+                                           PerformanceMetric.metric_date == month_start))\
+        .order_by(Employee.name, Employee.id).all()
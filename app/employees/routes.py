@@ -8,11 +8,18 @@ from werkzeug.utils import secure_filename
 
 from app import db, require_module_access
 from app.employees import bp
+from app.employees.attendance import (STATUS_LABELS, attendance_matrix, attendance_percentage, attendance_summary,
+                                      day_roster, month_end, parse_month, parse_roster, shift_month,
+                                      upsert_attendance, working_hours)
+from app.employees.performance import COMPUTED_COLUMNS, performance_rows, save_performance_metrics
 from app.employees.forms import EmployeeForm
 from app.models import (
-    Employee, Attendance, Leave, Task, PerformanceMetric,
-    AttendanceStatus, LeaveType, LeaveStatus, TaskStatus, TaskPriority
+    Employee, Attendance, Leave, Task, PerformanceMetric, SearchDocument, SEARCH_ENTITIES,
+    ContactIndex, CONTACT_ENTITIES, AttendanceStatus, LeaveType, LeaveStatus, TaskStatus, TaskPriority
 )
+from app.utils.cache import mark_tables_changed
+from app.utils.choices import setting_options
+from app.utils.pagination import keyset_paginate
 
 
 def save_uploaded_file(file_field, upload_folder, filename_prefix=""):
@@ -73,16 +80,12 @@ def index():
 @require_module_access('employees')
 def add():
     """Add a new employee."""
-    from app.models import Setting
     
     form = EmployeeForm()
     
     # Populate dropdown choices from database
-    designation_options = Setting.get_options('EmployeeDesignation')
-    form.designation.choices = [('', 'Select Designation')] + [(opt.value, opt.value) for opt in designation_options]
-    
-    employ_type_options = Setting.get_options('EmployeeType')
-    form.employ_type.choices = [('', 'Select Employment Type')] + [(opt.value, opt.value) for opt in employ_type_options]
+    form.designation.choices = [('', 'Select Designation')] + [(value, value) for key, value in setting_options('EmployeeDesignation')]
+    form.employ_type.choices = [('', 'Select Employment Type')] + [(value, value) for key, value in setting_options('EmployeeType')]
     
     form.employee_code.data = Employee.generate_employee_code()
     if form.validate_on_submit():
@@ -211,7 +214,6 @@ def edit(id):
     """Edit an employee."""
     # Use raw SQL to handle empty gender values
     from sqlalchemy import text
-    from app.models import Setting
 
     class SimpleEmployee:
         def __init__(self, **kwargs):
@@ -255,11 +257,8 @@ def edit(id):
     form = EmployeeForm()
     
     # Populate dropdown choices from database
-    designation_options = Setting.get_options('EmployeeDesignation')
-    form.designation.choices = [('', 'Select Designation')] + [(opt.value, opt.value) for opt in designation_options]
-    
-    employ_type_options = Setting.get_options('EmployeeType')
-    form.employ_type.choices = [('', 'Select Employment Type')] + [(opt.value, opt.value) for opt in employ_type_options]
+    form.designation.choices = [('', 'Select Designation')] + [(value, value) for key, value in setting_options('EmployeeDesignation')]
+    form.employ_type.choices = [('', 'Select Employment Type')] + [(value, value) for key, value in setting_options('EmployeeType')]
     if request.method == 'GET':
         form.employee_code.data = employee_dict['employee_code']
         form.name.data = employee_dict['name']
@@ -333,6 +332,15 @@ def edit(id):
             update_data['id'] = id
 
             db.session.execute(text(update_query), update_data)
+            # The raw UPDATE skips the mapper hooks: refresh the search document
+            # and contact index entries here
+            connection = db.session.connection()
+            SearchDocument.upsert(connection, 'employee', id, SearchDocument.content_for(
+                update_data[field] for field in SEARCH_ENTITIES['employee'][1]))
+            _model, phone_fields, email_fields = CONTACT_ENTITIES['employee']
+            ContactIndex.replace(connection, 'employee', id,
+                                 ContactIndex.entries_for(update_data, phone_fields, email_fields))
+            mark_tables_changed(db.session(), 'employee')
             db.session.commit()
             flash('Employee updated successfully!', 'success')
             return redirect(url_for('employees.index'))
@@ -373,37 +381,43 @@ def edit(id):
 @login_required
 @require_module_access('employees')
 def attendance():
-    """Display attendance records."""
-    from datetime import date, timedelta
+    """Display the monthly attendance summary (``month=YYYY-MM``, default this month)."""
+    from datetime import date
 
-    # Get current month
     today = date.today()
-    start_of_month = today.replace(day=1)
+    month = parse_month(request.args.get('month'), today)
+    summaries = attendance_summary(month)
+    matrix = attendance_matrix(month)
 
-    # Get all employees with their attendance for current month
-    employees = Employee.query.all()
     attendance_data = []
-
-    for employee in employees:
-        monthly_attendance = Attendance.query.filter(
-            Attendance.employee_id == employee.id,
-            Attendance.date >= start_of_month,
-            Attendance.date <= today
-        ).all()
-
-        present_days = sum(1 for a in monthly_attendance if a.status == AttendanceStatus.PRESENT)
-        total_days = len(monthly_attendance)
-
+    for summary in summaries:
+        days = matrix.get(summary.employee_id, {})
         attendance_data.append({
-            'employee': employee,
-            'attendance': monthly_attendance,
-            'present_days': present_days,
-            'total_days': total_days,
-            'percentage': (present_days / total_days * 100) if total_days > 0 else 0
+            'employee': summary,
+            'recent': [(month.replace(day=day), days[day]) for day in sorted(days)[-5:]],
+            'present_days': summary.present,
+            'total_days': summary.total_days,
+            'percentage': attendance_percentage(summary),
         })
 
     return render_template('employees/attendance.html', title='Attendance Management',
-                         attendance_data=attendance_data, today=today)
+                         attendance_data=attendance_data, today=today, month=month,
+                         prev_month=shift_month(month, -1), next_month=shift_month(month, 1))
+
+
+@bp.route('/attendance/matrix')
+@login_required
+@require_module_access('employees')
+def attendance_matrix_view():
+    """Month-by-day attendance matrix of every employee (``month=YYYY-MM``)."""
+    from datetime import date
+
+    month = parse_month(request.args.get('month'))
+    return render_template('employees/attendance_matrix.html', title='Attendance Matrix',
+                         summaries=attendance_summary(month), matrix=attendance_matrix(month),
+                         month=month, days=range(1, month_end(month).day + 1), today=date.today(),
+                         status_labels=STATUS_LABELS,
+                         prev_month=shift_month(month, -1), next_month=shift_month(month, 1))
 
 
 @bp.route('/attendance/mark', methods=['POST'])
@@ -449,12 +463,7 @@ def mark_attendance():
     )
 
     # Calculate working hours if both times provided
-    if attendance.check_in_time and attendance.check_out_time:
-        from datetime import datetime, date
-        check_in_dt = datetime.combine(date.today(), attendance.check_in_time)
-        check_out_dt = datetime.combine(date.today(), attendance.check_out_time)
-        hours = (check_out_dt - check_in_dt).total_seconds() / 3600
-        attendance.working_hours = round(hours, 2)
+    attendance.working_hours = working_hours(attendance.check_in_time, attendance.check_out_time)
 
     db.session.add(attendance)
     db.session.commit()
@@ -463,14 +472,54 @@ def mark_attendance():
     return redirect(url_for('employees.attendance'))
 
 
+@bp.route('/attendance/bulk', methods=['GET', 'POST'])
+@login_required
+@require_module_access('employees')
+def bulk_attendance():
+    """Mark or correct the attendance of the whole roster for one day (``date=YYYY-MM-DD``)."""
+    from datetime import date
+
+    try:
+        attendance_date = date.fromisoformat(request.values.get('date') or date.today().isoformat())
+    except ValueError:
+        flash('Invalid date.', 'error')
+        return redirect(url_for('employees.bulk_attendance'))
+
+    employees = Employee.query.with_entities(Employee.id, Employee.employee_code, Employee.name)\
+        .order_by(Employee.name, Employee.id).all()
+
+    if request.method == 'POST':
+        entries, errors = parse_roster(request.form, [employee.id for employee in employees])
+        for error in errors[:10]:
+            flash(error, 'error')
+        if errors:
+            flash('Attendance not saved; correct the rows above and submit again.', 'error')
+        elif not entries:
+            flash('No attendance to save: set a status for at least one employee.', 'warning')
+        else:
+            try:
+                count = upsert_attendance(attendance_date, entries, current_user.id)
+                db.session.commit()
+                flash(f'Attendance saved for {count} employees on {attendance_date.strftime("%d-%m-%Y")}.', 'success')
+                return redirect(url_for('employees.bulk_attendance', date=attendance_date.isoformat()))
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error saving attendance: {str(e)}', 'error')
+
+    return render_template('employees/attendance_bulk.html', title='Bulk Attendance',
+                         employees=employees, roster=day_roster(attendance_date),
+                         attendance_date=attendance_date, statuses=list(AttendanceStatus),
+                         form=request.form if request.method == 'POST' else None)
+
+
 # Leave Management Routes
 @bp.route('/leave')
 @login_required
 @require_module_access('employees')
 def leave():
     """Display leave requests."""
-    leave_requests = Leave.query.order_by(Leave.created_at.desc()).all()
-    return render_template('employees/leave.html', title='Leave Management', leave_requests=leave_requests)
+    page = keyset_paginate(Leave.query, (Leave.created_at.desc(), Leave.id.desc()), tables=('leave',))
+    return render_template('employees/leave.html', title='Leave Management', leave_requests=page.items, page=page)
 
 
 @bp.route('/leave/apply', methods=['GET', 'POST'])
@@ -544,8 +593,8 @@ def approve_leave(leave_id):
 def tasks():
     """Display all tasks."""
     from datetime import date
-    all_tasks = Task.query.order_by(Task.created_at.desc()).all()
-    return render_template('employees/tasks.html', title='Task Management', tasks=all_tasks, date=date)
+    page = keyset_paginate(Task.query, (Task.created_at.desc(), Task.id.desc()), tables=('task',))
+    return render_template('employees/tasks.html', title='Task Management', tasks=page.items, page=page, date=date)
 
 
 @bp.route('/tasks/assign', methods=['GET', 'POST'])
@@ -605,46 +654,40 @@ def update_task(task_id):
 @login_required
 @require_module_access('employees')
 def performance():
-    """Display employee performance metrics."""
-    from datetime import date, timedelta
+    """Display employee performance metrics for a month (``month=YYYY-MM``, default this month)."""
+    month = parse_month(request.args.get('month'))
 
-    # Get current month metrics
-    today = date.today()
-    start_of_month = today.replace(day=1)
-
-    employees = Employee.query.all()
     performance_data = []
-
-    for employee in employees:
-        # Get current month metrics
-        monthly_metrics = PerformanceMetric.query.filter(
-            PerformanceMetric.employee_id == employee.id,
-            PerformanceMetric.metric_date >= start_of_month
-        ).first()
-
-        # Calculate some basic metrics if not available
-        if not monthly_metrics:
-            # Calculate from actual data
-            leads_assigned = len(employee.assigned_tasks)  # This is approximate
-            tasks_completed = Task.query.filter(
-                Task.assigned_to == employee.id,
-                Task.status == TaskStatus.COMPLETED,
-                Task.completed_at >= start_of_month
-            ).count()
-
-            monthly_metrics = PerformanceMetric(
-                employee_id=employee.id,
-                metric_date=today,
-                leads_assigned=leads_assigned,
-                tasks_completed=tasks_completed
-            )
-            db.session.add(monthly_metrics)
-            db.session.commit()
-
+    computed = False
+    for employee, metrics in performance_rows(month):
+        computed = computed or metrics is not None
+        if metrics is None:
+            # Not computed yet: show zeros without storing anything
+            metrics = PerformanceMetric(employee_id=employee.id, metric_date=month, revenue_generated=0,
+                                        **{name: 0 for name in COMPUTED_COLUMNS
+                                           if name not in ('revenue_generated', 'attendance_percentage')})
         performance_data.append({
             'employee': employee,
-            'metrics': monthly_metrics
+            'metrics': metrics
         })
 
     return render_template('employees/performance.html', title='Performance Monitoring',
-                         performance_data=performance_data)
+                         performance_data=performance_data, month=month, computed=computed,
+                         prev_month=shift_month(month, -1), next_month=shift_month(month, 1))
+
+
+@bp.route('/performance/refresh', methods=['POST'])
+@login_required
+@require_module_access('employees')
+def refresh_performance():
+    """Recompute a month's performance metrics now instead of waiting for the nightly job."""
+    month = parse_month(request.form.get('month'))
+    try:
+        count = save_performance_metrics(month)
+        db.session.commit()
+        flash(f'Performance metrics recomputed for {count} employees.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error computing performance metrics: {str(e)}')
+        flash('Error computing performance metrics.', 'error')
+    return redirect(url_for('employees.performance', month=month.strftime('%Y-%m')))
@@ -4,4 +4,4 @@ from flask import Blueprint
 
 bp = Blueprint('expenses', __name__)
 
-from app.expenses import routes
\ No newline at end of file
+from app.expenses import routes, exports
\ No newline at end of file
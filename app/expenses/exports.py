@@ -0,0 +1,27 @@
+"""Expense exports."""
+
+from app.models import Expense, Booking, Employee
+from app.utils.exports import Export, register_export
+
+register_export(Export(
+    'expenses', 'expenses', Expense,
+    columns=[
+        ('Expense Code', Expense.expense_code),
+        ('Date', Expense.date),
+        ('Category', Expense.category),
+        ('Sub Category', Expense.sub_category),
+        ('Amount', Expense.expense_amount),
+        ('Booking', Booking.booking_code),
+        ('Employee', Employee.name),
+    ],
+    joins=[
+        (Booking, Expense.booking_id == Booking.id),
+        (Employee, Expense.employee_id == Employee.id),
+    ],
+    filters={
+        'date': ('range', Expense.date),
+        'category': ('choice', Expense.category),
+        'sub_category': ('choice', Expense.sub_category),
+    },
+    order_by=(Expense.date.desc(), Expense.id.desc()),
+))
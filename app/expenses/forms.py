@@ -29,20 +29,20 @@ class ExpenseForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Populate category choices from settings
-        from app.models import Setting
-        main_categories = Setting.get_options('ExpenseMainCategory')
-        self.category.choices = [('', 'Select Category')] + [(setting.key, setting.value) for setting in main_categories]
+        from app.utils.choices import setting_options, booking_options, employee_options
+        self.category.choices = [('', 'Select Category')] + list(setting_options('ExpenseMainCategory'))
 
         # Load all sub-category choices for validation
-        sub_categories = Setting.get_options('ExpenseSubCategory')
-        self.sub_category.choices = [('', 'Select Sub Category')] + [(setting.key, setting.value) for setting in sub_categories]
+        self.sub_category.choices = [('', 'Select Sub Category')] + list(setting_options('ExpenseSubCategory'))
 
         # Populate booking choices
-        from app.models import Booking
-        bookings = Booking.query.all()
-        self.booking_id.choices = [('', 'Select Booking')] + [(str(b.id), f"{b.booking_code} - {b.customer_name}") for b in bookings]
+        self.booking_id.choices = [('', 'Select Booking')] + [
+            (str(booking_id), f"{booking_code} - {customer_name}")
+            for booking_id, booking_code, customer_name in booking_options()
+        ]
 
         # Populate employee choices
-        from app.models import Employee
-        employees = Employee.query.all()
-        self.employee_id.choices = [('', 'Select Employee')] + [(str(e.id), f"{e.employee_code} - {e.name}") for e in employees]
\ No newline at end of file
+        self.employee_id.choices = [('', 'Select Employee')] + [
+            (str(emp_id), f"{employee_code} - {name}")
+            for emp_id, name, employee_code in employee_options()
+        ]
\ No newline at end of file
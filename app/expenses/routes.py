@@ -7,6 +7,7 @@ from app import db, require_module_access
 from app.expenses import bp
 from app.expenses.forms import ExpenseForm
 from app.models import Expense
+from app.utils.pagination import keyset_paginate
 
 
 @bp.route('/')
@@ -14,8 +15,8 @@ from app.models import Expense
 @require_module_access('expenses')
 def index():
     """Display all expenses."""
-    expenses = Expense.query.order_by(Expense.created_at.desc()).all()
-    return render_template('expenses/index.html', title='Expenses', expenses=expenses)
+    page = keyset_paginate(Expense.query, (Expense.created_at.desc(), Expense.id.desc()), tables=('expense',))
+    return render_template('expenses/index.html', title='Expenses', expenses=page.items, page=page)
 
 
 @bp.route('/add', methods=['GET', 'POST'])
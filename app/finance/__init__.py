@@ -4,4 +4,4 @@ from flask import Blueprint
 
 bp = Blueprint('finance', __name__)
 
-from app.finance import routes
+from app.finance import routes, exports
@@ -0,0 +1,101 @@
+"""Finance ledger exports."""
+
+from app.models import Sale, Purchase, PaymentReceived, PaymentMade
+from app.utils.exports import Export, register_export
+
+register_export(Export(
+    'sales', 'finance', Sale,
+    columns=[
+        ('Invoice Number', Sale.invoice_number),
+        ('Date', Sale.date),
+        ('Customer Name', Sale.customer_name),
+        ('Product/Service', Sale.product_service),
+        ('Base Amount', Sale.base_amount),
+        ('GST Type', Sale.gst_type),
+        ('GST %', Sale.gst_percentage),
+        ('GST Amount', Sale.gst_amount),
+        ('Amount', Sale.amount),
+        ('Payment Status', Sale.payment_status),
+        ('Notes', Sale.notes),
+    ],
+    filters={
+        'date': ('range', Sale.date),
+        'payment_status': ('choice', Sale.payment_status),
+        'customer_name': ('text', Sale.customer_name),
+    },
+    order_by=(Sale.date.desc(), Sale.id.desc()),
+))
+
+register_export(Export(
+    'purchases', 'finance', Purchase,
+    columns=[
+        ('Bill Number', Purchase.bill_number),
+        ('Date', Purchase.date),
+        ('Vendor Name', Purchase.vendor_name),
+        ('Item Description', Purchase.item_description),
+        ('Base Amount', Purchase.base_amount),
+        ('GST Type', Purchase.gst_type),
+        ('GST %', Purchase.gst_percentage),
+        ('GST Amount', Purchase.gst_amount),
+        ('Amount', Purchase.amount),
+        ('Payment Status', Purchase.payment_status),
+        ('Notes', Purchase.notes),
+    ],
+    filters={
+        'date': ('range', Purchase.date),
+        'payment_status': ('choice', Purchase.payment_status),
+        'vendor_name': ('text', Purchase.vendor_name),
+    },
+    order_by=(Purchase.date.desc(), Purchase.id.desc()),
+))
+
+register_export(Export(
+    'payments_received', 'finance', PaymentReceived,
+    columns=[
+        ('Reference Number', PaymentReceived.reference_number),
+        ('Date', PaymentReceived.date),
+        ('Customer Name', PaymentReceived.customer_name),
+        ('Invoice Number', PaymentReceived.invoice_number),
+        ('Payment Method', PaymentReceived.payment_method),
+        ('Amount', PaymentReceived.amount),
+        ('TDS Applicable', PaymentReceived.tds_applicable, lambda applicable: 'Yes' if applicable else 'No'),
+        ('TDS %', PaymentReceived.tds_percentage),
+        ('TDS Amount', PaymentReceived.tds_amount),
+        ('TDS Section', PaymentReceived.tds_section),
+        ('Net Amount', PaymentReceived.net_amount),
+        ('Remarks', PaymentReceived.remarks),
+    ],
+    filters={
+        'date': ('range', PaymentReceived.date),
+        'payment_method': ('choice', PaymentReceived.payment_method),
+        'customer_name': ('text', PaymentReceived.customer_name),
+    },
+    order_by=(PaymentReceived.date.desc(), PaymentReceived.id.desc()),
+    title='Payments Received',
+))
+
+register_export(Export(
+    'payments_made', 'finance', PaymentMade,
+    columns=[
+        ('Reference Number', PaymentMade.reference_number),
+        ('Date', PaymentMade.date),
+        ('Payee Name', PaymentMade.payee_name),
+        ('Bill Number', PaymentMade.bill_number),
+        ('Category', PaymentMade.category),
+        ('Payment Method', PaymentMade.payment_method),
+        ('Amount', PaymentMade.amount),
+        ('TDS Applicable', PaymentMade.tds_applicable, lambda applicable: 'Yes' if applicable else 'No'),
+        ('TDS %', PaymentMade.tds_percentage),
+        ('TDS Amount', PaymentMade.tds_amount),
+        ('TDS Section', PaymentMade.tds_section),
+        ('Net Amount', PaymentMade.net_amount),
+        ('Remarks', PaymentMade.remarks),
+    ],
+    filters={
+        'date': ('range', PaymentMade.date),
+        'payment_method': ('choice', PaymentMade.payment_method),
+        'category': ('choice', PaymentMade.category),
+    },
+    order_by=(PaymentMade.date.desc(), PaymentMade.id.desc()),
+    title='Payments Made',
+))
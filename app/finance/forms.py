@@ -9,7 +9,7 @@ class SaleForm(FlaskForm):
     """Form for adding/editing sales."""
 
     invoice_number = StringField('Invoice Number', validators=[DataRequired()],
-                                render_kw={'class': 'form-control', 'autocomplete': 'off', 'placeholder': 'Enter invoice number after T4H/24-25/'})
+                                render_kw={'class': 'form-control', 'autocomplete': 'off', 'placeholder': 'Enter invoice number after the prefix'})
     date = DateField('Date', validators=[DataRequired()],
                     render_kw={'class': 'form-control', 'type': 'date', 'autocomplete': 'off'})
     customer_name = SelectField('Customer Name', choices=[('', 'Select Customer or Enter New')], validators=[DataRequired()],
@@ -59,27 +59,8 @@ class SaleForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Populate customer choices from both Customer table and converted B2C leads
-        from app.models import Customer, B2CLead
-        from sqlalchemy import func
-        
-        # Get actual customers
-        customers = Customer.query.order_by(Customer.customer_name).all()
-        
-        # Get converted B2C leads that are not yet customers (case-insensitive)
-        converted_leads = B2CLead.query.filter(func.lower(B2CLead.status) == 'converted').order_by(B2CLead.customer_name).all()
-        
-        # Build choices list
-        choices = [('', 'Select Customer or Enter New')]
-        
-        # Add actual customers
-        for c in customers:
-            choices.append((c.customer_name, f"{c.customer_name} ({c.customer_code})"))
-        
-        # Add converted leads
-        for l in converted_leads:
-            choices.append((l.customer_name, f"{l.customer_name} ({l.enquiry_id} - Converted Lead)"))
-        
-        self.customer_name.choices = choices
+        from app.utils.choices import customer_name_choices
+        self.customer_name.choices = [('', 'Select Customer or Enter New')] + list(customer_name_choices())
 
 
 class PurchaseForm(FlaskForm):
@@ -177,32 +158,11 @@ class PaymentReceivedForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Populate customer choices from both Customer table and converted B2C leads
-        from app.models import Customer, Sale, B2CLead
-        from sqlalchemy import func
-        
-        # Get actual customers
-        customers = Customer.query.order_by(Customer.customer_name).all()
-        
-        # Get converted B2C leads that are not yet customers (case-insensitive)
-        converted_leads = B2CLead.query.filter(func.lower(B2CLead.status) == 'converted').order_by(B2CLead.customer_name).all()
-        
-        # Build choices list
-        choices = [('', 'Select Customer or Enter New')]
-        
-        # Add actual customers
-        for c in customers:
-            choices.append((c.customer_name, f"{c.customer_name} ({c.customer_code})"))
-        
-        # Add converted leads
-        for l in converted_leads:
-            choices.append((l.customer_name, f"{l.customer_name} ({l.enquiry_id} - Converted Lead)"))
-        
-        self.customer_name.choices = choices
+        from app.utils.choices import customer_name_choices, sale_invoice_choices
+        self.customer_name.choices = [('', 'Select Customer or Enter New')] + list(customer_name_choices())
         
         # Populate invoice choices
-        sales = Sale.query.order_by(Sale.date.desc()).all()
-        self.invoice_number.choices = [('', 'Select Invoice (Optional)')] + \
-                                     [(s.invoice_number, f"{s.invoice_number} - {s.customer_name}") for s in sales]
+        self.invoice_number.choices = [('', 'Select Invoice (Optional)')] + list(sale_invoice_choices())
 
 
 class PaymentMadeForm(FlaskForm):
@@ -254,10 +214,8 @@ class PaymentMadeForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Populate bill choices
-        from app.models import Purchase
-        purchases = Purchase.query.order_by(Purchase.date.desc()).all()
-        self.bill_number.choices = [('', 'Select Bill (Optional)')] + \
-                                   [(p.bill_number, f"{p.bill_number} - {p.vendor_name}") for p in purchases]
+        from app.utils.choices import purchase_bill_choices
+        self.bill_number.choices = [('', 'Select Bill (Optional)')] + list(purchase_bill_choices())
 
 
 class ChartOfAccountForm(FlaskForm):
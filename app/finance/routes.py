@@ -2,14 +2,16 @@
 
 from flask import render_template, flash, redirect, url_for, request
 from flask_login import login_required, current_user
-from sqlalchemy import func, extract
 from datetime import datetime, date
 
 from app import db, require_module_access
 from app.finance import bp
+from app.finance.stats import parse_period, period_summary
 from app.finance.forms import (SaleForm, PurchaseForm, PaymentReceivedForm, 
                                PaymentMadeForm, ChartOfAccountForm)
 from app.models import Sale, Purchase, PaymentReceived, PaymentMade, ChartOfAccount, Customer
+from app.utils.fiscal import fiscal_year_label, fiscal_year_of
+from app.utils.pagination import keyset_paginate
 
 
 # ==================== DASHBOARD ====================
@@ -17,60 +19,20 @@ from app.models import Sale, Purchase, PaymentReceived, PaymentMade, ChartOfAcco
 @login_required
 @require_module_access('finance')
 def dashboard():
-    """Display financial dashboard with summary."""
-    # Get current year and month
-    current_year = datetime.now().year
-    current_month = datetime.now().month
-    
-    # Calculate totals for current year
-    # Total Revenue = Sales invoices + Standalone payments received (not linked to sales)
-    total_sales = db.session.query(func.sum(Sale.amount)).filter(
-        extract('year', Sale.date) == current_year
-    ).scalar() or 0
-    
-    # Add standalone payments (payments not linked to any sale invoice)
-    standalone_payments = db.session.query(func.sum(PaymentReceived.amount)).filter(
-        extract('year', PaymentReceived.date) == current_year,
-        PaymentReceived.sale_id.is_(None)
-    ).scalar() or 0
-    
-    total_revenue = total_sales + standalone_payments
-    
-    total_purchases = db.session.query(func.sum(Purchase.amount)).filter(
-        extract('year', Purchase.date) == current_year
-    ).scalar() or 0
-    
-    from app.models import Expense
-    total_expenses = db.session.query(func.sum(Expense.expense_amount)).filter(
-        extract('year', Expense.date) == current_year
-    ).scalar() or 0
-    
-    total_payments_received = db.session.query(func.sum(PaymentReceived.amount)).filter(
-        extract('year', PaymentReceived.date) == current_year
-    ).scalar() or 0
-    
-    total_payments_made = db.session.query(func.sum(PaymentMade.amount)).filter(
-        extract('year', PaymentMade.date) == current_year
-    ).scalar() or 0
-    
-    # Calculate derived metrics
-    gross_profit = total_revenue - total_purchases
-    net_profit = gross_profit - total_expenses
-    cash_position = total_payments_received - total_payments_made
-    
-    # Transaction counts
-    # For revenue count: sales invoices + standalone payments
-    sales_count = Sale.query.filter(extract('year', Sale.date) == current_year).count()
-    standalone_payments_count = PaymentReceived.query.filter(
-        extract('year', PaymentReceived.date) == current_year,
-        PaymentReceived.sale_id.is_(None)
-    ).count()
-    revenue_count = sales_count + standalone_payments_count
+    """Display financial dashboard with summary.
+
+    ``?period=`` selects a calendar year (2025) or fiscal year (FY2025-26);
+    the current calendar year is shown by default.
+    """
+    period = request.args.get('period', '').strip()
+    first, last, period_label = parse_period(period)
+    summary = period_summary(first, last)
     
-    purchases_count = Purchase.query.filter(extract('year', Purchase.date) == current_year).count()
-    expenses_count = Expense.query.filter(extract('year', Expense.date) == current_year).count()
-    payments_received_count = PaymentReceived.query.filter(extract('year', PaymentReceived.date) == current_year).count()
-    payments_made_count = PaymentMade.query.filter(extract('year', PaymentMade.date) == current_year).count()
+    # Calendar and fiscal years offered in the period selector
+    this_year = datetime.now().year
+    period_options = [(str(year), str(year)) for year in range(this_year, this_year - 5, -1)] + \
+                     [(f'FY{fiscal_year_label(year)}', f'FY {fiscal_year_label(year)}')
+                      for year in range(fiscal_year_of(), fiscal_year_of() - 5, -1)]
     
     # Recent transactions
     recent_sales = Sale.query.order_by(Sale.date.desc()).limit(5).all()
@@ -78,77 +40,16 @@ def dashboard():
     recent_payments_received = PaymentReceived.query.order_by(PaymentReceived.date.desc()).limit(5).all()
     recent_payments_made = PaymentMade.query.order_by(PaymentMade.date.desc()).limit(5).all()
     
-    # Monthly summary for current year
-    monthly_data = []
-    for month in range(1, 13):
-        month_sales = db.session.query(func.sum(Sale.amount)).filter(
-            extract('year', Sale.date) == current_year,
-            extract('month', Sale.date) == month
-        ).scalar() or 0
-        
-        # Add standalone payments for the month
-        month_standalone_payments = db.session.query(func.sum(PaymentReceived.amount)).filter(
-            extract('year', PaymentReceived.date) == current_year,
-            extract('month', PaymentReceived.date) == month,
-            PaymentReceived.sale_id.is_(None)
-        ).scalar() or 0
-        
-        month_revenue = month_sales + month_standalone_payments
-        
-        month_purchases = db.session.query(func.sum(Purchase.amount)).filter(
-            extract('year', Purchase.date) == current_year,
-            extract('month', Purchase.date) == month
-        ).scalar() or 0
-        
-        month_expenses = db.session.query(func.sum(Expense.expense_amount)).filter(
-            extract('year', Expense.date) == current_year,
-            extract('month', Expense.date) == month
-        ).scalar() or 0
-        
-        month_payments_received = db.session.query(func.sum(PaymentReceived.amount)).filter(
-            extract('year', PaymentReceived.date) == current_year,
-            extract('month', PaymentReceived.date) == month
-        ).scalar() or 0
-        
-        month_payments_made = db.session.query(func.sum(PaymentMade.amount)).filter(
-            extract('year', PaymentMade.date) == current_year,
-            extract('month', PaymentMade.date) == month
-        ).scalar() or 0
-        
-        month_net_profit = month_revenue - month_purchases - month_expenses
-        
-        monthly_data.append({
-            'month': month,
-            'month_name': date(current_year, month, 1).strftime('%B'),
-            'sales': float(month_revenue),  # Changed to show total revenue in chart
-            'purchases': float(month_purchases),
-            'expenses': float(month_expenses),
-            'payments_received': float(month_payments_received),
-            'payments_made': float(month_payments_made),
-            'net_profit': float(month_net_profit)
-        })
-    
     return render_template('finance/dashboard.html',
                          title='Financial Dashboard',
-                         total_revenue=total_revenue,
-                         total_purchases=total_purchases,
-                         total_expenses=total_expenses,
-                         total_payments_received=total_payments_received,
-                         total_payments_made=total_payments_made,
-                         gross_profit=gross_profit,
-                         net_profit=net_profit,
-                         cash_position=cash_position,
-                         revenue_count=revenue_count,
-                         purchases_count=purchases_count,
-                         expenses_count=expenses_count,
-                         payments_received_count=payments_received_count,
-                         payments_made_count=payments_made_count,
                          recent_sales=recent_sales,
                          recent_purchases=recent_purchases,
                          recent_payments_received=recent_payments_received,
                          recent_payments_made=recent_payments_made,
-                         monthly_data=monthly_data,
-                         current_year=current_year)
+                         period=period,
+                         period_label=period_label,
+                         period_options=period_options,
+                         **summary)
 
 
 # ==================== SALES ====================
@@ -157,8 +58,8 @@ def dashboard():
 @require_module_access('finance')
 def sales():
     """Display all sales."""
-    sales = Sale.query.order_by(Sale.date.desc()).all()
-    return render_template('finance/sales/index.html', title='Sales', sales=sales)
+    page = keyset_paginate(Sale.query, (Sale.date.desc(), Sale.id.desc()), tables=('sale',))
+    return render_template('finance/sales/index.html', title='Sales', sales=page.items, page=page)
 
 
 @bp.route('/sales/add', methods=['GET', 'POST'])
@@ -175,10 +76,10 @@ def sales_add():
         customer = Customer.query.filter_by(customer_name=customer_name).first()
         customer_id = customer.id if customer else None
         
-        # Ensure invoice number has the prefix
-        invoice_num = form.invoice_number.data
-        if not invoice_num.startswith('T4H/24-25/'):
-            invoice_num = 'T4H/24-25/' + invoice_num
+        # Ensure invoice number has the fiscal-year prefix of the sale date
+        invoice_num = form.invoice_number.data.strip()
+        if not invoice_num.startswith('T4H/'):
+            invoice_num = Sale.invoice_prefix(form.date.data) + invoice_num
         
         sale = Sale(
             invoice_number=invoice_num,
@@ -206,20 +107,23 @@ def sales_add():
             if not form.payment_amount.data or form.payment_amount.data <= 0:
                 flash('Payment amount is required when payment status is Received or Partial!', 'danger')
                 db.session.rollback()
-                return render_template('finance/sales/add.html', title='Add Sale', form=form)
+                return render_template('finance/sales/add.html', title='Add Sale', form=form,
+                                       invoice_prefix=Sale.invoice_prefix(form.date.data))
             
             if not form.payment_date.data:
                 flash('Payment date is required when payment status is Received or Partial!', 'danger')
                 db.session.rollback()
-                return render_template('finance/sales/add.html', title='Add Sale', form=form)
+                return render_template('finance/sales/add.html', title='Add Sale', form=form,
+                                       invoice_prefix=Sale.invoice_prefix(form.date.data))
             
             if not form.payment_method.data:
                 flash('Payment method is required when payment status is Received or Partial!', 'danger')
                 db.session.rollback()
-                return render_template('finance/sales/add.html', title='Add Sale', form=form)
+                return render_template('finance/sales/add.html', title='Add Sale', form=form,
+                                       invoice_prefix=Sale.invoice_prefix(form.date.data))
             
             payment = PaymentReceived(
-                reference_number=PaymentReceived.generate_reference_number(),
+                reference_number=PaymentReceived.generate_reference_number(form.payment_date.data),
                 date=form.payment_date.data,
                 customer_name=customer_name,
                 customer_id=customer_id,
@@ -239,10 +143,13 @@ def sales_add():
             flash('Payment received entry created automatically!', 'info')
         return redirect(url_for('finance.sales'))
     
-    # Don't pre-populate invoice number - user will enter after prefix
+    # Pre-populate the running number; the fiscal-year prefix is shown separately
     form.date.data = date.today()
     form.payment_date.data = date.today()
-    return render_template('finance/sales/add.html', title='Add Sale', form=form)
+    invoice_prefix = Sale.invoice_prefix(form.date.data)
+    if not form.invoice_number.data:
+        form.invoice_number.data = Sale.generate_invoice_number(form.date.data)[len(invoice_prefix):]
+    return render_template('finance/sales/add.html', title='Add Sale', form=form, invoice_prefix=invoice_prefix)
 
 
 @bp.route('/sales/view/<int:id>')
@@ -320,7 +227,7 @@ def sales_edit(id):
             else:
                 # Create new payment entry
                 payment = PaymentReceived(
-                    reference_number=PaymentReceived.generate_reference_number(),
+                    reference_number=PaymentReceived.generate_reference_number(form.payment_date.data),
                     date=form.payment_date.data,
                     customer_name=customer_name,
                     customer_id=customer.id if customer else None,
@@ -377,8 +284,8 @@ def sales_delete(id):
 @require_module_access('finance')
 def purchases():
     """Display all purchases."""
-    purchases = Purchase.query.order_by(Purchase.date.desc()).all()
-    return render_template('finance/purchases/index.html', title='Purchases', purchases=purchases)
+    page = keyset_paginate(Purchase.query, (Purchase.date.desc(), Purchase.id.desc()), tables=('purchase',))
+    return render_template('finance/purchases/index.html', title='Purchases', purchases=page.items, page=page)
 
 
 @bp.route('/purchases/add', methods=['GET', 'POST'])
@@ -389,7 +296,7 @@ def purchases_add():
     form = PurchaseForm()
     if form.validate_on_submit():
         purchase = Purchase(
-            bill_number=Purchase.generate_bill_number(),
+            bill_number=Purchase.generate_bill_number(form.date.data),
             date=form.date.data,
             vendor_name=form.vendor_name.data,
             item_description=form.item_description.data,
@@ -426,7 +333,7 @@ def purchases_add():
                 return render_template('finance/purchases/add.html', title='Add Purchase', form=form)
             
             payment = PaymentMade(
-                reference_number=PaymentMade.generate_reference_number(),
+                reference_number=PaymentMade.generate_reference_number(form.payment_date.data),
                 date=form.payment_date.data,
                 payee_name=form.vendor_name.data,
                 amount=form.payment_amount.data,
@@ -520,7 +427,7 @@ def purchases_edit(id):
             else:
                 # Create new payment entry
                 payment = PaymentMade(
-                    reference_number=PaymentMade.generate_reference_number(),
+                    reference_number=PaymentMade.generate_reference_number(form.payment_date.data),
                     date=form.payment_date.data,
                     payee_name=form.vendor_name.data,
                     amount=form.payment_amount.data,
@@ -577,8 +484,10 @@ def purchases_delete(id):
 @require_module_access('finance')
 def payments_received():
     """Display all payments received."""
-    payments = PaymentReceived.query.order_by(PaymentReceived.date.desc()).all()
-    return render_template('finance/payments_received/index.html', title='Payments Received', payments=payments)
+    page = keyset_paginate(PaymentReceived.query, (PaymentReceived.date.desc(), PaymentReceived.id.desc()),
+                           tables=('payment_received',))
+    return render_template('finance/payments_received/index.html', title='Payments Received',
+                           payments=page.items, page=page)
 
 
 @bp.route('/payments-received/add', methods=['GET', 'POST'])
@@ -602,7 +511,7 @@ def payments_received_add():
             sale_id = sale.id if sale else None
         
         payment = PaymentReceived(
-            reference_number=PaymentReceived.generate_reference_number(),
+            reference_number=PaymentReceived.generate_reference_number(form.date.data),
             date=form.date.data,
             customer_name=customer_name,
             customer_id=customer_id,
@@ -712,8 +621,10 @@ def payments_received_delete(id):
 @require_module_access('finance')
 def payments_made():
     """Display all payments made."""
-    payments = PaymentMade.query.order_by(PaymentMade.date.desc()).all()
-    return render_template('finance/payments_made/index.html', title='Payments Made', payments=payments)
+    page = keyset_paginate(PaymentMade.query, (PaymentMade.date.desc(), PaymentMade.id.desc()),
+                           tables=('payment_made',))
+    return render_template('finance/payments_made/index.html', title='Payments Made',
+                           payments=page.items, page=page)
 
 
 @bp.route('/payments-made/add', methods=['GET', 'POST'])
@@ -730,7 +641,7 @@ def payments_made_add():
             purchase_id = purchase.id if purchase else None
         
         payment = PaymentMade(
-            reference_number=PaymentMade.generate_reference_number(),
+            reference_number=PaymentMade.generate_reference_number(form.date.data),
             date=form.date.data,
             payee_name=form.payee_name.data,
             amount=form.amount.data,
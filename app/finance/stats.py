@@ -0,0 +1,101 @@
+"""Aggregate figures for the finance dashboard.
+
+Figures come from the finance_monthly_rollup table, which the ledger models
+keep up to date on every write, so a dashboard for any period reads a few
+rows per month instead of scanning the ledgers. Totals are also cached until
+one of the finance tables changes (see app.utils.cache).
+"""
+
+from datetime import date
+from typing import Optional, Tuple
+
+from app.models import FinanceMonthlyRollup
+from app.utils.cache import cached
+from app.utils.fiscal import fiscal_year_bounds, fiscal_year_label, parse_fiscal_year
+
+FINANCE_TABLES = ('sale', 'purchase', 'expense', 'payment_received', 'payment_made', 'finance_monthly_rollup')
+
+
+def parse_period(value: Optional[str], today: Optional[date] = None) -> Tuple[date, date, str]:
+    """Resolve a dashboard period into (first day, last day, label).
+
+    Accepts a calendar year ('2025') or a fiscal year ('FY2025-26', '2025-26',
+    '25-26'); anything else falls back to the current calendar year.
+    """
+    value = (value or '').strip()
+    try:
+        start_year = parse_fiscal_year(value)
+        if start_year is not None:
+            first, last = fiscal_year_bounds(start_year)
+            return first, last, f'FY {fiscal_year_label(start_year)}'
+        if value.isdigit() and len(value) == 4:
+            year = int(value)
+            return date(year, 1, 1), date(year, 12, 31), str(year)
+    except ValueError:
+        # Years outside what date supports ('0000', 'FY9999-00')
+        pass
+    year = (today or date.today()).year
+    return date(year, 1, 1), date(year, 12, 31), str(year)
+
+
+def period_months(first: date, last: date) -> list:
+    """(year, month) for every month from ``first`` to ``last`` inclusive."""
+    months = []
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+@cached('finance.period_summary', FINANCE_TABLES)
+def period_summary(first: date, last: date) -> dict:
+    """Totals, counts and month-by-month figures for a date range."""
+    totals = FinanceMonthlyRollup.totals(first, last)
+
+    no_rows = (0, 0)
+    summary = {
+        'total_revenue': 0, 'total_purchases': 0, 'total_expenses': 0,
+        'total_payments_received': 0, 'total_payments_made': 0,
+        'revenue_count': 0, 'purchases_count': 0, 'expenses_count': 0,
+        'payments_received_count': 0, 'payments_made_count': 0,
+    }
+    monthly_data = []
+    for key in period_months(first, last):
+        sale_amount, sale_count = totals.get(key + ('sales',), no_rows)
+        purchase_amount, purchase_count = totals.get(key + ('purchases',), no_rows)
+        expense_amount, expense_count = totals.get(key + ('expenses',), no_rows)
+        received_amount, received_count = totals.get(key + ('payments_received',), no_rows)
+        standalone_amount, standalone_count = totals.get(key + ('standalone_payments',), no_rows)
+        made_amount, made_count = totals.get(key + ('payments_made',), no_rows)
+
+        month_revenue = sale_amount + standalone_amount
+        summary['total_revenue'] += month_revenue
+        summary['total_purchases'] += purchase_amount
+        summary['total_expenses'] += expense_amount
+        summary['total_payments_received'] += received_amount
+        summary['total_payments_made'] += made_amount
+        summary['revenue_count'] += sale_count + standalone_count
+        summary['purchases_count'] += purchase_count
+        summary['expenses_count'] += expense_count
+        summary['payments_received_count'] += received_count
+        summary['payments_made_count'] += made_count
+
+        monthly_data.append({
+            'year': key[0],
+            'month': key[1],
+            'month_name': date(key[0], key[1], 1).strftime('%B'),
+            'sales': float(month_revenue),  # Total revenue, including standalone payments
+            'purchases': float(purchase_amount),
+            'expenses': float(expense_amount),
+            'payments_received': float(received_amount),
+            'payments_made': float(made_amount),
+            'net_profit': float(month_revenue - purchase_amount - expense_amount)
+        })
+
+    # Derived metrics
+    summary['gross_profit'] = summary['total_revenue'] - summary['total_purchases']
+    summary['net_profit'] = summary['gross_profit'] - summary['total_expenses']
+    summary['cash_position'] = summary['total_payments_received'] - summary['total_payments_made']
+    summary['monthly_data'] = monthly_data
+    return summary
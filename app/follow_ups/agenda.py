@@ -0,0 +1,189 @@
+"""Per-owner follow-up agenda.
+
+A salesperson's queue is read with range scans on the owner's composite
+indexes: ``(owner_id, follow_up_on)`` for follow-ups due in the window and
+``(owner_id, next_follow_up_on)`` for the next steps of their lead chains.
+A next step is only open while its follow-up is the latest one recorded for
+the lead (checked against the ``(lead, follow_up_on)`` indexes); once a newer
+follow-up exists, that one carries the chain.
+
+The window runs from ``AGENDA_OVERDUE_DAYS`` before today to the end of the
+current week (Sunday), and items are split into overdue, today and this week.
+"""
+
+from datetime import date, timedelta
+
+from flask import abort, url_for
+from flask_login import current_user
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.orm import aliased, joinedload
+
+from app import db
+from app.models import FollowUp, User, UserRole
+
+AGENDA_OVERDUE_DAYS = 30
+AGENDA_SECTIONS = ('overdue', 'today', 'this_week')
+
+
+def week_end(today: date) -> date:
+    """The Sunday ending the week of ``today``."""
+    return today + timedelta(days=6 - today.weekday())
+
+
+def agenda_window(today: date) -> tuple:
+    """First and last due dates an agenda for ``today`` covers."""
+    return today - timedelta(days=AGENDA_OVERDUE_DAYS), week_end(today)
+
+
+def is_chain_head():
+    """Condition: no later follow-up has been recorded for the same lead."""
+    later = aliased(FollowUp)
+    newer = or_(later.follow_up_on > FollowUp.follow_up_on,
+                and_(later.follow_up_on == FollowUp.follow_up_on, later.id > FollowUp.id))
+    return or_(
+        and_(FollowUp.b2c_lead_id.isnot(None),
+             ~exists().where(later.b2c_lead_id == FollowUp.b2c_lead_id, newer)),
+        and_(FollowUp.b2b_lead_id.isnot(None),
+             ~exists().where(later.b2b_lead_id == FollowUp.b2b_lead_id, newer)),
+    )
+
+
+def agenda_owner(owner_id=None):
+    """The user whose agenda to show: the current user, or (admins only) ``owner_id``."""
+    if owner_id is None or owner_id == current_user.id:
+        return current_user
+    if current_user.role != UserRole.ADMIN:
+        abort(403)
+    return db.session.get(User, owner_id) or abort(404)
+
+
+def lead_url(lead_type: str, lead_ref):
+    """URL of a lead's page from its type ('B2C'/'B2B') and reference."""
+    if lead_ref is None:
+        return None
+    if lead_type == 'B2C':
+        return url_for('leads_b2c.view', enquiry_id=lead_ref)
+    return url_for('leads_b2b.view', sr_no=lead_ref)
+
+
+def section(due_on: date, today: date) -> str:
+    """Agenda section of an item due on ``due_on``."""
+    if due_on < today:
+        return 'overdue'
+    return 'today' if due_on == today else 'this_week'
+
+
+class AgendaItem:
+    """A follow-up due on ``due_on``: the follow-up itself or (``next_step``) its next step."""
+
+    def __init__(self, follow_up, due_on, next_step=False):
+        self.follow_up = follow_up
+        self.due_on = due_on
+        self.next_step = next_step
+
+    @property
+    def lead(self):
+        return self.follow_up.b2c_lead_ref or self.follow_up.b2b_lead_ref
+
+    @property
+    def lead_id(self):
+        return self.follow_up.b2c_lead_id or self.follow_up.b2b_lead_id
+
+    @property
+    def lead_ref(self):
+        """The lead's reference in URLs: enquiry ID for B2C, serial number for B2B."""
+        lead = self.lead
+        if lead is None:
+            return None
+        return lead.enquiry_id if self.follow_up.b2c_lead_id else lead.sr_no
+
+    @property
+    def lead_name(self):
+        lead = self.lead
+        if lead is None:
+            return None
+        return lead.customer_name if self.follow_up.b2c_lead_id else lead.organization_name
+
+    @property
+    def contact(self):
+        lead = self.lead
+        if lead is None:
+            return None
+        return lead.contact_no if self.follow_up.b2c_lead_id else lead.org_poc_name_and_role
+
+    @property
+    def lead_url(self):
+        return lead_url(self.follow_up.lead_type.value, self.lead_ref)
+
+    def to_dict(self) -> dict:
+        follow_up = self.follow_up
+        return {
+            'id': follow_up.id,
+            'kind': 'next_step' if self.next_step else 'follow_up',
+            'due_on': self.due_on.isoformat(),
+            'lead_type': follow_up.lead_type.value,
+            'lead_id': self.lead_id,
+            'lead_ref': self.lead_ref,
+            'lead_name': self.lead_name,
+            'contact': self.contact,
+            'follow_up_on': follow_up.follow_up_on.isoformat(),
+            'next_follow_up_on': follow_up.next_follow_up_on.isoformat() if follow_up.next_follow_up_on else None,
+            'outcome': follow_up.outcome.value,
+            'notes': follow_up.notes,
+        }
+
+
+def _with_leads(query):
+    return query.options(joinedload(FollowUp.b2c_lead_ref), joinedload(FollowUp.b2b_lead_ref))
+
+
+def empty_agenda() -> dict:
+    return {name: [] for name in AGENDA_SECTIONS}
+
+
+def owner_agendas(today: date = None, owner_id: int = None) -> dict:
+    """Agendas by owner id, for one owner or (without ``owner_id``) everyone.
+
+    Two queries: follow-ups due in the window, and open next steps due in it.
+    Each agenda maps section names to items sorted by due date.
+    """
+    today = today or date.today()
+    start, end = agenda_window(today)
+    owner_filter = [FollowUp.owner_id == owner_id] if owner_id is not None else []
+
+    due = _with_leads(FollowUp.query.filter(
+        *owner_filter,
+        FollowUp.follow_up_on.between(start, end),
+    )).order_by(FollowUp.follow_up_on, FollowUp.id).all()
+
+    next_steps = _with_leads(FollowUp.query.filter(
+        *owner_filter,
+        FollowUp.next_follow_up_on.between(start, end),
+        is_chain_head(),
+    )).order_by(FollowUp.next_follow_up_on, FollowUp.id).all()
+
+    items = [AgendaItem(follow_up, follow_up.follow_up_on) for follow_up in due]
+    items += [AgendaItem(follow_up, follow_up.next_follow_up_on, next_step=True) for follow_up in next_steps]
+    items.sort(key=lambda item: (item.due_on, item.follow_up.id, item.next_step))
+
+    agendas = {}
+    for item in items:
+        agenda = agendas.setdefault(item.follow_up.owner_id, empty_agenda())
+        agenda[section(item.due_on, today)].append(item)
+    return agendas
+
+
+def owner_agenda(owner_id: int, today: date = None) -> dict:
+    """Agenda items of one owner by section, each sorted by due date."""
+    return owner_agendas(today, owner_id).get(owner_id) or empty_agenda()
+
+
+def agenda_counts(agenda: dict, today: date) -> dict:
+    """Number of items overdue, due today, due tomorrow and due later this week."""
+    tomorrow = today + timedelta(days=1)
+    return {
+        'overdue': len(agenda['overdue']),
+        'due_today': len(agenda['today']),
+        'due_tomorrow': sum(1 for item in agenda['this_week'] if item.due_on == tomorrow),
+        'this_week': len(agenda['this_week']),
+    }
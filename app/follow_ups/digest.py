@@ -0,0 +1,88 @@
+"""Daily follow-up digests.
+
+``flask follow-up-digest`` (run from cron each morning, or left running with
+``--daily-at``) snapshots every follow-up user's agenda for the day into
+:class:`~app.models.FollowUpDigest` rows: the section counts and the items
+behind them, which users can download as CSV. All agendas are computed with
+the same two queries, whatever the number of users. The dashboard counts
+are computed live instead (cached until follow-ups change), as any follow-up
+logged later in the day, by the owner or by anyone on the same lead, would
+make them stale. Digests older than ``FOLLOW_UP_DIGEST_RETENTION_DAYS`` are deleted.
+"""
+
+import csv
+import json
+from datetime import date, datetime, timedelta
+from io import StringIO
+
+from flask import current_app
+from sqlalchemy import delete, insert
+
+from app import db
+from app.follow_ups.agenda import AGENDA_SECTIONS, agenda_counts, empty_agenda, owner_agendas
+from app.models import FollowUpDigest, User
+
+DIGEST_COLUMNS = (
+    ('Section', 'section'),
+    ('Due', 'due_on'),
+    ('Kind', 'kind'),
+    ('Type', 'lead_type'),
+    ('Lead', 'lead_ref'),
+    ('Name', 'lead_name'),
+    ('Contact', 'contact'),
+    ('Last Follow-up', 'follow_up_on'),
+    ('Outcome', 'outcome'),
+    ('Notes', 'notes'),
+)
+
+
+def digest_owners() -> list:
+    """Active users who can see follow-ups."""
+    return [user for user in User.query.filter_by(is_active=True).order_by(User.id)
+            if user.has_module_access('follow_ups')]
+
+
+def build_digests(today: date = None) -> int:
+    """Write (or rewrite) every follow-up user's digest for ``today``; returns how many."""
+    today = today or date.today()
+    agendas = owner_agendas(today)
+    generated_at = datetime.utcnow()
+
+    rows = []
+    for user in digest_owners():
+        agenda = agendas.get(user.id) or empty_agenda()
+        sections = {name: [item.to_dict() for item in agenda[name]] for name in AGENDA_SECTIONS}
+        rows.append(dict(agenda_counts(agenda, today), owner_id=user.id, digest_date=today,
+                         items=json.dumps(sections), generated_at=generated_at))
+
+    db.session.execute(delete(FollowUpDigest).where(FollowUpDigest.digest_date == today))
+    if rows:
+        db.session.execute(insert(FollowUpDigest), rows)
+    db.session.commit()
+    return len(rows)
+
+
+def purge_digests(days=None) -> int:
+    """Delete digests older than ``days`` (default FOLLOW_UP_DIGEST_RETENTION_DAYS)."""
+    days = current_app.config['FOLLOW_UP_DIGEST_RETENTION_DAYS'] if days is None else days
+    cutoff = date.today() - timedelta(days=days)
+    purged = db.session.execute(delete(FollowUpDigest).where(FollowUpDigest.digest_date < cutoff)).rowcount
+    db.session.commit()
+    return purged
+
+
+def owner_digest(owner_id: int, today: date = None):
+    """An owner's digest for ``today``, or None if the job has not run yet."""
+    return db.session.get(FollowUpDigest, (owner_id, today or date.today()))
+
+
+def digest_csv(digest: FollowUpDigest) -> str:
+    """A digest's items as CSV, one row per item, overdue first."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([label for label, _ in DIGEST_COLUMNS])
+    for name, items in digest.sections.items():
+        for item in items:
+            values = dict(item, section=name.replace('_', ' ').title())
+            writer.writerow(['' if values.get(key) is None else values[key] for _, key in DIGEST_COLUMNS])
+    return buffer.getvalue()
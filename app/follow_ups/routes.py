@@ -1,33 +1,77 @@
 """Follow-ups routes."""
 
-from flask import render_template
-from flask_login import login_required
+from datetime import date
+
+from flask import Response, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager, joinedload
 
 from app import require_module_access
 from app.follow_ups import bp
-from app.models import FollowUp
+from app.follow_ups.agenda import AGENDA_OVERDUE_DAYS, agenda_owner, owner_agenda, week_end
+from app.follow_ups.digest import digest_csv, owner_digest
+from app.models import B2BLead, B2CLead, FollowUp, LeadType, User, UserRole
+from app.utils.pagination import keyset_paginate
+
+FOLLOW_UP_ORDER = (FollowUp.follow_up_on.desc(), FollowUp.id.desc())
+
+
+def b2c_follow_ups_query():
+    """B2C follow-ups of leads not yet converted, with lead and owner loaded in the same query."""
+    return FollowUp.query\
+        .join(B2CLead, FollowUp.b2c_lead_id == B2CLead.enquiry_id)\
+        .filter(FollowUp.lead_type == LeadType.B2C, func.lower(B2CLead.status) != 'converted')\
+        .options(contains_eager(FollowUp.b2c_lead_ref), joinedload(FollowUp.owner))
+
+
+def b2b_follow_ups_query():
+    """B2B follow-ups, with lead and owner loaded in the same query."""
+    return FollowUp.query\
+        .join(B2BLead, FollowUp.b2b_lead_id == B2BLead.id)\
+        .filter(FollowUp.lead_type == LeadType.B2B)\
+        .options(contains_eager(FollowUp.b2b_lead_ref), joinedload(FollowUp.owner))
 
 
 @bp.route('/')
 @login_required
 @require_module_access('follow_ups')
 def index():
-    """Display all follow-ups categorized by B2C and B2B."""
-    from app.models import B2CLead
-
-    # Get all follow-ups ordered by date
-    all_follow_ups = FollowUp.query.order_by(FollowUp.follow_up_on.desc()).all()
-
-    # Separate into B2C and B2B, excluding converted leads from B2C follow-ups
-    b2c_follow_ups = []
-    for fu in all_follow_ups:
-        if fu.lead_type.value == 'B2C':
-            # Check if the lead is not converted (case-insensitive)
-            lead = B2CLead.query.filter_by(enquiry_id=fu.b2c_lead_id).first()
-            if lead and lead.status.lower() != 'converted':
-                b2c_follow_ups.append(fu)
-    
-    b2b_follow_ups = [fu for fu in all_follow_ups if fu.lead_type.value == 'B2B']
+    """Display follow-ups categorized by B2C and B2B, each list paged on its own."""
+    b2c_page = keyset_paginate(b2c_follow_ups_query(), FOLLOW_UP_ORDER,
+                               tables=('follow_up', 'b2c_lead'), arg_prefix='b2c_')
+    b2b_page = keyset_paginate(b2b_follow_ups_query(), FOLLOW_UP_ORDER,
+                               tables=('follow_up', 'b2b_lead'), arg_prefix='b2b_')
 
     return render_template('follow_ups/index.html', title='Follow-ups',
-                         b2c_follow_ups=b2c_follow_ups, b2b_follow_ups=b2b_follow_ups)
\ No newline at end of file
+                           b2c_page=b2c_page, b2b_page=b2b_page,
+                           b2c_follow_ups=b2c_page.items, b2b_follow_ups=b2b_page.items)
+
+
+@bp.route('/agenda')
+@login_required
+@require_module_access('follow_ups')
+def agenda():
+    """One owner's follow-up queue: overdue, today and the rest of this week."""
+    owner = agenda_owner(request.args.get('owner_id', type=int))
+    today = date.today()
+    owners = User.query.filter_by(is_active=True).order_by(User.full_name).all() \
+        if current_user.role == UserRole.ADMIN else []
+    return render_template('follow_ups/agenda.html', title='My Follow-ups', owner=owner, owners=owners,
+                           agenda=owner_agenda(owner.id, today), today=today, week_end=week_end(today),
+                           overdue_days=AGENDA_OVERDUE_DAYS, digest=owner_digest(owner.id, today))
+
+
+@bp.route('/agenda/digest')
+@login_required
+@require_module_access('follow_ups')
+def download_digest():
+    """Download an owner's precomputed digest for today as CSV."""
+    owner = agenda_owner(request.args.get('owner_id', type=int))
+    digest = owner_digest(owner.id)
+    if digest is None:
+        flash("Today's follow-up digest has not been generated yet.", 'info')
+        return redirect(url_for('follow_ups.agenda', owner_id=owner.id))
+    filename = f'follow-up-digest-{digest.digest_date.isoformat()}-{owner.id}.csv'
+    return Response(digest_csv(digest), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
@@ -7,6 +7,7 @@ from app import db, require_module_access
 from app.leads_b2b import bp
 from app.leads_b2b.forms import B2BLeadForm, MeetingForm
 from app.models import B2BLead, Meeting
+from app.utils.pagination import keyset_paginate
 
 
 @bp.route('/')
@@ -14,8 +15,8 @@ from app.models import B2BLead, Meeting
 @require_module_access('leads_b2b')
 def index():
     """Display all B2B leads."""
-    leads = B2BLead.query.order_by(B2BLead.created_at.desc()).all()
-    return render_template('leads_b2b/index.html', title='B2B Leads', leads=leads)
+    page = keyset_paginate(B2BLead.query, (B2BLead.created_at.desc(), B2BLead.id.desc()), tables=('b2b_lead',))
+    return render_template('leads_b2b/index.html', title='B2B Leads', leads=page.items, page=page)
 
 
 @bp.route('/add', methods=['GET', 'POST'])
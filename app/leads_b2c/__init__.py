@@ -4,4 +4,4 @@ from flask import Blueprint
 
 bp = Blueprint('leads_b2c', __name__)
 
-from app.leads_b2c import routes
\ No newline at end of file
+from app.leads_b2c import routes, exports
\ No newline at end of file
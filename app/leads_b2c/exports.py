@@ -0,0 +1,33 @@
+"""B2C lead exports."""
+
+from app.models import B2CLead
+from app.utils.exports import Export, register_export
+
+register_export(Export(
+    'b2c_leads', 'leads_b2c', B2CLead,
+    columns=[
+        ('Enquiry ID', B2CLead.enquiry_id),
+        ('Customer Name', B2CLead.customer_name),
+        ('Contact No', B2CLead.contact_no),
+        ('Email', B2CLead.email),
+        ('Enquiry Date', B2CLead.enquiry_date),
+        ('Source', B2CLead.source),
+        ('Services', B2CLead.services),
+        ('Referred By', B2CLead.referred_by),
+        ('Status', B2CLead.status),
+        ('Comment', B2CLead.comment),
+        ('Followup 1', B2CLead.followup1),
+        ('Followup 1 Detail', B2CLead.followup1_detail),
+        ('Followup 2', B2CLead.followup2),
+        ('Followup 2 Detail', B2CLead.followup2_detail),
+        ('Followup 3', B2CLead.followup3),
+        ('Followup 3 Detail', B2CLead.followup3_detail),
+        ('Customer ID', B2CLead.customer_id),
+    ],
+    filters={
+        'enquiry_date': ('range', B2CLead.enquiry_date),
+        'status': ('choice', B2CLead.status),
+        'source': ('choice', B2CLead.source),
+    },
+    title='B2C Leads',
+))
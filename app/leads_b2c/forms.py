@@ -2,10 +2,11 @@
 
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileRequired
-from wtforms import StringField, TextAreaField, DateField, SelectField, SubmitField
-from wtforms.validators import DataRequired, Email, Optional
+from wtforms import StringField, TextAreaField, DateField, SelectField, IntegerField, BooleanField, SubmitField
+from wtforms.validators import DataRequired, Email, Optional, NumberRange
 
-from app.models import FollowUpOutcome, Service, Setting
+from app.models import FollowUpOutcome
+from app.utils.choices import setting_options, service_options
 
 
 class B2CLeadForm(FlaskForm):
@@ -31,11 +32,11 @@ class B2CLeadForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(B2CLeadForm, self).__init__(*args, **kwargs)
         # Populate choices from settings
-        self.source.choices = [('', 'Select Source')] + [(setting.key, setting.value) for setting in Setting.get_options('Source')]
+        self.source.choices = [('', 'Select Source')] + list(setting_options('Source'))
         # Use value as both key and display text for status to store actual status name
-        self.status.choices = [(setting.value, setting.value) for setting in Setting.get_options('LeadStatus')]
+        self.status.choices = [(value, value) for key, value in setting_options('LeadStatus')]
         # Populate services choices from database
-        self.services.choices = [('', 'Select Service')] + [(str(service.id), service.name) for service in Service.query.order_by(Service.name).all()]
+        self.services.choices = [('', 'Select Service')] + [(str(service_id), name) for service_id, name in service_options()]
 
 
 class FollowUpForm(FlaskForm):
@@ -56,4 +57,7 @@ class CSVImportForm(FlaskForm):
 
     csv_file = FileField('CSV File', validators=[FileRequired()],
                         render_kw={'class': 'form-control', 'accept': '.csv', 'autocomplete': 'off'})
+    start_row = IntegerField('Resume from row', validators=[Optional(), NumberRange(min=2)],
+                             render_kw={'class': 'form-control', 'placeholder': 'Import the whole file', 'autocomplete': 'off'})
+    dry_run = BooleanField('Validate only (dry run)', render_kw={'class': 'form-check-input'})
     submit = SubmitField('Import Leads', render_kw={'class': 'btn btn-success'})
\ No newline at end of file
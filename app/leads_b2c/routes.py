@@ -1,15 +1,17 @@
 """B2C Leads routes."""
 
-import csv
-from datetime import datetime, date
-from io import StringIO
-from flask import render_template, flash, redirect, url_for, request, Response
+from datetime import date
+from flask import render_template, flash, redirect, url_for, request, abort, send_file
 from flask_login import login_required, current_user
 
 from app import db, require_module_access
 from app.leads_b2c import bp
 from app.leads_b2c.forms import B2CLeadForm, CSVImportForm
 from app.models import B2CLead, ChannelPartner, Service, FollowUp, FollowUpOutcome, LeadType
+from app.utils.choices import setting_options
+from app.utils.exports import EXPORTS
+from app.utils.importers import import_b2c_leads_csv, validate_b2c_leads_csv, save_error_report, report_path
+from app.utils.pagination import keyset_paginate
 
 
 @bp.route('/')
@@ -17,77 +19,25 @@ from app.models import B2CLead, ChannelPartner, Service, FollowUp, FollowUpOutco
 @require_module_access('leads_b2c')
 def index():
     """Display all B2C leads."""
-    leads = B2CLead.query.order_by(B2CLead.created_at.desc()).all()
-    return render_template('leads_b2c/index.html', title='B2C Leads', leads=leads)
+    page = keyset_paginate(B2CLead.query, (B2CLead.created_at.desc(), B2CLead.enquiry_id.desc()), tables=('b2c_lead',))
+    return render_template('leads_b2c/index.html', title='B2C Leads', leads=page.items, page=page,
+                           status_options=setting_options('LeadStatus'), source_options=setting_options('Source'))
 
 
 @bp.route('/export')
 @login_required
 @require_module_access('leads_b2c')
 def export():
-    """Export B2C leads to CSV."""
-    leads = B2CLead.query.order_by(B2CLead.created_at.desc()).all()
-
-    # Create CSV in memory
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # Write header
-    writer.writerow([
-        'Enquiry ID', 'Customer Name', 'Contact No', 'Email', 'Enquiry Date',
-        'Source', 'Services', 'Referred By', 'Status', 'Comment',
-        'Followup 1', 'Followup 1 Detail', 'Followup 2', 'Followup 2 Detail',
-        'Followup 3', 'Followup 3 Detail', 'Customer ID'
-    ])
-
-    # Write data
-    for lead in leads:
-        writer.writerow([
-            lead.enquiry_id,
-            lead.customer_name,
-            lead.contact_no,
-            lead.email,
-            lead.enquiry_date.strftime('%d-%m-%Y') if lead.enquiry_date else '',
-            lead.source if lead.source else '',
-            lead.services,
-            lead.referred_by,
-            lead.status,
-            lead.comment,
-            lead.followup1.strftime('%d-%m-%Y') if lead.followup1 else '',
-            lead.followup1_detail,
-            lead.followup2.strftime('%d-%m-%Y') if lead.followup2 else '',
-            lead.followup2_detail,
-            lead.followup3.strftime('%d-%m-%Y') if lead.followup3 else '',
-            lead.followup3_detail,
-            lead.customer_id
-        ])
-
-    output.seek(0)
-    return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': 'attachment; filename=b2c_leads.csv'}
-    )
-
-
-def parse_date(date_str):
-    """Parse date string with multiple format support."""
-    formats = [
-        '%Y-%m-%d',  # 2023-12-25
-        '%d/%m/%Y',  # 25/12/2023
-        '%m/%d/%Y',  # 12/25/2023
-        '%d-%m-%Y',  # 25-12-2023
-        '%m-%d-%Y',  # 12-25-2023
-        '%Y/%m/%d',  # 2023/12/25
-        '%d.%m.%Y',  # 25.12.2023
-    ]
-
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    return None
+    """Export B2C leads as CSV (or XLSX with ``format=xlsx``).
+
+    Optional filters: ``enquiry_date_from``/``enquiry_date_to``, ``status``
+    and ``source`` (comma-separated). See app.utils.exports.
+    """
+    try:
+        return EXPORTS['b2c_leads'].response(request.args, request.args.get('format', 'csv'))
+    except ValueError as e:
+        flash(f'Export failed: {e}', 'error')
+        return redirect(url_for('leads_b2c.index'))
 
 
 @bp.route('/import', methods=['GET', 'POST'])
@@ -99,95 +49,38 @@ def import_csv():
     import_results = None
 
     if form.validate_on_submit():
-        csv_file = form.csv_file.data
-        csv_content = csv_file.read().decode('utf-8')
-        csv_reader = csv.DictReader(StringIO(csv_content))
-
-        success_count = 0
-        error_count = 0
-        errors = []
-
-        for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 because row 1 is header
-            try:
-                # Check if enquiry_id already exists
-                enquiry_id = row.get('Enquiry ID', '').strip()
-                if not enquiry_id:
-                    errors.append(f"Row {row_num}: Enquiry ID is required")
-                    error_count += 1
-                    continue
-
-                existing_lead = B2CLead.query.filter_by(enquiry_id=enquiry_id).first()
-                if existing_lead:
-                    errors.append(f"Row {row_num}: Enquiry ID '{enquiry_id}' already exists")
-                    error_count += 1
-                    continue
-
-                # Parse enquiry_date
-                enquiry_date_str = row.get('Enquiry Date', '').strip()
-                enquiry_date = None
-                if enquiry_date_str:
-                    enquiry_date = parse_date(enquiry_date_str)
-                    if not enquiry_date:
-                        errors.append(f"Row {row_num}: Invalid enquiry date format (supported: DD/MM/YYYY, MM/DD/YYYY, YYYY-MM-DD, DD-MM-YYYY)")
-                        error_count += 1
-                        continue
+        stream = form.csv_file.data.stream
+        if form.dry_run.data:
+            result = validate_b2c_leads_csv(stream, start_row=form.start_row.data)
+            import_results = result.to_dict()
+            if result.error_count:
+                import_results['report_url'] = url_for('leads_b2c.import_report', name=save_error_report([result]))
+            flash(f'Validation finished: {result.success_count} rows ready to import, '
+                  f'{result.error_count} rows with errors. Nothing was imported.', 'info')
+            if result.failure:
+                flash(result.failure, 'danger')
+        else:
+            result = import_b2c_leads_csv(stream, user_id=current_user.id, start_row=form.start_row.data)
+            import_results = result.to_dict()
+
+            if result.resume_row:
+                flash(f'Import stopped at row {result.resume_row}: {result.success_count} leads imported. '
+                      f'Upload the file again with "Resume from row" set to {result.resume_row} to continue.', 'danger')
+            else:
+                flash(f'Import completed: {result.success_count} leads imported, {result.error_count} errors', 'info')
 
-                # Parse followup dates
-                followup1 = None
-                followup1_str = row.get('Followup 1', '').strip()
-                if followup1_str:
-                    followup1 = parse_date(followup1_str)
-
-                followup2 = None
-                followup2_str = row.get('Followup 2', '').strip()
-                if followup2_str:
-                    followup2 = parse_date(followup2_str)
-
-                followup3 = None
-                followup3_str = row.get('Followup 3', '').strip()
-                if followup3_str:
-                    followup3 = parse_date(followup3_str)
-
-                # Create lead
-                lead = B2CLead(
-                    enquiry_id=enquiry_id,
-                    customer_name=row.get('Customer Name', '').strip(),
-                    contact_no=row.get('Contact No', '').strip(),
-                    email=row.get('Email', '').strip() or None,
-                    enquiry_date=enquiry_date,
-                    source=row.get('Source', '').strip() or None,
-                    services=row.get('Services', '').strip() or None,
-                    referred_by=row.get('Referred By', '').strip() or None,
-                    status=row.get('Status', 'NEW').strip(),
-                    comment=row.get('Comment', '').strip() or None,
-                    followup1=followup1,
-                    followup1_detail=row.get('Followup 1 Detail', '').strip() or None,
-                    followup2=followup2,
-                    followup2_detail=row.get('Followup 2 Detail', '').strip() or None,
-                    followup3=followup3,
-                    followup3_detail=row.get('Followup 3 Detail', '').strip() or None,
-                    customer_id=row.get('Customer ID', '').strip() or None,
-                    created_by=current_user.id,
-                    updated_by=current_user.id
-                )
-
-                db.session.add(lead)
-                success_count += 1
-
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-                error_count += 1
-
-        db.session.commit()
-        import_results = {
-            'success_count': success_count,
-            'error_count': error_count,
-            'errors': errors[:10]  # Show first 10 errors
-        }
+    return render_template('leads_b2c/import.html', title='Import B2C Leads', form=form, import_results=import_results)
 
-        flash(f'Import completed: {success_count} leads imported, {error_count} errors', 'info')
 
-    return render_template('leads_b2c/import.html', title='Import B2C Leads', form=form, import_results=import_results)
+@bp.route('/import/report/<name>')
+@login_required
+@require_module_access('leads_b2c')
+def import_report(name):
+    """Download the error report of an import dry run."""
+    path = report_path(name)
+    if path is None:
+        abort(404)
+    return send_file(path, mimetype='text/csv', as_attachment=True, download_name='b2c-lead-import-errors.csv')
 
 
 @bp.route('/add', methods=['GET', 'POST'])
@@ -2,18 +2,22 @@
 
 import enum
 import json
+import re
 from datetime import datetime, date
 from decimal import Decimal
+from functools import lru_cache
 from typing import Optional
 
 from flask_login import UserMixin
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Index, CheckConstraint, func, text
+from sqlalchemy import Index, CheckConstraint, func, text, select, update, event, extract, inspect
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import validates, declared_attr
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from app import db
+from app.utils.contacts import NATIONAL_NUMBER_LENGTH, normalize_email, normalize_phone, prefix_upper_bound
+from app.utils.fiscal import FISCAL_YEAR_START_MONTH, fiscal_year_of, fiscal_year_label
 
 
 class UserRole(enum.Enum):
@@ -121,6 +125,14 @@ class AuditAction(enum.Enum):
     DELETE = "DELETE"
 
 
+class ExportJobStatus(enum.Enum):
+    """Background export job status enumeration."""
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
 class TimestampMixin:
     """Mixin for created_at and updated_at timestamps."""
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -142,6 +154,42 @@ class UserTrackingMixin:
         return db.relationship('User', foreign_keys=[cls.updated_by], post_update=True)
 
 
+# Every module a user can be given access to; admins always have all of them
+ALL_MODULES = ('dashboard', 'leads_b2c', 'leads_b2b', 'follow_ups', 'customers',
+               'employees', 'expenses', 'channel_partners', 'services', 'camps', 'finance', 'settings')
+
+# Modules of users without explicit permissions, by role
+ROLE_DEFAULT_MODULES = {
+    UserRole.SALES: ('dashboard', 'leads_b2c', 'leads_b2b', 'follow_ups', 'camps'),
+    UserRole.OPS: ('dashboard', 'customers', 'employees', 'expenses', 'channel_partners', 'services', 'camps'),
+    UserRole.FINANCE: ('dashboard', 'expenses', 'finance'),
+    UserRole.VIEWER: ('dashboard',),  # Read-only access
+}
+
+
+@lru_cache(maxsize=256)
+def compile_modules(role, permissions):
+    """(ordered tuple, frozenset) of the modules a role and permissions JSON allow.
+
+    Keyed on the raw column values, so the JSON is parsed once per distinct
+    value in each process and an edited user is recompiled on next access.
+    """
+    if role == UserRole.ADMIN:
+        modules = ALL_MODULES
+    else:
+        modules = None
+        if permissions:
+            try:
+                parsed = json.loads(permissions)
+            except (json.JSONDecodeError, TypeError):
+                parsed = None
+            if isinstance(parsed, list):
+                modules = tuple(parsed)
+        if modules is None:
+            modules = ROLE_DEFAULT_MODULES.get(role, ('dashboard',))
+    return modules, frozenset(modules)
+
+
 class User(UserMixin, db.Model, TimestampMixin, UserTrackingMixin):
     """User model for authentication and authorization."""
 
@@ -167,25 +215,7 @@ class User(UserMixin, db.Model, TimestampMixin, UserTrackingMixin):
     @property
     def allowed_modules(self):
         """Get list of allowed modules for this user."""
-        if self.role == UserRole.ADMIN:
-            # Admins have access to everything
-            return ['dashboard', 'leads_b2c', 'leads_b2b', 'follow_ups', 'customers',
-                   'employees', 'expenses', 'channel_partners', 'services', 'camps', 'finance', 'settings']
-
-        if self.permissions:
-            try:
-                return json.loads(self.permissions)
-            except (json.JSONDecodeError, TypeError):
-                pass
-
-        # Default permissions based on role
-        defaults = {
-            UserRole.SALES: ['dashboard', 'leads_b2c', 'leads_b2b', 'follow_ups', 'camps'],
-            UserRole.OPS: ['dashboard', 'customers', 'employees', 'expenses', 'channel_partners', 'services', 'camps'],
-            UserRole.FINANCE: ['dashboard', 'expenses', 'finance'],
-            UserRole.VIEWER: ['dashboard']  # Read-only access
-        }
-        return defaults.get(self.role, ['dashboard'])
+        return list(compile_modules(self.role, self.permissions)[0])
 
     @allowed_modules.setter
     def allowed_modules(self, modules):
@@ -195,11 +225,14 @@ class User(UserMixin, db.Model, TimestampMixin, UserTrackingMixin):
         else:
             self.permissions = None
 
+    @property
+    def module_access(self) -> frozenset:
+        """Allowed modules as a frozenset, compiled once per role and permissions value."""
+        return compile_modules(self.role, self.permissions)[1]
+
     def has_module_access(self, module_name: str) -> bool:
         """Check if user has access to a specific module."""
-        if self.role == UserRole.ADMIN:
-            return True
-        return module_name in self.allowed_modules
+        return self.role == UserRole.ADMIN or module_name in compile_modules(self.role, self.permissions)[1]
 
     def has_permission(self, required_role: UserRole) -> bool:
         """Check if user has required permission level."""
@@ -259,31 +292,13 @@ class B2CLead(db.Model, TimestampMixin, UserTrackingMixin):
     @staticmethod
     def generate_enquiry_id():
         """Generate a unique enquiry ID in format B2C-XXX."""
-        # Find the highest existing enquiry ID
-        existing_ids = db.session.query(B2CLead.enquiry_id).filter(
-            B2CLead.enquiry_id.like('B2C-%')
-        ).all()
-
-        if existing_ids:
-            # Extract the sequential numbers and find the max
-            numbers = []
-            for eid in existing_ids:
-                try:
-                    num_part = eid[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'B2C-{next_num:03d}'
+        return CodeSequence.peek_code('B2C')
 
 
 # Indexes for B2CLead
 Index('idx_b2c_lead_enquiry_email_contact_status', 
       B2CLead.enquiry_id, B2CLead.email, B2CLead.contact_no, B2CLead.status)
+Index('idx_b2c_lead_created_at_enquiry', B2CLead.created_at, B2CLead.enquiry_id)
 
 
 class B2BLead(db.Model, TimestampMixin, UserTrackingMixin):
@@ -320,31 +335,13 @@ class B2BLead(db.Model, TimestampMixin, UserTrackingMixin):
     @staticmethod
     def generate_sr_no():
         """Generate a unique sr_no in format B2B-XXX."""
-        # Find the highest existing sr_no
-        existing_sr_nos = db.session.query(B2BLead.sr_no).filter(
-            B2BLead.sr_no.like('B2B-%')
-        ).all()
-
-        if existing_sr_nos:
-            # Extract the sequential numbers and find the max
-            numbers = []
-            for sr_no in existing_sr_nos:
-                try:
-                    num_part = sr_no[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'B2B-{next_num:03d}'
+        return CodeSequence.peek_code('B2B')
 
 
 # Indexes for B2BLead
 Index('idx_b2b_lead_org_email',
       B2BLead.organization_name, B2BLead.organization_email)
+Index('idx_b2b_lead_created_at_id', B2BLead.created_at, B2BLead.id)
 
 
 class FollowUp(db.Model, TimestampMixin):
@@ -378,6 +375,12 @@ class FollowUp(db.Model, TimestampMixin):
         lead_ref = f"B2C-{self.b2c_lead_id}" if self.b2c_lead_id else f"B2B-{self.b2b_lead_id}"
         return f'<FollowUp {lead_ref}: {self.follow_up_on}>'
 
+# Indexes for FollowUp: per-owner agendas and per-lead follow-up chains
+Index('idx_follow_up_owner_date', FollowUp.owner_id, FollowUp.follow_up_on)
+Index('idx_follow_up_owner_next', FollowUp.owner_id, FollowUp.next_follow_up_on)
+Index('idx_follow_up_b2c_lead_date', FollowUp.b2c_lead_id, FollowUp.follow_up_on)
+Index('idx_follow_up_b2b_lead_date', FollowUp.b2b_lead_id, FollowUp.follow_up_on)
+
 
 class Meeting(db.Model, TimestampMixin, UserTrackingMixin):
     """Meeting model for B2B leads."""
@@ -423,26 +426,7 @@ class Customer(db.Model, TimestampMixin, UserTrackingMixin):
     @staticmethod
     def generate_customer_code():
         """Generate a unique customer code in format CUST-XXX."""
-        # Find the highest existing customer code
-        existing_codes = db.session.query(Customer.customer_code).filter(
-            Customer.customer_code.like('CUST-%')
-        ).all()
-
-        if existing_codes:
-            # Extract the sequential numbers and find the max
-            numbers = []
-            for code in existing_codes:
-                try:
-                    num_part = code[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'CUST-{next_num:03d}'
+        return CodeSequence.peek_code('CUST')
 
 
 # Indexes for Customer
@@ -527,26 +511,7 @@ class Booking(db.Model, TimestampMixin, UserTrackingMixin):
     @staticmethod
     def generate_booking_code():
         """Generate a unique booking code in format BOOK-XXX."""
-        # Find the highest existing booking code
-        existing_codes = db.session.query(Booking.booking_code).filter(
-            Booking.booking_code.like('BOOK-%')
-        ).all()
-
-        if existing_codes:
-            # Extract the sequential numbers and find the max
-            numbers = []
-            for code in existing_codes:
-                try:
-                    num_part = code[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'BOOK-{next_num:03d}'
+        return CodeSequence.peek_code('BOOK')
 
 
 # Indexes for Booking
@@ -588,26 +553,7 @@ class Employee(db.Model, TimestampMixin, UserTrackingMixin):
     @staticmethod
     def generate_employee_code():
         """Generate a unique employee code in format EMP-XXX."""
-        # Find the highest existing employee code
-        existing_codes = db.session.query(Employee.employee_code).filter(
-            Employee.employee_code.like('EMP-%')
-        ).all()
-
-        if existing_codes:
-            # Extract the sequential numbers and find the max
-            numbers = []
-            for code in existing_codes:
-                try:
-                    num_part = code[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'EMP-{next_num:03d}'
+        return CodeSequence.peek_code('EMP')
 
 
 # Indexes for Employee
@@ -665,6 +611,10 @@ class Leave(db.Model, TimestampMixin, UserTrackingMixin):
         return f'<Leave {self.employee.name}: {self.leave_type.value} ({self.start_date} to {self.end_date})>'
 
 
+# Indexes for Leave
+Index('idx_leave_created_at_id', Leave.created_at, Leave.id)
+
+
 class Task(db.Model, TimestampMixin, UserTrackingMixin):
     """Task assignment model."""
 
@@ -693,6 +643,10 @@ class Task(db.Model, TimestampMixin, UserTrackingMixin):
         return f'<Task {self.title}: {self.employee.name} ({self.status.value})>'
 
 
+# Indexes for Task
+Index('idx_task_created_at_id', Task.created_at, Task.id)
+
+
 class PerformanceMetric(db.Model, TimestampMixin):
     """Performance metrics for employees."""
 
@@ -760,30 +714,12 @@ class Expense(db.Model, TimestampMixin, UserTrackingMixin):
     @staticmethod
     def generate_expense_code():
         """Generate a unique expense code in format EXP-XXX."""
-        # Find the highest existing expense code
-        existing_codes = db.session.query(Expense.expense_code).filter(
-            Expense.expense_code.like('EXP-%')
-        ).all()
-
-        if existing_codes:
-            # Extract the sequential numbers and find the max
-            numbers = []
-            for code in existing_codes:
-                try:
-                    num_part = code[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'EXP-{next_num:03d}'
+        return CodeSequence.peek_code('EXP')
 
 
 # Indexes for Expense
 Index('idx_expense_date_category_booking', Expense.date, Expense.category, Expense.booking_id)
+Index('idx_expense_created_at_id', Expense.created_at, Expense.id)
 
 
 class ChannelPartner(db.Model, TimestampMixin, UserTrackingMixin):
@@ -805,31 +741,13 @@ class ChannelPartner(db.Model, TimestampMixin, UserTrackingMixin):
     @staticmethod
     def generate_partner_code():
         """Generate a unique partner code in format CP-XXX."""
-        # Find the highest existing partner code
-        existing_codes = db.session.query(ChannelPartner.partner_code).filter(
-            ChannelPartner.partner_code.like('CP-%')
-        ).all()
-
-        if existing_codes:
-            # Extract the sequential numbers and find the max
-            numbers = []
-            for code in existing_codes:
-                try:
-                    num_part = code[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'CP-{next_num:03d}'
+        return CodeSequence.peek_code('CP')
 
 
 # Indexes for ChannelPartner
 Index('idx_channel_partner_name_contact_email', 
       ChannelPartner.name, ChannelPartner.contact_no, ChannelPartner.email)
+Index('idx_channel_partner_created_at_id', ChannelPartner.created_at, ChannelPartner.id)
 
 
 class Setting(db.Model, TimestampMixin, UserTrackingMixin):
@@ -850,9 +768,9 @@ class Setting(db.Model, TimestampMixin, UserTrackingMixin):
     
     @classmethod
     def get_options(cls, group: str):
-        """Get all active options for a group."""
-        return cls.query.filter_by(group=group, is_active=True)\
-                       .order_by(cls.sort_order, cls.value).all()
+        """Get all active options for a group, as read-only SettingOption tuples held in memory."""
+        from app.utils.setting_registry import settings_registry
+        return list(settings_registry.options(group))
     
     def __repr__(self):
         return f'<Setting {self.group}.{self.key}: {self.value}>'
@@ -871,6 +789,10 @@ class Service(db.Model, TimestampMixin, UserTrackingMixin):
         return f'<Service {self.id}: {self.name}>'
 
 
+# Indexes for Service
+Index('idx_service_created_at_id', Service.created_at, Service.id)
+
+
 class Payment(db.Model, TimestampMixin, UserTrackingMixin):
     """Payment model for tracking individual payments on bookings."""
 
@@ -918,30 +840,12 @@ class Camp(db.Model, TimestampMixin, UserTrackingMixin):
     @staticmethod
     def generate_camp_id():
         """Generate a unique camp ID in format CAMP-XXX."""
-        # Find the highest existing camp ID
-        existing_ids = db.session.query(Camp.camp_id).filter(
-            Camp.camp_id.like('CAMP-%')
-        ).all()
-
-        if existing_ids:
-            # Extract the sequential numbers and find the max
-            numbers = []
-            for camp_id in existing_ids:
-                try:
-                    num_part = camp_id[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'CAMP-{next_num:03d}'
+        return CodeSequence.peek_code('CAMP')
 
 
 # Indexes for Camp
 Index('idx_camp_date_location_patient', Camp.camp_date, Camp.camp_location, Camp.patient_name)
+Index('idx_camp_date_id', Camp.camp_date, Camp.id)
 
 
 class CampDefault(db.Model, TimestampMixin, UserTrackingMixin):
@@ -1027,14 +931,19 @@ class Sale(db.Model, TimestampMixin, UserTrackingMixin):
         return f'<Sale {self.invoice_number}: {self.customer_name}>'
 
     @staticmethod
-    def generate_invoice_number():
-        """Generate a unique invoice number prefix in format T4H/24-25/."""
-        # Return only the prefix, user will add the rest
-        return 'T4H/24-25/'
+    def invoice_prefix(on: Optional[date] = None) -> str:
+        """Return the invoice prefix for the fiscal year of a date, e.g. T4H/25-26/."""
+        return DocumentSeries.prefix('INV', on)
+
+    @staticmethod
+    def generate_invoice_number(on: Optional[date] = None):
+        """Generate the next invoice number in format T4H/YY-YY/XXX."""
+        return DocumentSeries.peek('INV', on)
 
 
 # Indexes for Sale
 Index('idx_sale_date_customer_status', Sale.date, Sale.customer_name, Sale.payment_status)
+Index('idx_sale_date_id', Sale.date, Sale.id)
 
 
 class Purchase(db.Model, TimestampMixin, UserTrackingMixin):
@@ -1079,31 +988,14 @@ class Purchase(db.Model, TimestampMixin, UserTrackingMixin):
         return f'<Purchase {self.bill_number}: {self.vendor_name}>'
 
     @staticmethod
-    def generate_bill_number():
-        """Generate a unique bill number in format BILL-YYYY-XXX."""
-        from datetime import datetime
-        year = datetime.now().year
-        existing_bills = db.session.query(Purchase.bill_number).filter(
-            Purchase.bill_number.like(f'BILL-{year}-%')
-        ).all()
-
-        if existing_bills:
-            numbers = []
-            for bill in existing_bills:
-                try:
-                    num_part = bill[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'BILL-{year}-{next_num:04d}'
+    def generate_bill_number(on: Optional[date] = None):
+        """Generate the next bill number in format BILL-YY-YY-XXX."""
+        return DocumentSeries.peek('BILL', on)
 
 
 # Indexes for Purchase
 Index('idx_purchase_date_vendor_status', Purchase.date, Purchase.vendor_name, Purchase.payment_status)
+Index('idx_purchase_date_id', Purchase.date, Purchase.id)
 
 
 class PaymentReceived(db.Model, TimestampMixin, UserTrackingMixin):
@@ -1146,31 +1038,14 @@ class PaymentReceived(db.Model, TimestampMixin, UserTrackingMixin):
         return f'<PaymentReceived {self.reference_number}: ₹{self.amount}>'
 
     @staticmethod
-    def generate_reference_number():
-        """Generate a unique reference number in format PAY-IN-YYYY-XXX."""
-        from datetime import datetime
-        year = datetime.now().year
-        existing_refs = db.session.query(PaymentReceived.reference_number).filter(
-            PaymentReceived.reference_number.like(f'PAY-IN-{year}-%')
-        ).all()
-
-        if existing_refs:
-            numbers = []
-            for ref in existing_refs:
-                try:
-                    num_part = ref[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'PAY-IN-{year}-{next_num:04d}'
+    def generate_reference_number(on: Optional[date] = None):
+        """Generate the next reference number in format PAY-IN-YY-YY-XXX."""
+        return DocumentSeries.peek('PAY-IN', on)
 
 
 # Indexes for PaymentReceived
 Index('idx_payment_received_date_customer', PaymentReceived.date, PaymentReceived.customer_name)
+Index('idx_payment_received_date_id', PaymentReceived.date, PaymentReceived.id)
 
 
 class PaymentMade(db.Model, TimestampMixin, UserTrackingMixin):
@@ -1212,31 +1087,14 @@ class PaymentMade(db.Model, TimestampMixin, UserTrackingMixin):
         return f'<PaymentMade {self.reference_number}: ₹{self.amount}>'
 
     @staticmethod
-    def generate_reference_number():
-        """Generate a unique reference number in format PAY-OUT-YYYY-XXX."""
-        from datetime import datetime
-        year = datetime.now().year
-        existing_refs = db.session.query(PaymentMade.reference_number).filter(
-            PaymentMade.reference_number.like(f'PAY-OUT-{year}-%')
-        ).all()
-
-        if existing_refs:
-            numbers = []
-            for ref in existing_refs:
-                try:
-                    num_part = ref[0].split('-')[-1]
-                    numbers.append(int(num_part))
-                except (IndexError, ValueError):
-                    continue
-            next_num = max(numbers) + 1 if numbers else 1
-        else:
-            next_num = 1
-
-        return f'PAY-OUT-{year}-{next_num:04d}'
+    def generate_reference_number(on: Optional[date] = None):
+        """Generate the next reference number in format PAY-OUT-YY-YY-XXX."""
+        return DocumentSeries.peek('PAY-OUT', on)
 
 
 # Indexes for PaymentMade
 Index('idx_payment_made_date_payee_category', PaymentMade.date, PaymentMade.payee_name, PaymentMade.category)
+Index('idx_payment_made_date_id', PaymentMade.date, PaymentMade.id)
 
 
 class AccountType(enum.Enum):
@@ -1306,3 +1164,1014 @@ class AuditLog(db.Model):
         return f'<AuditLog {self.entity}:{self.entity_id} {self.action}>'
 
 
+def _insert_ignore(connection, table, values):
+    """Insert a row unless its primary key already exists (race-safe where supported)."""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**values).on_conflict_do_nothing()
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**values).on_conflict_do_nothing()
+    else:
+        stmt = table.insert().values(**values)
+    connection.execute(stmt)
+
+
+class CodeSequence(db.Model):
+    """Counter table for sequential entity codes (B2C-001, CUST-001, ...).
+
+    One row per prefix stores the last number handed out, so allocating a
+    code is a single-row update instead of a scan over the entity table. The
+    row stays locked until the surrounding transaction commits, which keeps
+    concurrent saves from receiving the same number.
+    """
+
+    __tablename__ = 'code_sequence'
+
+    prefix = db.Column(db.String(20), primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def format_code(prefix: str, number: int) -> str:
+        """Format a sequence number as a code, e.g. ('CUST', 7) -> 'CUST-007'."""
+        return f'{prefix}-{number:03d}'
+
+    @staticmethod
+    def parse_code(prefix: str, code: Optional[str]) -> Optional[int]:
+        """Return the number of a PREFIX-N code, or None for custom codes."""
+        if not code or not code.startswith(f'{prefix}-'):
+            return None
+        num_part = code[len(prefix) + 1:]
+        return int(num_part) if num_part.isdigit() else None
+
+    @classmethod
+    def scan_max(cls, prefix: str, connection=None) -> int:
+        """Find the highest number in use for a prefix by scanning its entity table."""
+        connection = connection or db.session.connection()
+        column = CODE_SEQUENCE_COLUMNS[prefix]
+        rows = connection.execute(select(column).where(column.like(f'{prefix}-%')))
+        numbers = (cls.parse_code(prefix, row[0]) for row in rows)
+        return max((n for n in numbers if n is not None), default=0)
+
+    @classmethod
+    def _last_value(cls, prefix: str, connection) -> Optional[int]:
+        table = cls.__table__
+        return connection.execute(
+            select(table.c.last_value).where(table.c.prefix == prefix)
+        ).scalar()
+
+    @classmethod
+    def _ensure(cls, prefix: str, connection) -> None:
+        """Create the counter row for a prefix, seeded from existing codes."""
+        if cls._last_value(prefix, connection) is None:
+            _insert_ignore(connection, cls.__table__, {
+                'prefix': prefix,
+                'last_value': cls.scan_max(prefix, connection),
+                'updated_at': datetime.utcnow(),
+            })
+
+    @classmethod
+    def peek_code(cls, prefix: str) -> str:
+        """Return the code the next save will most likely receive (read-only)."""
+        connection = db.session.connection()
+        last_value = cls._last_value(prefix, connection)
+        if last_value is None:
+            last_value = cls.scan_max(prefix, connection)
+        return cls.format_code(prefix, last_value + 1)
+
+    @classmethod
+    def allocate(cls, prefix: str, connection=None, count: int = 1) -> int:
+        """Atomically increment the counter for a prefix and return the new value.
+
+        With ``count`` > 1 a block of numbers is reserved at once; they are
+        the ``count`` values ending at the one returned.
+        """
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        cls._ensure(prefix, connection)
+        connection.execute(
+            update(table)
+            .where(table.c.prefix == prefix)
+            .values(last_value=table.c.last_value + count, updated_at=datetime.utcnow())
+        )
+        return cls._last_value(prefix, connection)
+
+    @classmethod
+    def claim(cls, prefix: str, number: int, connection=None) -> bool:
+        """Advance the counter to ``number`` if it is above the last value handed out.
+
+        Returns False when ``number`` is not a new high-water mark, i.e. it
+        was already issued (or skipped) by an earlier allocation.
+        """
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        cls._ensure(prefix, connection)
+        result = connection.execute(
+            update(table)
+            .where(table.c.prefix == prefix, table.c.last_value < number)
+            .values(last_value=number, updated_at=datetime.utcnow())
+        )
+        return result.rowcount == 1
+
+    @classmethod
+    def backfill(cls, prefix: str, connection=None) -> int:
+        """Raise the counter for a prefix to the highest code in use and return it."""
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        highest = cls.scan_max(prefix, connection)
+        cls._ensure(prefix, connection)
+        connection.execute(
+            update(table)
+            .where(table.c.prefix == prefix, table.c.last_value < highest)
+            .values(last_value=highest, updated_at=datetime.utcnow())
+        )
+        return cls._last_value(prefix, connection)
+
+    def __repr__(self):
+        return f'<CodeSequence {self.prefix}: {self.last_value}>'
+
+
+# Code column backing each sequence prefix
+CODE_SEQUENCE_COLUMNS = {
+    'B2C': B2CLead.enquiry_id,
+    'B2B': B2BLead.sr_no,
+    'CUST': Customer.customer_code,
+    'BOOK': Booking.booking_code,
+    'EMP': Employee.employee_code,
+    'EXP': Expense.expense_code,
+    'CP': ChannelPartner.partner_code,
+    'CAMP': Camp.camp_id,
+}
+
+
+def _assign_sequence_code(prefix, column):
+    """Build a before_insert hook that reserves the entity code in its sequence.
+
+    Codes shown on the add forms are only a preview, so two users can submit
+    the same one. The first insert claims the number; a later insert whose
+    code is already taken gets a freshly allocated number instead. Custom
+    codes outside the PREFIX-N pattern are left untouched.
+    """
+    attr = column.key
+
+    def before_insert(mapper, connection, target):
+        code = getattr(target, attr)
+        if code is None:
+            setattr(target, attr, CodeSequence.format_code(prefix, CodeSequence.allocate(prefix, connection)))
+            return
+
+        number = CodeSequence.parse_code(prefix, code)
+        if number is None or CodeSequence.claim(prefix, number, connection):
+            return
+
+        taken = connection.execute(select(column).where(column == code)).first()
+        if taken:
+            setattr(target, attr, CodeSequence.format_code(prefix, CodeSequence.allocate(prefix, connection)))
+
+    return before_insert
+
+
+for _prefix, _column in CODE_SEQUENCE_COLUMNS.items():
+    event.listen(_column.class_, 'before_insert', _assign_sequence_code(_prefix, _column))
+
+
+class DocumentSeries(db.Model):
+    """Per-fiscal-year counters for finance document numbers.
+
+    Invoices, bills and payment references restart their numbering every
+    fiscal year (April to March). Each (series, fiscal year) pair keeps the
+    last number issued so a reference is allocated with a single-row update.
+    """
+
+    __tablename__ = 'document_series'
+
+    series = db.Column(db.String(20), primary_key=True)
+    fiscal_year = db.Column(db.String(7), primary_key=True)  # e.g. 2025-26
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def prefix(series: str, on: Optional[date] = None) -> str:
+        """Return the document prefix for the fiscal year containing a date."""
+        template, _column, _width = FINANCE_DOCUMENT_SERIES[series]
+        return template.format(fy=fiscal_year_label(fiscal_year_of(on), short=True))
+
+    @staticmethod
+    def format_number(series: str, fiscal_year: int, number: int) -> str:
+        """Format a document number, e.g. ('BILL', 2025, 7) -> 'BILL-25-26-0007'."""
+        template, _column, width = FINANCE_DOCUMENT_SERIES[series]
+        return template.format(fy=fiscal_year_label(fiscal_year, short=True)) + f'{number:0{width}d}'
+
+    @staticmethod
+    def parse_number(series: str, value: Optional[str]):
+        """Return (fiscal year, number) for a document number, or None if it is custom."""
+        template, _column, _width = FINANCE_DOCUMENT_SERIES[series]
+        head, tail = (re.escape(part) for part in template.split('{fy}'))
+        match = re.fullmatch(f'{head}(\\d{{2}})-(\\d{{2}}){tail}(\\d+)', value or '')
+        if not match or (int(match.group(1)) + 1) % 100 != int(match.group(2)):
+            return None
+        return 2000 + int(match.group(1)), int(match.group(3))
+
+    @classmethod
+    def _key(cls, series: str, fiscal_year: int):
+        table = cls.__table__
+        return (table.c.series == series) & (table.c.fiscal_year == fiscal_year_label(fiscal_year))
+
+    @classmethod
+    def scan_max(cls, series: str, fiscal_year: int, connection=None) -> int:
+        """Find the highest number in use for a series and fiscal year."""
+        connection = connection or db.session.connection()
+        template, column, _width = FINANCE_DOCUMENT_SERIES[series]
+        prefix = template.format(fy=fiscal_year_label(fiscal_year, short=True))
+        rows = connection.execute(select(column).where(column.like(f'{prefix}%')))
+        parsed = (cls.parse_number(series, row[0]) for row in rows)
+        return max((p[1] for p in parsed if p and p[0] == fiscal_year), default=0)
+
+    @classmethod
+    def _last_value(cls, series: str, fiscal_year: int, connection) -> Optional[int]:
+        return connection.execute(
+            select(cls.__table__.c.last_value).where(cls._key(series, fiscal_year))
+        ).scalar()
+
+    @classmethod
+    def _ensure(cls, series: str, fiscal_year: int, connection) -> None:
+        """Create the counter row for a series and fiscal year, seeded from existing numbers."""
+        if cls._last_value(series, fiscal_year, connection) is None:
+            _insert_ignore(connection, cls.__table__, {
+                'series': series,
+                'fiscal_year': fiscal_year_label(fiscal_year),
+                'last_value': cls.scan_max(series, fiscal_year, connection),
+                'updated_at': datetime.utcnow(),
+            })
+
+    @classmethod
+    def peek(cls, series: str, on: Optional[date] = None) -> str:
+        """Return the number the next document dated ``on`` will most likely receive (read-only)."""
+        connection = db.session.connection()
+        fiscal_year = fiscal_year_of(on)
+        last_value = cls._last_value(series, fiscal_year, connection)
+        if last_value is None:
+            last_value = cls.scan_max(series, fiscal_year, connection)
+        return cls.format_number(series, fiscal_year, last_value + 1)
+
+    @classmethod
+    def reserve_block(cls, series: str, count: int, on: Optional[date] = None, connection=None) -> list:
+        """Atomically reserve ``count`` consecutive numbers and return them formatted.
+
+        Bulk imports reserve a whole block up front instead of allocating one
+        number per row.
+        """
+        if count < 1:
+            return []
+        connection = connection or db.session.connection()
+        fiscal_year = fiscal_year_of(on)
+        cls._ensure(series, fiscal_year, connection)
+        connection.execute(
+            update(cls.__table__)
+            .where(cls._key(series, fiscal_year))
+            .values(last_value=cls.__table__.c.last_value + count, updated_at=datetime.utcnow())
+        )
+        last_value = cls._last_value(series, fiscal_year, connection)
+        return [cls.format_number(series, fiscal_year, n)
+                for n in range(last_value - count + 1, last_value + 1)]
+
+    @classmethod
+    def allocate(cls, series: str, on: Optional[date] = None, connection=None) -> str:
+        """Atomically allocate the next document number for the fiscal year of ``on``."""
+        return cls.reserve_block(series, 1, on, connection)[0]
+
+    @classmethod
+    def claim(cls, series: str, fiscal_year: int, number: int, connection=None) -> bool:
+        """Advance the counter to ``number`` if it is above the last value issued."""
+        connection = connection or db.session.connection()
+        cls._ensure(series, fiscal_year, connection)
+        result = connection.execute(
+            update(cls.__table__)
+            .where(cls._key(series, fiscal_year), cls.__table__.c.last_value < number)
+            .values(last_value=number, updated_at=datetime.utcnow())
+        )
+        return result.rowcount == 1
+
+    def __repr__(self):
+        return f'<DocumentSeries {self.series} FY{self.fiscal_year}: {self.last_value}>'
+
+
+# Finance document series: name -> (prefix template, number column, zero padding)
+FINANCE_DOCUMENT_SERIES = {
+    'INV': ('T4H/{fy}/', Sale.invoice_number, 3),
+    'BILL': ('BILL-{fy}-', Purchase.bill_number, 4),
+    'PAY-IN': ('PAY-IN-{fy}-', PaymentReceived.reference_number, 4),
+    'PAY-OUT': ('PAY-OUT-{fy}-', PaymentMade.reference_number, 4),
+}
+
+
+def _assign_document_number(series, column):
+    """Build a before_insert hook that reserves a finance document number in its series.
+
+    Mirrors _assign_sequence_code: numbers following the series pattern are
+    claimed in the fiscal year they name, a number that is already taken is
+    replaced by a fresh one, and missing numbers are allocated from the
+    fiscal year of the document date.
+    """
+    attr = column.key
+
+    def before_insert(mapper, connection, target):
+        value = getattr(target, attr)
+        if value is None:
+            setattr(target, attr, DocumentSeries.allocate(series, target.date, connection))
+            return
+
+        parsed = DocumentSeries.parse_number(series, value)
+        if parsed is None or DocumentSeries.claim(series, parsed[0], parsed[1], connection):
+            return
+
+        taken = connection.execute(select(column).where(column == value)).first()
+        if taken:
+            fiscal_year_start = date(parsed[0], FISCAL_YEAR_START_MONTH, 1)
+            setattr(target, attr, DocumentSeries.allocate(series, fiscal_year_start, connection))
+
+    return before_insert
+
+
+for _series, (_template, _column, _width) in FINANCE_DOCUMENT_SERIES.items():
+    event.listen(_column.class_, 'before_insert', _assign_document_number(_series, _column))
+
+
+class TableVersion(db.Model):
+    """Change counter per table, used to key cached query results.
+
+    Versions are bumped in a short transaction of their own right after the
+    writes they track commit (see app.utils.cache), so other workers only see
+    a new version once the data is committed.
+    """
+
+    __tablename__ = 'table_version'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def bump(cls, connection, table_names) -> None:
+        """Increment the version of each table, creating missing rows."""
+        table = cls.__table__
+        for name in sorted(table_names):
+            bump = update(table).where(table.c.table_name == name).values(version=table.c.version + 1)
+            if connection.execute(bump).rowcount == 0:
+                _insert_ignore(connection, table, {'table_name': name, 'version': 0})
+                connection.execute(bump)
+
+    @classmethod
+    def snapshot(cls, connection=None) -> dict:
+        """Return the current version of every tracked table."""
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        return dict(connection.execute(select(table.c.table_name, table.c.version)).all())
+
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}: {self.version}>'
+
+
+class FinanceMonthlyRollup(db.Model):
+    """Monthly amount and row count per finance metric.
+
+    Kept up to date by mapper events on the finance ledgers, inside the same
+    transaction as the ledger write, so dashboards and trend charts read a
+    few rows per month instead of aggregating the ledgers. ``flask
+    rebuild-finance-rollups`` recomputes it from the ledgers.
+    """
+
+    __tablename__ = 'finance_monthly_rollup'
+
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(32), primary_key=True)
+    amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def apply(cls, connection, deltas) -> None:
+        """Add {(year, month, metric): (amount, count)} deltas, creating missing rows."""
+        table = cls.__table__
+        for (year, month, metric) in sorted(deltas):
+            amount, count = deltas[(year, month, metric)]
+            if not amount and not count:
+                continue
+            key = (table.c.year == year) & (table.c.month == month) & (table.c.metric == metric)
+            stmt = update(table).where(key).values(amount=table.c.amount + amount, count=table.c.count + count)
+            if connection.execute(stmt).rowcount == 0:
+                _insert_ignore(connection, table, {'year': year, 'month': month, 'metric': metric,
+                                                   'amount': 0, 'count': 0})
+                connection.execute(stmt)
+
+    @classmethod
+    def totals(cls, first: Optional[date] = None, last: Optional[date] = None, connection=None) -> dict:
+        """Return {(year, month, metric): (amount, count)} from the rollup table."""
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        query = select(table.c.year, table.c.month, table.c.metric, table.c.amount, table.c.count)
+        if first is not None:
+            query = query.where(table.c.year >= first.year)
+        if last is not None:
+            query = query.where(table.c.year <= last.year)
+        totals = {}
+        for year, month, metric, amount, count in connection.execute(query):
+            if (first is None or (year, month) >= (first.year, first.month)) and \
+                    (last is None or (year, month) <= (last.year, last.month)):
+                totals[(year, month, metric)] = (amount, count)
+        return totals
+
+    @classmethod
+    def ledger_totals(cls, first: Optional[date] = None, last: Optional[date] = None, connection=None) -> dict:
+        """Aggregate {(year, month, metric): (amount, count)} straight from the ledgers.
+
+        One GROUP BY month query per metric, filtered with a sargable
+        ``date BETWEEN`` range when bounds are given.
+        """
+        connection = connection or db.session.connection()
+        totals = {}
+        for metric, (model, amount_attr, null_attr) in FINANCE_ROLLUP_METRICS.items():
+            year = extract('year', model.date)
+            month = extract('month', model.date)
+            query = select(year, month, func.coalesce(func.sum(getattr(model, amount_attr)), 0), func.count())\
+                .group_by(year, month)
+            if first is not None and last is not None:
+                query = query.where(model.date.between(first, last))
+            if null_attr:
+                query = query.where(getattr(model, null_attr).is_(None))
+            for row_year, row_month, amount, count in connection.execute(query):
+                totals[(int(row_year), int(row_month), metric)] = (amount, count)
+        return totals
+
+    @classmethod
+    def rebuild(cls, connection=None) -> int:
+        """Replace the rollup with totals recomputed from the ledgers; returns the row count."""
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        rows = [{'year': year, 'month': month, 'metric': metric, 'amount': amount, 'count': count}
+                for (year, month, metric), (amount, count) in cls.ledger_totals(connection=connection).items()]
+        connection.execute(table.delete())
+        if rows:
+            connection.execute(table.insert(), rows)
+        return len(rows)
+
+    def __repr__(self):
+        return f'<FinanceMonthlyRollup {self.year}-{self.month:02d} {self.metric}: {self.amount}>'
+
+
+# Rollup metric -> (ledger model, amount attribute, attribute that must be NULL)
+FINANCE_ROLLUP_METRICS = {
+    'sales': (Sale, 'amount', None),
+    'purchases': (Purchase, 'amount', None),
+    'expenses': (Expense, 'expense_amount', None),
+    'payments_received': (PaymentReceived, 'amount', None),
+    # Payments not linked to a sale invoice also count as revenue
+    'standalone_payments': (PaymentReceived, 'amount', 'sale_id'),
+    'payments_made': (PaymentMade, 'amount', None),
+}
+
+
+def _rollup_deltas(model, values, sign, deltas):
+    """Add one ledger row's contribution (``sign`` = 1 or -1) to ``deltas``."""
+    if values.get('date') is None:
+        return
+    for metric, (metric_model, amount_attr, null_attr) in FINANCE_ROLLUP_METRICS.items():
+        if metric_model is not model or (null_attr and values.get(null_attr) is not None):
+            continue
+        key = (values['date'].year, values['date'].month, metric)
+        amount, count = deltas.get(key, (0, 0))
+        deltas[key] = (amount + sign * Decimal(str(values.get(amount_attr) or 0)), count + sign)
+
+
+def _rollup_attrs(model):
+    attrs = {'date'}
+    for metric_model, amount_attr, null_attr in FINANCE_ROLLUP_METRICS.values():
+        if metric_model is model:
+            attrs.add(amount_attr)
+            if null_attr:
+                attrs.add(null_attr)
+    return attrs
+
+
+def _maintain_finance_rollup(model):
+    """Build after_insert/update/delete hooks that keep FinanceMonthlyRollup in step with a ledger."""
+    attrs = _rollup_attrs(model)
+
+    def current_values(target):
+        return {attr: getattr(target, attr) for attr in attrs}
+
+    def after_insert(mapper, connection, target):
+        deltas = {}
+        _rollup_deltas(model, current_values(target), 1, deltas)
+        FinanceMonthlyRollup.apply(connection, deltas)
+
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        new = current_values(target)
+        old = dict(new)
+        for attr in attrs:
+            history = state.attrs[attr].history
+            if history.deleted:
+                old[attr] = history.deleted[0]
+        if old == new:
+            return
+        deltas = {}
+        _rollup_deltas(model, old, -1, deltas)
+        _rollup_deltas(model, new, 1, deltas)
+        FinanceMonthlyRollup.apply(connection, deltas)
+
+    def after_delete(mapper, connection, target):
+        deltas = {}
+        _rollup_deltas(model, current_values(target), -1, deltas)
+        FinanceMonthlyRollup.apply(connection, deltas)
+
+    return after_insert, after_update, after_delete
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    """No-op 'set' listener, registered with active_history=True for its side effect."""
+
+
+for _model in dict.fromkeys(_m for _m, _a, _n in FINANCE_ROLLUP_METRICS.values()):
+    for _event, _hook in zip(('after_insert', 'after_update', 'after_delete'), _maintain_finance_rollup(_model)):
+        event.listen(_model, _event, _hook)
+    # Load the stored value before an expired attribute is overwritten, so
+    # after_update always sees what to take out of the rollup
+    for _attr in _rollup_attrs(_model):
+        event.listen(getattr(_model, _attr), 'set', _load_old_value, active_history=True)
+
+
+class SearchDocument(db.Model):
+    """Flattened, searchable text of one CRM record.
+
+    Mapper events keep one row per indexed record in step with its source
+    table. On SQLite the rows feed the ``search_index`` FTS5 table through
+    triggers; on PostgreSQL a generated ``tsvector`` column with a GIN index
+    is added to this table instead. See app.utils.search for querying.
+    """
+
+    __tablename__ = 'search_document'
+    __table_args__ = (
+        db.UniqueConstraint('entity', 'entity_id', name='uq_search_document_entity'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(32), nullable=False)
+    entity_id = db.Column(db.String(64), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+
+    @staticmethod
+    def tokens(value) -> list:
+        """Lowercased word tokens; emails, codes and phone numbers split on punctuation."""
+        return re.findall(r'\w+', str(value).lower()) if value is not None else []
+
+    @classmethod
+    def content_for(cls, values) -> str:
+        return ' '.join(token for value in values for token in cls.tokens(value))
+
+    @classmethod
+    def upsert(cls, connection, entity: str, entity_id, content: str) -> None:
+        table = cls.__table__
+        key = (table.c.entity == entity) & (table.c.entity_id == str(entity_id))
+        if connection.execute(update(table).where(key).values(content=content)).rowcount == 0:
+            connection.execute(table.insert().values(entity=entity, entity_id=str(entity_id), content=content))
+
+    @classmethod
+    def remove(cls, connection, entity: str, entity_id) -> None:
+        table = cls.__table__
+        connection.execute(table.delete().where((table.c.entity == entity) & (table.c.entity_id == str(entity_id))))
+
+    @classmethod
+    def reindex(cls, connection=None, entities=None, batch_size: int = 1000) -> dict:
+        """Rebuild the documents of the given entities (all by default); returns counts per entity."""
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        counts = {}
+        for entity in entities or SEARCH_ENTITIES:
+            model, fields = SEARCH_ENTITIES[entity]
+            pk = inspect(model).primary_key[0]
+            connection.execute(table.delete().where(table.c.entity == entity))
+            result = connection.execution_options(yield_per=batch_size)\
+                .execute(select(pk, *[getattr(model, field) for field in fields]))
+            counts[entity] = 0
+            for rows in result.partitions():
+                connection.execute(table.insert(), [
+                    {'entity': entity, 'entity_id': str(row[0]), 'content': cls.content_for(row[1:])}
+                    for row in rows
+                ])
+                counts[entity] += len(rows)
+        if connection.dialect.name == 'sqlite' and has_search_index(connection):
+            connection.execute(text("INSERT INTO search_index(search_index) VALUES('rebuild')"))
+        return counts
+
+    def __repr__(self):
+        return f'<SearchDocument {self.entity}:{self.entity_id}>'
+
+
+# Entity name -> (model, fields whose text is searchable)
+SEARCH_ENTITIES = {
+    'b2c_lead': (B2CLead, ('customer_name', 'contact_no', 'email', 'enquiry_id')),
+    'b2b_lead': (B2BLead, ('organization_name', 'organization_email', 't4h_spoc', 'sr_no',
+                           'location', 'org_poc_name_and_role')),
+    'customer': (Customer, ('customer_name', 'contact_no', 'email', 'customer_code')),
+    'employee': (Employee, ('name', 'contact_no', 'email', 'employee_code', 'designation')),
+    'channel_partner': (ChannelPartner, ('name', 'contact_no', 'email', 'partner_code')),
+    'expense': (Expense, ('expense_code', 'category', 'sub_category')),
+}
+
+# Full-text index structures that create_all cannot express, per dialect
+SEARCH_INDEX_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "content, content='search_document', content_rowid='id', prefix='2 3 4')",
+        "CREATE TRIGGER IF NOT EXISTS search_document_ai AFTER INSERT ON search_document BEGIN "
+        "INSERT INTO search_index(rowid, content) VALUES (new.id, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS search_document_ad AFTER DELETE ON search_document BEGIN "
+        "INSERT INTO search_index(search_index, rowid, content) VALUES ('delete', old.id, old.content); END",
+        "CREATE TRIGGER IF NOT EXISTS search_document_au AFTER UPDATE ON search_document BEGIN "
+        "INSERT INTO search_index(search_index, rowid, content) VALUES ('delete', old.id, old.content); "
+        "INSERT INTO search_index(rowid, content) VALUES (new.id, new.content); END",
+    ],
+    'postgresql': [
+        "ALTER TABLE search_document ADD COLUMN IF NOT EXISTS document tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED",
+        "CREATE INDEX IF NOT EXISTS idx_search_document_document ON search_document USING gin (document)",
+    ],
+}
+
+
+def has_search_index(connection) -> bool:
+    """Whether the SQLite FTS5 table exists (FTS5 may be missing from the SQLite build)."""
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+    ).first() is not None
+
+
+@event.listens_for(SearchDocument.__table__, 'after_create')
+def _create_search_index(table, connection, **kw):
+    for statement in SEARCH_INDEX_DDL.get(connection.dialect.name, []):
+        connection.execute(text(statement))
+
+
+@event.listens_for(SearchDocument.__table__, 'before_drop')
+def _drop_search_index(table, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text('DROP TABLE IF EXISTS search_index'))
+
+
+def _maintain_search_document(entity, model, fields):
+    """Build after_insert/update/delete hooks that keep an entity's SearchDocument current."""
+    pk = inspect(model).primary_key[0].key
+
+    def content(target):
+        return SearchDocument.content_for(getattr(target, field) for field in fields)
+
+    def after_insert(mapper, connection, target):
+        SearchDocument.upsert(connection, entity, getattr(target, pk), content(target))
+
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        old_pk = state.attrs[pk].history.deleted
+        if old_pk:
+            SearchDocument.remove(connection, entity, old_pk[0])
+        elif not any(state.attrs[field].history.has_changes() for field in fields):
+            return
+        SearchDocument.upsert(connection, entity, getattr(target, pk), content(target))
+
+    def after_delete(mapper, connection, target):
+        SearchDocument.remove(connection, entity, getattr(target, pk))
+
+    return after_insert, after_update, after_delete
+
+
+for _entity, (_model, _fields) in SEARCH_ENTITIES.items():
+    for _event, _hook in zip(('after_insert', 'after_update', 'after_delete'),
+                             _maintain_search_document(_entity, _model, _fields)):
+        event.listen(_model, _event, _hook)
+
+
+class ContactIndex(db.Model):
+    """Normalized phone numbers and emails of CRM records.
+
+    Phones are stored digits-only without the country code, emails
+    lowercased, and each value also reversed so "ends with" lookups become
+    indexed prefix ranges. Mapper events keep it in step with the source
+    tables; ``flask reindex-contacts`` rebuilds it.
+    """
+
+    __tablename__ = 'contact_index'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(32), nullable=False)
+    entity_id = db.Column(db.String(64), nullable=False)
+    kind = db.Column(db.String(8), nullable=False)  # 'phone' or 'email'
+    value = db.Column(db.String(120), nullable=False)
+    value_reversed = db.Column(db.String(120), nullable=False)
+
+    # Minimum digits for a partial phone lookup
+    MIN_PHONE_DIGITS = 4
+
+    @staticmethod
+    def entries_for(values, phone_fields, email_fields) -> list:
+        """(kind, value) pairs of a record's normalized contacts, from {field: raw value}."""
+        entries = []
+        for field in phone_fields:
+            value = normalize_phone(values.get(field))
+            if value:
+                entries.append(('phone', value))
+        for field in email_fields:
+            value = normalize_email(values.get(field))
+            if value:
+                entries.append(('email', value))
+        return list(dict.fromkeys(entries))
+
+    @classmethod
+    def replace(cls, connection, entity: str, entity_id, entries) -> None:
+        """Replace the index entries of one record."""
+        table = cls.__table__
+        connection.execute(table.delete().where((table.c.entity == entity) & (table.c.entity_id == str(entity_id))))
+        if entries:
+            connection.execute(table.insert(), [
+                {'entity': entity, 'entity_id': str(entity_id), 'kind': kind,
+                 'value': value[:120], 'value_reversed': value[::-1][:120]}
+                for kind, value in entries
+            ])
+
+    @classmethod
+    def lookup_condition(cls, query: str):
+        """Indexed filter for a phone or email query, or None if it is neither.
+
+        A full phone number or email matches by equality; a partial number
+        matches numbers that start or end with it.
+        """
+        email = normalize_email(query)
+        if email:
+            return (cls.kind == 'email') & (cls.value == email)
+        digits = normalize_phone(query)
+        if not digits or len(digits) < cls.MIN_PHONE_DIGITS:
+            return None
+        if len(digits) >= NATIONAL_NUMBER_LENGTH:
+            return (cls.kind == 'phone') & (cls.value == digits)
+        reversed_digits = digits[::-1]
+        return (cls.kind == 'phone') & db.or_(
+            (cls.value >= digits) & (cls.value < prefix_upper_bound(digits)),
+            (cls.value_reversed >= reversed_digits) & (cls.value_reversed < prefix_upper_bound(reversed_digits)),
+        )
+
+    @classmethod
+    def find(cls, query: str, limit: int = 50) -> list:
+        """(entity, entity_id) of records whose phone or email matches ``query``."""
+        condition = cls.lookup_condition(query)
+        if condition is None:
+            return []
+        rows = db.session.query(cls.entity, cls.entity_id).filter(condition)\
+            .distinct().order_by(cls.entity, cls.entity_id).limit(limit).all()
+        return [(entity, entity_id) for entity, entity_id in rows]
+
+    @classmethod
+    def reindex(cls, connection=None, batch_size: int = 1000) -> dict:
+        """Rebuild the whole index from the source tables; returns counts per entity."""
+        connection = connection or db.session.connection()
+        table = cls.__table__
+        connection.execute(table.delete())
+        counts = {}
+        for entity, (model, phone_fields, email_fields) in CONTACT_ENTITIES.items():
+            pk = inspect(model).primary_key[0]
+            columns = [getattr(model, field) for field in phone_fields + email_fields]
+            result = connection.execution_options(yield_per=batch_size).execute(select(pk, *columns))
+            counts[entity] = 0
+            for rows in result.partitions():
+                entries = []
+                for row in rows:
+                    values = dict(zip(phone_fields + email_fields, row[1:]))
+                    entries.extend(
+                        {'entity': entity, 'entity_id': str(row[0]), 'kind': kind,
+                         'value': value[:120], 'value_reversed': value[::-1][:120]}
+                        for kind, value in cls.entries_for(values, phone_fields, email_fields)
+                    )
+                if entries:
+                    connection.execute(table.insert(), entries)
+                counts[entity] += len(rows)
+        return counts
+
+    def __repr__(self):
+        return f'<ContactIndex {self.entity}:{self.entity_id} {self.kind}={self.value}>'
+
+
+Index('idx_contact_index_kind_value', ContactIndex.kind, ContactIndex.value)
+Index('idx_contact_index_kind_value_reversed', ContactIndex.kind, ContactIndex.value_reversed)
+Index('idx_contact_index_entity', ContactIndex.entity, ContactIndex.entity_id)
+
+
+# Entity name -> (model, phone fields, email fields)
+CONTACT_ENTITIES = {
+    'b2c_lead': (B2CLead, ('contact_no',), ('email',)),
+    'customer': (Customer, ('contact_no',), ('email',)),
+    'employee': (Employee, ('contact_no',), ('email',)),
+    'channel_partner': (ChannelPartner, ('contact_no',), ('email',)),
+    'camp': (Camp, ('phone_no',), ()),
+}
+
+
+def _maintain_contact_index(entity, model, phone_fields, email_fields):
+    """Build after_insert/update/delete hooks that keep an entity's ContactIndex rows current."""
+    pk = inspect(model).primary_key[0].key
+    fields = phone_fields + email_fields
+
+    def entries(target):
+        return ContactIndex.entries_for({field: getattr(target, field) for field in fields},
+                                        phone_fields, email_fields)
+
+    def after_insert(mapper, connection, target):
+        ContactIndex.replace(connection, entity, getattr(target, pk), entries(target))
+
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        old_pk = state.attrs[pk].history.deleted
+        if old_pk:
+            ContactIndex.replace(connection, entity, old_pk[0], [])
+        elif not any(state.attrs[field].history.has_changes() for field in fields):
+            return
+        ContactIndex.replace(connection, entity, getattr(target, pk), entries(target))
+
+    def after_delete(mapper, connection, target):
+        ContactIndex.replace(connection, entity, getattr(target, pk), [])
+
+    return after_insert, after_update, after_delete
+
+
+for _entity, (_model, _phone_fields, _email_fields) in CONTACT_ENTITIES.items():
+    for _event, _hook in zip(('after_insert', 'after_update', 'after_delete'),
+                             _maintain_contact_index(_entity, _model, _phone_fields, _email_fields)):
+        event.listen(_model, _event, _hook)
+
+
+def after_bulk_insert(connection, model, rows) -> None:
+    """Do for rows added with a bulk ``insert()`` what the mapper events do per object.
+
+    Bulk inserts skip the before_insert/after_insert hooks above, so this
+    advances the code and document number sequences past the highest values
+    inserted and writes the search documents, contact index entries and
+    finance rollups, one statement per table. ``rows`` are the inserted
+    mappings, with their primary keys and codes set.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+
+    for prefix, column in CODE_SEQUENCE_COLUMNS.items():
+        if column.class_ is model:
+            numbers = (CodeSequence.parse_code(prefix, row.get(column.key)) for row in rows)
+            highest = max((n for n in numbers if n is not None), default=None)
+            if highest is not None:
+                CodeSequence.claim(prefix, highest, connection)
+
+    for series, (_template, column, _width) in FINANCE_DOCUMENT_SERIES.items():
+        if column.class_ is model:
+            highest = {}
+            for row in rows:
+                parsed = DocumentSeries.parse_number(series, row.get(column.key))
+                if parsed:
+                    highest[parsed[0]] = max(highest.get(parsed[0], 0), parsed[1])
+            for fiscal_year, number in highest.items():
+                DocumentSeries.claim(series, fiscal_year, number, connection)
+
+    pk = inspect(model).primary_key[0].key
+    for entity, (search_model, fields) in SEARCH_ENTITIES.items():
+        if search_model is model:
+            connection.execute(SearchDocument.__table__.insert(), [
+                {'entity': entity, 'entity_id': str(row[pk]),
+                 'content': SearchDocument.content_for(row.get(field) for field in fields)}
+                for row in rows
+            ])
+
+    for entity, (contact_model, phone_fields, email_fields) in CONTACT_ENTITIES.items():
+        if contact_model is model:
+            entries = [
+                {'entity': entity, 'entity_id': str(row[pk]), 'kind': kind,
+                 'value': value[:120], 'value_reversed': value[::-1][:120]}
+                for row in rows
+                for kind, value in ContactIndex.entries_for(row, phone_fields, email_fields)
+            ]
+            if entries:
+                connection.execute(ContactIndex.__table__.insert(), entries)
+
+    deltas = {}
+    for row in rows:
+        _rollup_deltas(model, row, 1, deltas)
+    FinanceMonthlyRollup.apply(connection, deltas)
+
+
+class ExportJob(db.Model, TimestampMixin):
+    """An export run outside the request cycle (see app.utils.export_jobs).
+
+    The finished file is kept under ``UPLOAD_FOLDER/exports`` (CSV gzipped,
+    XLSX as written) until it expires.
+    """
+
+    __tablename__ = 'export_job'
+
+    id = db.Column(db.Integer, primary_key=True)
+    export_name = db.Column(db.String(50), nullable=False)
+    export_format = db.Column(db.String(10), nullable=False)
+    params = db.Column(db.Text, nullable=True)  # JSON string of filter arguments
+    status = db.Column(db.Enum(ExportJobStatus), nullable=False, default=ExportJobStatus.PENDING, index=True)
+    total_rows = db.Column(db.Integer, nullable=True)
+    rows_written = db.Column(db.Integer, nullable=False, default=0)
+    file_path = db.Column(db.String(255), nullable=True)  # File name under UPLOAD_FOLDER/exports
+    file_size = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    requested_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+
+    # Relationships
+    requester = db.relationship('User', backref=db.backref('export_jobs', lazy='dynamic'))
+
+    @property
+    def filter_args(self) -> dict:
+        """Parse params JSON."""
+        if self.params:
+            try:
+                return json.loads(self.params)
+            except (json.JSONDecodeError, TypeError):
+                return {}
+        return {}
+
+    @filter_args.setter
+    def filter_args(self, value):
+        """Set params as JSON."""
+        self.params = json.dumps(value) if value else None
+
+    @property
+    def progress(self) -> int:
+        """Percentage of rows written, 0-100."""
+        if self.status == ExportJobStatus.COMPLETED:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, self.rows_written * 100 // self.total_rows)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (ExportJobStatus.COMPLETED, ExportJobStatus.FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'export': self.export_name,
+            'format': self.export_format,
+            'status': self.status.value,
+            'progress': self.progress,
+            'rows_written': self.rows_written,
+            'total_rows': self.total_rows,
+            'file_size': self.file_size,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f'<ExportJob {self.id}: {self.export_name}.{self.export_format} {self.status.value}>'
+
+
+# Indexes for ExportJob
+Index('idx_export_job_requested_by_created_at', ExportJob.requested_by, ExportJob.created_at)
+
+
+class FollowUpDigest(db.Model):
+    """One owner's follow-up agenda for a day, precomputed by ``flask follow-up-digest``.
+
+    The counts record the morning's section sizes; ``items`` keeps the
+    agenda items (see app.follow_ups.agenda) as JSON for the downloadable
+    digest.
+    """
+
+    __tablename__ = 'follow_up_digest'
+
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    digest_date = db.Column(db.Date, primary_key=True)
+    overdue = db.Column(db.Integer, nullable=False, default=0)
+    due_today = db.Column(db.Integer, nullable=False, default=0)
+    due_tomorrow = db.Column(db.Integer, nullable=False, default=0)
+    this_week = db.Column(db.Integer, nullable=False, default=0)
+    items = db.Column(db.Text, nullable=True)  # JSON: {section: [agenda item, ...]}
+    generated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Relationships
+    owner = db.relationship('User')
+
+    @property
+    def sections(self) -> dict:
+        """Parse items JSON."""
+        if self.items:
+            try:
+                return json.loads(self.items)
+            except (json.JSONDecodeError, TypeError):
+                return {}
+        return {}
+
+    def __repr__(self):
+        return f'<FollowUpDigest {self.owner_id} {self.digest_date}>'
+
@@ -7,6 +7,7 @@ from app import db, require_module_access
 from app.services import bp
 from app.services.forms import ServiceForm
 from app.models import Service
+from app.utils.pagination import keyset_paginate
 
 
 @bp.route('/')
@@ -14,8 +15,8 @@ from app.models import Service
 @require_module_access('services')
 def index():
     """Display all services."""
-    services = Service.query.order_by(Service.created_at.desc()).all()
-    return render_template('services/index.html', title='Services', services=services)
+    page = keyset_paginate(Service.query, (Service.created_at.desc(), Service.id.desc()), tables=('service',))
+    return render_template('services/index.html', title='Services', services=page.items, page=page)
 
 
 @bp.route('/add', methods=['GET', 'POST'])
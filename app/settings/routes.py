@@ -1,4 +1,6 @@
-"""Settings routes."""
+﻿"""Settings routes."""
+
+import os
 
 from flask import render_template, jsonify, flash, redirect, url_for, request
 from flask_login import login_required, current_user
@@ -9,9 +11,11 @@ from app.models import (
     Employee, Expense, ChannelPartner, Setting, AuditLog, Service,
     Meeting, Booking, Attendance, Leave, Task, PerformanceMetric,
     Payment, Camp, CampDefault, Sale, Purchase, PaymentReceived,
-    PaymentMade, ChartOfAccount
+    PaymentMade, ChartOfAccount, FinanceMonthlyRollup, SearchDocument, ContactIndex,
+    CodeSequence, DocumentSeries, ExportJob, FollowUpDigest
 )
 from app.settings import bp
+from app.utils.export_jobs import artifact_path
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SelectField, BooleanField, SubmitField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError
@@ -802,12 +806,31 @@ def delete_all_data():
         # Settings (dropdown data)
         Setting.query.delete()
 
+        # Derived tables, maintained by mapper events (which bulk deletes skip)
+        # or by the daily follow-up digest job
+        FinanceMonthlyRollup.query.delete()
+        SearchDocument.query.delete()
+        ContactIndex.query.delete()
+        FollowUpDigest.query.delete()
+
+        # Code and document number counters, so numbering starts again from 001
+        CodeSequence.query.delete()
+        DocumentSeries.query.delete()
+
+        # Export jobs (reference User); their files are removed once committed
+        export_files = [artifact_path(job) for job in ExportJob.query.filter(ExportJob.file_path.isnot(None))]
+        ExportJob.query.delete()
+
         # Delete all users except admin users
         User.query.filter(User.role != UserRole.ADMIN).delete()
 
         # Commit the changes
         db.session.commit()
 
+        for path in export_files:
+            if os.path.exists(path):
+                os.remove(path)
+
         return jsonify({
             'success': True,
             'message': 'All application data and non-admin user profiles have been successfully deleted.'
@@ -0,0 +1,140 @@
+// Data-grid widget for the /api/grid/<name> endpoints.
+// Filtering, sorting and paging all happen on the server; the browser only
+// ever receives the rows currently on screen.
+(function () {
+    'use strict';
+
+    function formatCell(value) {
+        if (value === null || value === undefined || value === '') {
+            return '-';
+        }
+        if (value === true || value === false) {
+            return value ? 'Yes' : 'No';
+        }
+        if (typeof value === 'number') {
+            return value.toLocaleString('en-IN', {maximumFractionDigits: 2});
+        }
+        return String(value);
+    }
+
+    function initGrid(container) {
+        const form = container.querySelector('.data-grid-filters');
+        const results = container.querySelector('.data-grid-results');
+        const body = results.querySelector('tbody');
+        const status = results.querySelector('.data-grid-status');
+        const headers = results.querySelectorAll('th[data-column]');
+        const replaced = container.dataset.gridReplace ? document.querySelector(container.dataset.gridReplace) : null;
+        const state = {sort: [], offset: 0, limit: 25};
+
+        function params() {
+            const query = new URLSearchParams();
+            new FormData(form).forEach(function (value, key) {
+                if (value) {
+                    query.append(key, value);
+                }
+            });
+            if (state.sort.length) {
+                query.set('sort', state.sort.join(','));
+            }
+            query.set('offset', state.offset);
+            query.set('limit', state.limit);
+            return query;
+        }
+
+        function render(data) {
+            body.innerHTML = '';
+            data.rows.forEach(function (row, i) {
+                const tr = document.createElement('tr');
+                row.forEach(function (value) {
+                    const td = document.createElement('td');
+                    td.textContent = formatCell(value);
+                    tr.appendChild(td);
+                });
+                const action = document.createElement('td');
+                if (data.links && data.links[i]) {
+                    const link = document.createElement('a');
+                    link.href = data.links[i];
+                    link.className = 'btn btn-sm btn-info';
+                    link.title = 'View';
+                    link.innerHTML = '<i class="bi bi-eye"></i>';
+                    action.appendChild(link);
+                }
+                tr.appendChild(action);
+                body.appendChild(tr);
+            });
+
+            const first = data.filtered ? data.offset + 1 : 0;
+            status.textContent = 'Showing ' + first + '-' + (data.offset + data.rows.length) +
+                ' of ' + data.filtered + (data.filtered !== data.total ? ' (filtered from ' + data.total + ')' : '');
+            results.querySelector('[data-grid-page="-1"]').disabled = data.offset === 0;
+            results.querySelector('[data-grid-page="1"]').disabled = data.offset + data.rows.length >= data.filtered;
+
+            headers.forEach(function (th) {
+                const column = th.dataset.column;
+                th.classList.toggle('text-primary', state.sort.indexOf(column) >= 0 || state.sort.indexOf('-' + column) >= 0);
+                th.dataset.sort = state.sort.indexOf(column) >= 0 ? 'asc' : state.sort.indexOf('-' + column) >= 0 ? 'desc' : '';
+            });
+        }
+
+        function load() {
+            fetch(container.dataset.gridUrl + '?' + params().toString(), {headers: {'Accept': 'application/json'}})
+                .then(function (response) {
+                    return response.json().then(function (data) {
+                        if (!response.ok) {
+                            throw new Error(data.message || response.statusText);
+                        }
+                        return data;
+                    });
+                })
+                .then(function (data) {
+                    state.limit = data.limit;
+                    render(data);
+                    results.classList.remove('d-none');
+                    if (replaced) {
+                        replaced.classList.add('d-none');
+                    }
+                })
+                .catch(function (error) {
+                    status.textContent = 'Could not load results: ' + error.message;
+                    results.classList.remove('d-none');
+                });
+        }
+
+        form.addEventListener('submit', function (e) {
+            e.preventDefault();
+            state.offset = 0;
+            load();
+        });
+
+        form.addEventListener('reset', function () {
+            state.sort = [];
+            state.offset = 0;
+            results.classList.add('d-none');
+            if (replaced) {
+                replaced.classList.remove('d-none');
+            }
+        });
+
+        headers.forEach(function (th) {
+            th.addEventListener('click', function (e) {
+                const column = th.dataset.column;
+                const next = th.dataset.sort === 'asc' ? '-' + column : column;
+                const others = state.sort.filter(function (key) {
+                    return key !== column && key !== '-' + column;
+                });
+                state.sort = e.shiftKey ? others.concat([next]) : [next];
+                state.offset = 0;
+                load();
+            });
+        });
+
+        results.querySelectorAll('[data-grid-page]').forEach(function (button) {
+            button.addEventListener('click', function () {
+                state.offset = Math.max(0, state.offset + parseInt(button.dataset.gridPage, 10) * state.limit);
+                load();
+            });
+        });
+    }
+
+    document.querySelectorAll('.data-grid').forEach(initGrid);
+})();
@@ -0,0 +1,204 @@
+"""Query result cache keyed by table versions.
+
+Every cached result is stored under the versions of the tables it reads.
+Session events record the tables a transaction writes and, once it commits,
+bump their versions (in the ``table_version`` table) in a separate short
+transaction, so writers never queue on each other's version rows. A commit by
+any worker then changes the key and the stale entry is simply never hit
+again. A bump that fails is retried before versions are next read, and until
+it succeeds this process drops what it cached for those tables. Eviction is
+a bounded LRU.
+
+Cached values are shared between requests and threads: only cache plain data
+(numbers, dicts, lists of tuples), never ORM instances.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app import db
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+# Counter and job tables change constantly and are never read through the cache
+UNTRACKED_TABLES = {'table_version', 'code_sequence', 'document_series', 'export_job'}
+
+
+class QueryCache:
+    """Thread-safe bounded LRU mapping."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def discard(self, predicate) -> None:
+        """Drop every entry whose key matches ``predicate``."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+query_cache = QueryCache()
+
+# Tables committed to whose version bump failed, retried by the next bump or read
+_unbumped = set()
+_unbumped_lock = threading.Lock()
+
+
+def _pending_tables(session) -> set:
+    """Tables written by the session's current, uncommitted transaction."""
+    return session.info.setdefault('changed_tables', set())
+
+
+def _unflushed_tables(session) -> set:
+    """Tables of objects added, changed or deleted but not flushed yet."""
+    return {obj.__table__.name for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+            if hasattr(obj, '__table__')}
+
+
+def table_versions(tables) -> tuple:
+    """Return ((table, version), ...) for the given tables.
+
+    All versions are read with one query and memoized for the rest of the
+    request; the memo is dropped whenever this session commits or rolls back.
+    """
+    from app.models import TableVersion
+
+    versions = g.get('table_versions') if has_app_context() else None
+    if versions is None:
+        if _unbumped:
+            _bump_versions(db.session().get_bind(), ())
+        versions = TableVersion.snapshot()
+        if has_app_context():
+            g.table_versions = versions
+    return tuple((name, versions.get(name, 0)) for name in sorted(tables))
+
+
+def cached_query(name: str, tables, compute, *args):
+    """Return ``compute(*args)``, cached under the current versions of ``tables``.
+
+    Results are not cached while the current transaction has uncommitted
+    writes to any of ``tables``; they are computed directly instead.
+    """
+    session = db.session()
+    if (_pending_tables(session) | _unflushed_tables(session)) & set(tables):
+        return compute(*args)
+
+    key = (name, args, table_versions(tables))
+    value = query_cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute(*args)
+        query_cache.set(key, value)
+    return value
+
+
+def cached(name: str, tables):
+    """Decorator form of :func:`cached_query` for functions with hashable arguments."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args):
+            return cached_query(name, tables, f, *args)
+        wrapper.uncached = f
+        return wrapper
+    return decorator
+
+
+def mark_tables_changed(session, *table_names) -> None:
+    """Record writes that bypass the ORM unit of work; versions are bumped on commit."""
+    _pending_tables(session).update(set(table_names) - UNTRACKED_TABLES)
+
+
+def _after_flush(session, flush_context):
+    names = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is not None and (obj not in session.dirty or session.is_modified(obj)):
+            names.add(table.name)
+    mark_tables_changed(session, *names)
+
+
+def _on_orm_execute(orm_execute_state):
+    # Query.update()/delete() and bulk insert()/update() mappings skip the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            mark_tables_changed(orm_execute_state.session, mapper.local_table.name)
+
+
+def _bump_versions(bind, names) -> None:
+    """Bump ``names`` and any earlier failed bumps in a transaction of their own."""
+    from app.models import TableVersion
+
+    with _unbumped_lock:
+        names = set(names) | _unbumped
+        _unbumped.clear()
+    if not names:
+        return
+    try:
+        with bind.begin() as connection:
+            TableVersion.bump(connection, names)
+    except SQLAlchemyError:
+        logger.exception('Could not bump table versions of %s; will retry', ', '.join(sorted(names)))
+        with _unbumped_lock:
+            _unbumped.update(names)
+        # The data is committed: results cached here before it must not be served
+        query_cache.discard(lambda key: any(name in names for name, _ in key[2]))
+
+
+def _bump_committed(session):
+    names = session.info.pop('changed_tables', None)
+    if names or _unbumped:
+        _bump_versions(session.get_bind(), names or ())
+    _end_transaction(session)
+
+
+def _end_transaction(session):
+    session.info.pop('changed_tables', None)
+    if has_app_context():
+        g.pop('table_versions', None)
+
+
+def register_cache_events(app):
+    """Size the cache from config and hook version bumps into the session."""
+    query_cache.maxsize = app.config.get('QUERY_CACHE_SIZE', query_cache.maxsize)
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'do_orm_execute', _on_orm_execute)
+        event.listen(Session, 'after_commit', _bump_committed)
+        event.listen(Session, 'after_rollback', _end_transaction)
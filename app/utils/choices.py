@@ -0,0 +1,71 @@
+"""Cached option lists for form select fields.
+
+Each loader selects only the columns a dropdown needs and returns a tuple of
+plain tuples, cached until its tables change (see app.utils.cache); settings
+groups come from the setting registry (app.utils.setting_registry). Callers
+prepend their own placeholder option, e.g.
+``[('', 'Select Source')] + list(setting_options('Source'))``.
+"""
+
+from sqlalchemy import func
+
+from app import db
+from app.models import Service, Employee, Booking, Customer, B2CLead, Sale, Purchase
+from app.utils.cache import cached
+from app.utils.setting_registry import settings_registry
+
+
+def setting_options(group: str) -> tuple:
+    """(key, value) pairs of the active options in a settings group."""
+    return tuple((option.key, option.value) for option in settings_registry.options(group))
+
+
+@cached('choices.service_options', ('service',))
+def service_options() -> tuple:
+    """(id, name) pairs of all services, ordered by name."""
+    rows = db.session.query(Service.id, Service.name).order_by(Service.name).all()
+    return tuple((service_id, name) for service_id, name in rows)
+
+
+@cached('choices.employee_options', ('employee',))
+def employee_options() -> tuple:
+    """(id, name, employee_code) of all employees, ordered by name."""
+    rows = db.session.query(Employee.id, Employee.name, Employee.employee_code)\
+        .order_by(Employee.name).all()
+    return tuple(tuple(row) for row in rows)
+
+
+@cached('choices.booking_options', ('booking',))
+def booking_options() -> tuple:
+    """(id, booking_code, customer_name) of all bookings."""
+    rows = db.session.query(Booking.id, Booking.booking_code, Booking.customer_name)\
+        .order_by(Booking.id).all()
+    return tuple(tuple(row) for row in rows)
+
+
+@cached('choices.customer_name_choices', ('customer', 'b2c_lead'))
+def customer_name_choices() -> tuple:
+    """Customer name choices: customers first, then converted B2C leads."""
+    customers = db.session.query(Customer.customer_name, Customer.customer_code)\
+        .order_by(Customer.customer_name).all()
+    converted_leads = db.session.query(B2CLead.customer_name, B2CLead.enquiry_id)\
+        .filter(func.lower(B2CLead.status) == 'converted')\
+        .order_by(B2CLead.customer_name).all()
+    return tuple(
+        [(name, f"{name} ({code})") for name, code in customers] +
+        [(name, f"{name} ({enquiry_id} - Converted Lead)") for name, enquiry_id in converted_leads]
+    )
+
+
+@cached('choices.sale_invoice_choices', ('sale',))
+def sale_invoice_choices() -> tuple:
+    """Invoice choices for all sales, newest first."""
+    rows = db.session.query(Sale.invoice_number, Sale.customer_name).order_by(Sale.date.desc()).all()
+    return tuple((number, f"{number} - {customer}") for number, customer in rows)
+
+
+@cached('choices.purchase_bill_choices', ('purchase',))
+def purchase_bill_choices() -> tuple:
+    """Bill choices for all purchases, newest first."""
+    rows = db.session.query(Purchase.bill_number, Purchase.vendor_name).order_by(Purchase.date.desc()).all()
+    return tuple((number, f"{number} - {vendor}") for number, vendor in rows)
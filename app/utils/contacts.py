@@ -0,0 +1,36 @@
+"""Normalization of phone numbers and email addresses for contact matching."""
+
+import re
+from typing import Optional
+
+# Country code stripped from phone numbers so local and international forms match
+DEFAULT_COUNTRY_CODE = '91'
+NATIONAL_NUMBER_LENGTH = 10
+
+
+def normalize_phone(value) -> Optional[str]:
+    """Digits only, without the country code or trunk prefix.
+
+    '+91 98765-43210', '0091 9876543210', '09876543210' and '9876543210' all
+    normalize to '9876543210'. Returns None when there are no digits.
+    """
+    digits = re.sub(r'\D', '', str(value or ''))
+    for prefix in ('00' + DEFAULT_COUNTRY_CODE, DEFAULT_COUNTRY_CODE, '0'):
+        if len(digits) == NATIONAL_NUMBER_LENGTH + len(prefix) and digits.startswith(prefix):
+            return digits[len(prefix):]
+    return digits or None
+
+
+def normalize_email(value) -> Optional[str]:
+    """Trimmed, lowercased email address; None when it is not an address."""
+    value = str(value or '').strip().lower()
+    return value if '@' in value else None
+
+
+def prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``.
+
+    ``prefix <= column < prefix_upper_bound(prefix)`` is an index range scan,
+    unlike ``column LIKE 'prefix%'`` which SQLite only indexes under NOCASE.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
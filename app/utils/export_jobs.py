@@ -0,0 +1,174 @@
+"""Background export jobs.
+
+Large exports are queued as :class:`~app.models.ExportJob` rows and written
+to ``UPLOAD_FOLDER/exports`` outside the request cycle, so the web worker
+that received the request is free again immediately. Jobs run on a small
+thread pool inside each web process (``EXPORT_JOB_WORKERS``), or, with that
+set to 0, on a separate ``flask export-worker`` process. A job is claimed
+with a conditional UPDATE, so it runs once however many workers poll.
+
+Progress is committed after every batch; finished files are deleted after
+``EXPORT_JOB_RETENTION_DAYS``. A running job that has made no progress for
+``EXPORT_JOB_TIMEOUT_MINUTES`` lost its worker (a crashed or restarted
+process) and is marked failed, so it can be started again.
+"""
+
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from app import db
+from app.models import ExportJob, ExportJobStatus
+from app.utils.exports import EXPORTS, EXPORT_FORMATS
+
+EXPORT_SUBFOLDER = 'exports'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config['EXPORT_JOB_WORKERS'],
+                                           thread_name_prefix='export-job')
+        return _executor
+
+
+def export_folder(app=None) -> str:
+    """Absolute path of the folder holding export files, created if missing."""
+    app = app or current_app
+    folder = os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], EXPORT_SUBFOLDER))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def artifact_path(job: ExportJob) -> str:
+    """Absolute path of a job's file."""
+    return os.path.join(export_folder(), os.path.basename(job.file_path))
+
+
+def enqueue_export(name: str, export_format: str, args: dict, user_id: int) -> ExportJob:
+    """Queue an export and, if this process runs workers, start it in the background."""
+    export = EXPORTS.get(name)
+    if export is None:
+        raise ValueError(f'Unknown export: {name}')
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Unsupported export format: {export_format}')
+    # Invalid filters fail here, not in the worker
+    export.statement(args)
+
+    fail_stale_jobs()
+    job = ExportJob(export_name=name, export_format=export_format, requested_by=user_id)
+    job.filter_args = args
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    if app.config.get('EXPORT_JOB_WORKERS', 0) > 0:
+        _get_executor(app).submit(_run_in_app_context, app, job.id)
+    return job
+
+
+def _run_in_app_context(app, job_id):
+    with app.app_context():
+        run_export_job(job_id)
+
+
+def claim_job(job_id: int) -> bool:
+    """Mark a pending job as running; False if another worker got there first."""
+    claimed = db.session.execute(
+        update(ExportJob)
+        .where(ExportJob.id == job_id, ExportJob.status == ExportJobStatus.PENDING)
+        .values(status=ExportJobStatus.RUNNING, started_at=datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    return claimed == 1
+
+
+def run_export_job(job_id: int) -> bool:
+    """Run a pending job to completion; returns False if it was already taken."""
+    if not claim_job(job_id):
+        return False
+
+    job = db.session.get(ExportJob, job_id)
+    export = EXPORTS.get(job.export_name)
+    extension = 'csv.gz' if job.export_format == 'csv' else job.export_format
+    # Unguessable name: the upload folder may be served as static files
+    filename = f'{job.export_name}-{uuid.uuid4().hex}.{extension}'
+    path = os.path.join(export_folder(), filename)
+
+    def on_batch(row_count):
+        job.rows_written += row_count
+        db.session.commit()
+
+    try:
+        if export is None:
+            raise ValueError(f'Unknown export: {job.export_name}')
+        args = job.filter_args
+        job.total_rows = export.count(args)
+        db.session.commit()
+
+        export.write(args, job.export_format, path, on_batch)
+
+        job.file_path = filename
+        job.file_size = os.path.getsize(path)
+        job.status = ExportJobStatus.COMPLETED
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('Export job %s failed', job_id)
+        if os.path.exists(path):
+            os.remove(path)
+        job = db.session.get(ExportJob, job_id)
+        job.status = ExportJobStatus.FAILED
+        job.error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def fail_stale_jobs(minutes=None) -> int:
+    """Fail running jobs with no progress for ``minutes`` (default EXPORT_JOB_TIMEOUT_MINUTES).
+
+    Progress commits touch ``updated_at``, so this only catches jobs whose
+    worker died. The caller commits; returns how many jobs were failed.
+    """
+    minutes = current_app.config['EXPORT_JOB_TIMEOUT_MINUTES'] if minutes is None else minutes
+    cutoff = datetime.utcnow() - timedelta(minutes=minutes)
+    return db.session.execute(
+        update(ExportJob)
+        .where(ExportJob.status == ExportJobStatus.RUNNING, ExportJob.updated_at < cutoff)
+        .values(status=ExportJobStatus.FAILED, finished_at=datetime.utcnow(),
+                error='The export worker stopped before the job finished. Please start the export again.')
+    ).rowcount
+
+
+def run_pending_jobs(limit=None) -> int:
+    """Run queued jobs, oldest first; returns how many this call ran."""
+    pending = db.session.query(ExportJob.id)\
+        .filter(ExportJob.status == ExportJobStatus.PENDING)\
+        .order_by(ExportJob.created_at, ExportJob.id).limit(limit).all()
+    db.session.commit()
+    return sum(1 for (job_id,) in pending if run_export_job(job_id))
+
+
+def purge_expired_jobs(days=None) -> int:
+    """Delete finished jobs older than ``days`` (default EXPORT_JOB_RETENTION_DAYS) and their files."""
+    days = current_app.config['EXPORT_JOB_RETENTION_DAYS'] if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    expired = ExportJob.query.filter(
+        ExportJob.status.in_([ExportJobStatus.COMPLETED, ExportJobStatus.FAILED]),
+        ExportJob.finished_at < cutoff,
+    ).all()
+    for job in expired:
+        if job.file_path and os.path.exists(artifact_path(job)):
+            os.remove(artifact_path(job))
+        db.session.delete(job)
+    db.session.commit()
+    return len(expired)
@@ -0,0 +1,239 @@
+"""Streaming CSV/XLSX export engine.
+
+Blueprints describe an export once, with :class:`Export`, and register it
+with :func:`register_export`; ``/api/export/<name>?format=csv|xlsx`` then
+serves it to users with access to the export's module. Only the listed
+columns are selected and rows are fetched in keyset batches, so memory use
+stays bounded whatever the row count: CSV is streamed to the client batch by
+batch, and XLSX is written with openpyxl's write-only workbook (rows go
+straight to a temporary file) and streamed from disk once complete.
+
+Filters use the same request arguments as the data grids (app.utils.grid):
+``<name>=value`` and ``<name>_from``/``<name>_to`` for ranges.
+"""
+
+import csv
+import enum
+import gzip
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+
+from flask import Response, stream_with_context
+from sqlalchemy import func, inspect, select
+
+from app import db
+from app.utils.grid import FILTER_KINDS, filter_conditions
+from app.utils.pagination import seek_condition, seek_order, split_order
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+EXPORT_BATCH_SIZE = 1000
+STREAM_CHUNK_SIZE = 64 * 1024
+
+XLSX_DATE_FORMAT = 'DD-MM-YYYY'
+XLSX_DATETIME_FORMAT = 'DD-MM-YYYY HH:MM'
+
+# Registered exports by name
+EXPORTS = {}
+
+
+def csv_value(value):
+    """Text form of a value for CSV files."""
+    if value is None:
+        return ''
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.strftime('%d-%m-%Y %H:%M')
+    if isinstance(value, date):
+        return value.strftime('%d-%m-%Y')
+    if isinstance(value, Decimal):
+        return f'{value:.2f}'
+    return value
+
+
+def xlsx_value(value):
+    """Cell value for XLSX files; dates and numbers keep their type."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def iter_file(path, opener=open, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the contents of a file in chunks; pass ``opener=gzip.open`` to decompress."""
+    with opener(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class ExportColumn:
+    """One exported column: a header label, a SQL expression and an optional formatter."""
+
+    def __init__(self, label, expression, formatter=None):
+        self.label = label
+        self.expression = expression
+        self.formatter = formatter
+
+
+class Export:
+    """A registered export: columns, joins, filters and sort order over one model."""
+
+    def __init__(self, name, module, model, columns, joins=(), filters=None,
+                 order_by=None, filename=None, title=None):
+        """
+        ``columns`` is a list of :class:`ExportColumn` or (label, expression)
+        pairs. ``joins`` lists (target, onclause) outer joins that columns from
+        related tables need. ``filters`` maps request argument names to
+        (kind, column) with kind one of FILTER_KINDS.
+        """
+        self.name = name
+        self.module = module
+        self.model = model
+        self.columns = [column if isinstance(column, ExportColumn) else ExportColumn(*column)
+                        for column in columns]
+        self.joins = tuple(joins)
+        self.filters = dict(filters or {})
+        self.order_by = tuple(order_by) if order_by is not None else (model.created_at.desc(),)
+        self.primary_key = inspect(model).primary_key[0]
+        self.filename = filename or name
+        self.title = title or name.replace('_', ' ').title()
+
+        for argument, (kind, _) in self.filters.items():
+            if kind not in FILTER_KINDS:
+                raise ValueError(f'Invalid filter kind {kind!r} for export {name}.{argument}')
+
+    def statement(self, args):
+        """SELECT of the export columns, filtered by ``args``."""
+        statement = select(*[column.expression for column in self.columns]).select_from(self.model)
+        for target, onclause in self.joins:
+            statement = statement.outerjoin(target, onclause)
+        return statement.where(*filter_conditions(self.filters, args))
+
+    def count(self, args) -> int:
+        """Number of rows the export will write."""
+        return db.session.scalar(select(func.count()).select_from(self.statement(args).subquery()))
+
+    def batches(self, args, on_batch=None):
+        """Yield lists of result rows, EXPORT_BATCH_SIZE at a time.
+
+        Each batch is its own short query that seeks past the sort key of the
+        previous batch (see app.utils.pagination), so no cursor or read lock
+        is held between batches and callers may commit in between. Sort key
+        columns must not be NULL. ``on_batch(row_count)`` is called once each
+        batch has been consumed.
+        """
+        keys = split_order(self.order_by + (self.primary_key.desc(),))
+        width = len(self.columns)
+        statement = self.statement(args).add_columns(*[column for column, _ in keys])\
+            .order_by(*seek_order(keys, forward=True)).limit(EXPORT_BATCH_SIZE)
+
+        position = None
+        while True:
+            page = statement if position is None else statement.where(seek_condition(keys, position, forward=True))
+            rows = db.session.execute(page).all()
+            if not rows:
+                return
+            yield [row[:width] for row in rows]
+            if on_batch:
+                on_batch(len(rows))
+            if len(rows) < EXPORT_BATCH_SIZE:
+                return
+            position = list(rows[-1][width:])
+
+    def _values(self, row, convert):
+        return [convert(column.formatter(value) if column.formatter else value)
+                for column, value in zip(self.columns, row)]
+
+    def iter_csv(self, args, on_batch=None):
+        """Yield the CSV file in chunks: the header row, then one chunk per batch."""
+        # One reusable buffer: each chunk is written, yielded and discarded
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            data = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return data
+
+        writer.writerow([column.label for column in self.columns])
+        yield flush()
+        for batch in self.batches(args, on_batch):
+            writer.writerows(self._values(row, csv_value) for row in batch)
+            yield flush()
+
+    def write_xlsx(self, args, path, on_batch=None) -> None:
+        """Write the export as a workbook at ``path``, one row at a time."""
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(self.title[:31])
+        header = []
+        for column in self.columns:
+            cell = WriteOnlyCell(sheet, value=column.label)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        sheet.append(header)
+        for batch in self.batches(args, on_batch):
+            for row in batch:
+                values = self._values(row, xlsx_value)
+                for i, value in enumerate(values):
+                    if isinstance(value, date):
+                        cell = WriteOnlyCell(sheet, value=value)
+                        cell.number_format = XLSX_DATETIME_FORMAT if isinstance(value, datetime) else XLSX_DATE_FORMAT
+                        values[i] = cell
+                sheet.append(values)
+        workbook.save(path)
+
+    def write(self, args, export_format, path, on_batch=None) -> None:
+        """Write the export to a file: gzipped CSV, or XLSX (already compressed)."""
+        if export_format == 'xlsx':
+            self.write_xlsx(args, path, on_batch)
+        else:
+            with gzip.open(path, 'wt', encoding='utf-8', newline='') as f:
+                for chunk in self.iter_csv(args, on_batch):
+                    f.write(chunk)
+
+    def iter_xlsx(self, args):
+        """Write the workbook to a temporary file, then yield it in chunks."""
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        try:
+            self.write_xlsx(args, path)
+            yield from iter_file(path)
+        finally:
+            os.remove(path)
+
+    def response(self, args, export_format='csv') -> Response:
+        """Streamed download of this export in ``export_format``."""
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'Unsupported export format: {export_format}')
+        # Build the statement now so invalid filters fail before streaming starts
+        self.statement(args)
+        chunks = self.iter_xlsx(args) if export_format == 'xlsx' else self.iter_csv(args)
+        return Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={self.filename}.{export_format}'}
+        )
+
+
+def register_export(export: Export) -> Export:
+    """Make an export available under its name."""
+    if export.name in EXPORTS:
+        raise ValueError(f'Export {export.name!r} is already registered')
+    EXPORTS[export.name] = export
+    return export
@@ -84,6 +84,9 @@ def get_dropdown_value(key, group=None):
     """
     Get the display value for a dropdown key from the Setting table.
     
+    Values come from the in-process setting registry, so rendering a long
+    list costs no query per cell.
+    
     Args:
         key: The key to look up
         group: Optional group name to narrow the search
@@ -94,23 +97,17 @@ def get_dropdown_value(key, group=None):
     if not key:
         return '-'
     
-    from app.models import Setting
+    from app.utils.setting_registry import settings_registry
     
     try:
-        if group:
-            setting = Setting.query.filter_by(group=group, key=str(key)).first()
-        else:
-            # Search across all groups if no group specified
-            setting = Setting.query.filter_by(key=str(key)).first()
-        
-        if setting:
-            return setting.value
-        else:
-            # Fallback: return key with underscores replaced by spaces
-            return str(key).replace('_', ' ')
+        value = settings_registry.value(str(key), group)
     except Exception:
         # If any error occurs (like database not initialized), return the key
+        value = None
+    if value is None:
+        # Fallback: return key with underscores replaced by spaces
         return str(key).replace('_', ' ')
+    return value
 
 
 def register_filters(app):
@@ -0,0 +1,41 @@
+"""Fiscal year helpers (April to March financial year)."""
+
+import re
+from datetime import date
+from typing import Optional, Tuple
+
+FISCAL_YEAR_START_MONTH = 4
+
+
+def fiscal_year_of(value: Optional[date] = None) -> int:
+    """Return the starting calendar year of the fiscal year containing a date."""
+    value = value or date.today()
+    return value.year if value.month >= FISCAL_YEAR_START_MONTH else value.year - 1
+
+
+def fiscal_year_label(start_year: int, short: bool = False) -> str:
+    """Format a fiscal year, e.g. 2025 -> '2025-26' (or '25-26' when short)."""
+    end = (start_year + 1) % 100
+    if short:
+        return f'{start_year % 100:02d}-{end:02d}'
+    return f'{start_year}-{end:02d}'
+
+
+def fiscal_year_bounds(start_year: int) -> Tuple[date, date]:
+    """Return the first and last day of a fiscal year."""
+    first = date(start_year, FISCAL_YEAR_START_MONTH, 1)
+    last = date(start_year + 1, FISCAL_YEAR_START_MONTH, 1).toordinal() - 1
+    return first, date.fromordinal(last)
+
+
+def parse_fiscal_year(label: str) -> Optional[int]:
+    """Parse 'FY2025-26', '2025-26' or '25-26' into the starting calendar year."""
+    match = re.fullmatch(r'(?:FY\s*)?(\d{2}|\d{4})-(\d{2})', (label or '').strip(), re.IGNORECASE)
+    if not match:
+        return None
+    start = int(match.group(1))
+    if start < 100:
+        start += 2000
+    if (start + 1) % 100 != int(match.group(2)):
+        return None
+    return start
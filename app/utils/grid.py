@@ -0,0 +1,180 @@
+"""Server-side data grids: filtering, sorting and paging done in SQL.
+
+A :class:`Grid` whitelists the columns of one model that a table widget may
+show, sort and filter on. :meth:`Grid.data` turns request arguments into a
+single filtered, sorted, LIMITed query and returns only that slice, as
+compact JSON-ready rows, with the total and filtered row counts.
+
+Request arguments:
+
+- ``sort=-date,customer_name`` -- comma-separated columns, ``-`` for descending
+- ``<column>=value`` -- ``exact``/``text``/``choice`` (comma list)/``bool`` filters
+- ``<column>_from``/``<column>_to`` -- inclusive bounds of a ``range`` filter
+- ``q=...`` -- case-insensitive substring match over the ``search`` columns
+- ``offset``/``limit`` -- the visible slice (limit capped at MAX_ITEMS_PER_PAGE)
+"""
+
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import current_app, url_for
+from sqlalchemy import func, inspect, or_
+
+from app.utils.pagination import cached_count
+
+FILTER_KINDS = ('exact', 'text', 'choice', 'range', 'bool')
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+_FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class GridError(ValueError):
+    """Raised for request arguments a grid does not accept."""
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _convert(name, column, value):
+    """Parse a request string into the Python type of a column."""
+    python_type = column.type.python_type
+    try:
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is Decimal:
+            return Decimal(value)
+        if python_type is int:
+            return int(value)
+    except (ValueError, InvalidOperation):
+        raise GridError(f'Invalid value for {name}: {value!r}')
+    return value
+
+
+def filter_conditions(filters, args) -> list:
+    """SQL conditions for the filters present in ``args``.
+
+    ``filters`` maps argument names to (kind, column); see the module
+    docstring for how each kind reads its arguments.
+    """
+    conditions = []
+    for name, (kind, column) in filters.items():
+        if kind == 'range':
+            low, high = args.get(f'{name}_from'), args.get(f'{name}_to')
+            if low:
+                conditions.append(column >= _convert(name, column, low))
+            if high:
+                conditions.append(column <= _convert(name, column, high))
+            continue
+
+        value = (args.get(name) or '').strip()
+        if not value:
+            continue
+        if kind == 'exact':
+            conditions.append(func.lower(column) == value.lower()
+                              if column.type.python_type is str else column == _convert(name, column, value))
+        elif kind == 'text':
+            conditions.append(column.ilike(f'%{value}%'))
+        elif kind == 'choice':
+            values = [item.strip() for item in value.split(',') if item.strip()]
+            if column.type.python_type is str:
+                conditions.append(func.lower(column).in_([item.lower() for item in values]))
+            else:
+                conditions.append(column.in_([_convert(name, column, item) for item in values]))
+        elif kind == 'bool':
+            if value.lower() not in _TRUE_VALUES + _FALSE_VALUES:
+                raise GridError(f'Invalid value for {name}: {value!r}')
+            conditions.append(column.is_(value.lower() in _TRUE_VALUES))
+    return conditions
+
+
+class Grid:
+    """Whitelisted, SQL-backed view of one model for a data-grid widget."""
+
+    def __init__(self, model, module, columns, filters=None, search=(), default_sort=(),
+                 view=None, tables=None):
+        """
+        ``columns`` lists the attribute names sent to the client, in order;
+        any of them may be sorted on. ``filters`` maps model column names
+        (shown or not) to one of FILTER_KINDS. ``view`` is (endpoint, url
+        argument, attribute) used to link each row to its detail page.
+        """
+        mapper = inspect(model)
+        self.model = model
+        self.module = module
+        self.columns = OrderedDict((name, mapper.columns[name]) for name in columns)
+        self.filters = OrderedDict((name, (kind, mapper.columns[name])) for name, kind in (filters or {}).items())
+        self.search = tuple(search)
+        self.default_sort = tuple(default_sort)
+        self.view = view
+        self.tables = tuple(tables or (model.__tablename__,))
+        self.primary_key = mapper.primary_key[0]
+
+        for name, (kind, _) in self.filters.items():
+            if kind not in FILTER_KINDS:
+                raise ValueError(f'Invalid filter kind {kind!r} for {model.__name__}.{name}')
+
+    def filter_conditions(self, args) -> list:
+        """SQL conditions for the whitelisted filters and search present in ``args``."""
+        conditions = filter_conditions(self.filters, args)
+        search = (args.get('q') or '').strip()
+        if search and self.search:
+            conditions.append(or_(*[self.columns[name].ilike(f'%{search}%') for name in self.search]))
+        return conditions
+
+    def order_by(self, sort) -> list:
+        """ORDER BY clauses for a ``sort`` argument, ending with the primary key."""
+        names = [name.strip() for name in sort.split(',') if name.strip()] if sort else list(self.default_sort)
+        clauses = []
+        for name in names:
+            descending = name.startswith('-')
+            name = name.lstrip('-+')
+            if name not in self.columns:
+                raise GridError(f'Cannot sort on {name!r}')
+            column = self.columns[name]
+            clauses.append(column.desc() if descending else column.asc())
+        clauses.append(self.primary_key.asc())
+        return clauses
+
+    def _row_url(self, row):
+        if not self.view:
+            return None
+        endpoint, argument, attribute = self.view
+        return url_for(endpoint, **{argument: getattr(row, attribute)})
+
+    def data(self, args) -> dict:
+        """Grid payload for the request arguments ``args``."""
+        config = current_app.config
+        try:
+            offset = max(0, int(args.get('offset') or 0))
+            limit = int(args.get('limit') or config.get('ITEMS_PER_PAGE', 25))
+        except ValueError:
+            raise GridError('offset and limit must be integers')
+        limit = max(1, min(limit, config.get('MAX_ITEMS_PER_PAGE', 100)))
+
+        base = self.model.query
+        filtered = base.filter(*self.filter_conditions(args))
+
+        # Only the visible columns (and whatever the row link needs) are selected
+        selected = list(self.columns.values())
+        if self.view and self.view[2] not in self.columns:
+            selected.append(getattr(self.model, self.view[2]))
+        rows = filtered.with_entities(*selected)\
+            .order_by(*self.order_by(args.get('sort'))).offset(offset).limit(limit).all()
+
+        return {
+            'columns': list(self.columns),
+            'rows': [[_json_value(getattr(row, name)) for name in self.columns] for row in rows],
+            'links': [self._row_url(row) for row in rows] if self.view else None,
+            'total': cached_count(base, self.tables),
+            'filtered': cached_count(filtered, self.tables),
+            'offset': offset,
+            'limit': limit,
+        }
@@ -0,0 +1,751 @@
+"""Set-based bulk imports.
+
+Uploaded sheets are read as a stream, IMPORT_CHUNK_SIZE rows at a time. Each
+chunk costs one ``IN`` query to find keys that already exist and one
+multi-row INSERT, and is committed on its own: memory use stays bounded and a
+database failure loses only the chunk being written. The result records the
+first row that was not committed, and the same file can be imported again
+from there with ``start_row``.
+
+:func:`import_from_excel` (``flask import-xlsx``) loads several models from
+one workbook, read with openpyxl in read-only mode; sheets are matched by
+name against SHEET_IMPORTS, and related records named in a row (channel
+partner, staff, booking, customer) are resolved through in-memory maps.
+
+:func:`validate_import` is the dry run: every row gets the same checks,
+and all errors can be saved as a CSV report with :func:`save_error_report`,
+so a sheet can be fixed in one pass. Web requests parse in their own
+process; ``flask import-xlsx --dry-run`` parses in parallel worker processes.
+
+Bulk inserts skip the mapper events, so code sequences, search documents and
+the contact index are maintained by :func:`app.models.after_bulk_insert`.
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache, partial
+from itertools import chain, islice
+
+from flask import current_app
+from sqlalchemy import inspect, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import (B2CLead, Booking, Camp, ChannelPartner, CodeSequence, Customer, Employee, Expense,
+                        Purchase, Sale, after_bulk_insert)
+
+IMPORT_CHUNK_SIZE = 1000
+
+# Raised while reading an upload that is not valid text or CSV; as files are
+# read lazily, they can surface after earlier chunks were committed
+FILE_READ_ERRORS = (UnicodeDecodeError, csv.Error)
+
+# How many row errors are kept for display
+MAX_REPORTED_ERRORS = 10
+
+DATE_FORMATS = (
+    '%Y-%m-%d',  # 2023-12-25
+    '%d/%m/%Y',  # 25/12/2023
+    '%m/%d/%Y',  # 12/25/2023
+    '%d-%m-%Y',  # 25-12-2023
+    '%m-%d-%Y',  # 12-25-2023
+    '%Y/%m/%d',  # 2023/12/25
+    '%d.%m.%Y',  # 25.12.2023
+)
+
+
+class ImportRowError(ValueError):
+    """A row that cannot be imported; the message is shown to the user."""
+
+
+# Sheets repeat the same few dates, and strptime is the slowest step of a row
+@lru_cache(maxsize=4096)
+def parse_date(date_str):
+    """Parse date string with multiple format support."""
+    if not date_str:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+class ImportResult:
+    """Counts, errors and timing of one import run or dry run."""
+
+    def __init__(self, name=None, dry_run=False):
+        self.name = name
+        self.dry_run = dry_run
+        self.row_count = 0
+        # Rows imported, or in a dry run rows that would be
+        self.success_count = 0
+        self.error_count = 0
+        self.skipped_count = 0
+        # (row number, message) pairs: all of them in a dry run, else the first few
+        self.problems = []
+        # Why the import stopped early, and the first row it did not commit
+        self.failure = None
+        self.resume_row = None
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.row_count / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def errors(self) -> list:
+        """Messages for display: the first MAX_REPORTED_ERRORS row errors, then any failure."""
+        errors = [f'Row {row_num}: {message}' for row_num, message in self.problems[:MAX_REPORTED_ERRORS]]
+        return errors + [self.failure] if self.failure else errors
+
+    def add_errors(self, errors) -> None:
+        errors = sorted(errors)
+        self.error_count += len(errors)
+        self.problems.extend(errors if self.dry_run else errors[:max(0, MAX_REPORTED_ERRORS - len(self.problems))])
+
+    def to_dict(self) -> dict:
+        return {
+            'dry_run': self.dry_run,
+            'success_count': self.success_count,
+            'error_count': self.error_count,
+            'skipped_count': self.skipped_count,
+            'errors': self.errors,
+            'resume_row': self.resume_row,
+        }
+
+    def __str__(self):
+        counts = (f'{self.success_count} valid, {self.error_count} invalid' if self.dry_run
+                  else f'{self.success_count} imported, {self.error_count} errors')
+        return f'{counts}, {self.row_count} rows in {self.elapsed:.1f}s ({self.rows_per_second:.0f} rows/s)'
+
+
+def iter_csv_rows(stream, encoding='utf-8-sig'):
+    """Yield (row number, {header: value}) from a binary CSV stream, header being row 1."""
+    text = io.TextIOWrapper(stream, encoding=encoding, newline='')
+    try:
+        yield from enumerate(csv.DictReader(text), start=2)
+    finally:
+        # Leave the underlying upload open for its owner
+        text.detach()
+
+
+def iter_sheet_rows(worksheet):
+    """Yield (row number, {header: value}) from an openpyxl worksheet, skipping blank rows."""
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    headers = [str(value).strip() if value is not None else '' for value in header]
+    for row_num, values in enumerate(rows, start=2):
+        if any(value is not None and value != '' for value in values):
+            yield row_num, dict(zip(headers, values))
+
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_import(model, rows, parse_row, key_label, key=None, code_prefix=None, user_id=None,
+                start_row=None, chunk_size=IMPORT_CHUNK_SIZE, name=None) -> ImportResult:
+    """Insert new records from (row number, row) pairs, one committed chunk at a time.
+
+    ``parse_row(row)`` returns the column values of one record or raises
+    :class:`ImportRowError`. ``key`` is the unique column duplicates are
+    checked on (the primary key by default); rows whose key already exists,
+    in the database or earlier in the file, are reported as errors, with
+    ``key_label`` naming the key. With ``code_prefix``, rows with no key get
+    the next codes of that CodeSequence. Rows numbered below ``start_row``
+    are skipped.
+    """
+    result = ImportResult(name or model.__tablename__)
+    started = time.perf_counter()
+    pk = inspect(model).primary_key[0]
+    key = pk if key is None else key
+    tracks_users = hasattr(model, 'created_by')
+    seen = set()
+    # First row not committed yet
+    next_row = start_row or 2
+
+    try:
+        for chunk in chunked(rows, chunk_size):
+            result.row_count += len(chunk)
+            errors = []
+            parsed = []
+            for row_num, row in chunk:
+                if start_row and row_num < start_row:
+                    result.skipped_count += 1
+                    continue
+                try:
+                    parsed.append((row_num, parse_row(row)))
+                except ImportRowError as e:
+                    errors.append((row_num, str(e)))
+            if not parsed and not errors:
+                continue
+
+            mappings = _new_records(parsed, key, key_label, code_prefix, seen, errors)
+            if tracks_users:
+                for values in mappings:
+                    values.update(created_by=user_id, updated_by=user_id)
+
+            try:
+                if mappings:
+                    _insert_chunk(model, pk, key, code_prefix, mappings)
+                db.session.commit()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                current_app.logger.exception('Import of %s stopped at row %s', model.__tablename__, chunk[0][0])
+                result.resume_row = chunk[0][0]
+                result.failure = f'Rows {chunk[0][0]} onwards were not imported: {e.__class__.__name__}'
+                break
+
+            result.success_count += len(mappings)
+            result.add_errors(errors)
+            next_row = chunk[-1][0] + 1
+    except FILE_READ_ERRORS as e:
+        current_app.logger.warning('Import of %s stopped at row %s: %s', model.__tablename__, next_row, e)
+        result.resume_row = next_row
+        result.failure = f'Rows {next_row} onwards were not imported: the file could not be read ({e})'
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def validate_import(model, rows, parse_row, key_label, key=None, code_prefix=None, start_row=None,
+                    chunk_size=IMPORT_CHUNK_SIZE, workers=1, name=None) -> ImportResult:
+    """Dry run of :func:`bulk_import`: the same checks on every row, nothing written.
+
+    With ``workers`` above 1, parsing fans out over that many spawned
+    processes, a chunk at a time; key checks stay in this process, one
+    ``IN`` query per chunk. All errors are kept, for :func:`save_error_report`.
+    ``parse_row`` must then be picklable and must not query the database, so
+    lookups it uses have to be preloaded.
+    """
+    result = ImportResult(name or model.__tablename__, dry_run=True)
+    started = time.perf_counter()
+    key = inspect(model).primary_key[0] if key is None else key
+    seen = set()
+
+    def wanted():
+        for row_num, row in rows:
+            result.row_count += 1
+            if start_row and row_num < start_row:
+                result.skipped_count += 1
+            else:
+                yield row_num, row
+
+    # First row not checked yet
+    next_row = start_row or 2
+    try:
+        for parsed, errors in _parse_chunks(parse_row, key.key, chunked(wanted(), chunk_size), workers):
+            result.success_count += len(_new_records(parsed, key, key_label, code_prefix, seen, errors))
+            result.add_errors(errors)
+            next_row = max([next_row - 1] + [row_num for row_num, _ in parsed + errors]) + 1
+    except FILE_READ_ERRORS as e:
+        result.failure = f'Rows {next_row} onwards were not checked: the file could not be read ({e})'
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _parse_chunk(parse_row, key_name, chunk):
+    """Parse one chunk; returns ([(row number, {key: value})], [(row number, error)])."""
+    parsed = []
+    errors = []
+    for row_num, row in chunk:
+        try:
+            values = parse_row(row)
+        except ImportRowError as e:
+            errors.append((row_num, str(e)))
+            continue
+        # Only the key travels back to the parent process
+        parsed.append((row_num, {key_name: values.get(key_name)}))
+    return parsed, errors
+
+
+# parse_row and key name of a validation worker process, sent once per worker
+_worker_args = None
+
+
+def _init_parse_worker(parse_row, key_name):
+    global _worker_args
+    _worker_args = (parse_row, key_name)
+
+
+def _parse_chunk_in_worker(chunk):
+    return _parse_chunk(*_worker_args, chunk)
+
+
+def _parse_chunks(parse_row, key_name, chunks, workers):
+    """Yield _parse_chunk results in order, up to 2 * ``workers`` chunks in flight.
+
+    Files of a single chunk are parsed here, as starting the pool would cost
+    more than it saves. Workers are spawned rather than forked, as forking a
+    process that runs threads (web workers, export jobs) can deadlock on
+    locks held by those threads; ``parse_row`` and its lookups are pickled
+    once per worker, not with every chunk.
+    """
+    chunks = iter(chunks)
+    head = list(islice(chunks, 2))
+    if workers <= 1 or len(head) < 2:
+        for chunk in chain(head, chunks):
+            yield _parse_chunk(parse_row, key_name, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_parse_worker, initargs=(parse_row, key_name)) as pool:
+        pending = deque()
+        for chunk in chain(head, chunks):
+            pending.append(pool.submit(_parse_chunk_in_worker, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _new_records(parsed, key, key_label, code_prefix, seen, errors) -> list:
+    """Values of the parsed (row number, values) pairs whose key is new, with one IN query.
+
+    Missing and duplicate keys are added to ``errors``; keys are added to
+    ``seen``, the keys met so far in the file.
+    """
+    candidates = []
+    for row_num, values in parsed:
+        code = values.get(key.key)
+        if code is None and not code_prefix:
+            errors.append((row_num, f'{key_label} is required'))
+        elif code in seen:
+            errors.append((row_num, f"{key_label} '{code}' appears more than once in the file"))
+        else:
+            if code is not None:
+                seen.add(code)
+            candidates.append((row_num, values))
+
+    codes = [values[key.key] for _, values in candidates if values.get(key.key) is not None]
+    existing = set(db.session.scalars(select(key).where(key.in_(codes)))) if codes else set()
+    records = []
+    for row_num, values in candidates:
+        if values.get(key.key) is not None and values[key.key] in existing:
+            errors.append((row_num, f"{key_label} '{values[key.key]}' already exists"))
+        else:
+            records.append(values)
+    return records
+
+
+def _insert_chunk(model, pk, key, code_prefix, mappings) -> None:
+    connection = db.session.connection()
+    uncoded = [values for values in mappings if values[key.key] is None]
+    if uncoded:
+        last = CodeSequence.allocate(code_prefix, connection, count=len(uncoded))
+        for number, values in enumerate(uncoded, start=last - len(uncoded) + 1):
+            values[key.key] = CodeSequence.format_code(code_prefix, number)
+
+    if pk.key in mappings[0]:
+        db.session.execute(insert(model), mappings)
+    else:
+        # Generated ids are needed for the search and contact index rows
+        ids = db.session.scalars(insert(model).returning(pk, sort_by_parameter_order=True), mappings).all()
+        for values, new_id in zip(mappings, ids):
+            values[pk.key] = new_id
+    after_bulk_insert(connection, model, mappings)
+
+
+class Lookups:
+    """Name -> id maps of related records, each loaded with one query per import."""
+
+    def __init__(self):
+        self._maps = {}
+
+    def id_for(self, column, value, label, required=True):
+        """Id of the record whose ``column`` matches ``value`` (case-insensitive), or None if blank.
+
+        Unknown or ambiguous values raise ImportRowError, or give None when
+        not ``required``.
+        """
+        if not value:
+            return None
+        mapping = self._map(column)
+        record_id = mapping.get(value.lower())
+        if record_id is None and required:
+            problem = 'matches more than one record' if value.lower() in mapping else 'was not found'
+            raise ImportRowError(f"{label} '{value}' {problem}")
+        return record_id
+
+    def _map(self, column) -> dict:
+        mapping = self._maps.get((column.class_, column.key))
+        if mapping is None:
+            mapping = {}
+            pk = inspect(column.class_).primary_key[0]
+            for name, record_id in db.session.execute(select(column, pk).where(column.isnot(None))):
+                name = str(name).strip().lower()
+                # Names shared by several records map to None: ambiguous
+                mapping[name] = None if name in mapping else record_id
+            self._maps[(column.class_, column.key)] = mapping
+        return mapping
+
+    def preload(self, columns) -> None:
+        """Load the maps over ``columns`` now, e.g. before parsing in other processes."""
+        for column in columns:
+            self._map(column)
+
+    def invalidate(self, model) -> None:
+        """Forget the maps over ``model``, e.g. after importing more of it."""
+        for cached in [cached for cached in self._maps if cached[0] is model]:
+            del self._maps[cached]
+
+
+def _text(row, column):
+    value = row.get(column)
+    if value is None:
+        return ''
+    # Spreadsheets store phone numbers and codes as numbers
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _required_text(row, column):
+    value = _text(row, column)
+    if not value:
+        raise ImportRowError(f'{column} is required')
+    return value
+
+
+def _date(row, column, required=False):
+    value = row.get(column)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = _text(row, column)
+    if not value:
+        if required:
+            raise ImportRowError(f'{column} is required')
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ImportRowError(f'Invalid {column.lower()} format '
+                             '(supported: DD/MM/YYYY, MM/DD/YYYY, YYYY-MM-DD, DD-MM-YYYY)')
+    return parsed
+
+
+def _decimal(row, column, required=False):
+    value = row.get(column)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return Decimal(str(value))
+    value = _text(row, column).replace(',', '').rstrip('%').strip()
+    if not value:
+        if required:
+            raise ImportRowError(f'{column} is required')
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ImportRowError(f'Invalid {column.lower()}: {value!r}')
+
+
+def _flag(row, column):
+    value = row.get(column)
+    if isinstance(value, bool):
+        return value
+    return _text(row, column).lower() in ('yes', 'y', 'true', '1')
+
+
+def _email(row, column='Email'):
+    email = _text(row, column) or None
+    if email and '@' not in email:
+        raise ImportRowError('Invalid email address')
+    return email
+
+
+def _gst_values(model, row) -> dict:
+    """Amount columns of a sale or purchase, with GST worked out by the model.
+
+    Sheets that only give the total ``Amount`` are read as GST-inclusive, so
+    the imported total stays as it was.
+    """
+    base_amount = _decimal(row, 'Base Amount')
+    gst_type = (_text(row, 'GST Type') or 'exclusive').lower()
+    if gst_type not in ('inclusive', 'exclusive'):
+        raise ImportRowError(f"GST Type must be 'inclusive' or 'exclusive', not {gst_type!r}")
+    if base_amount is None:
+        base_amount, gst_type = _decimal(row, 'Amount', required=True), 'inclusive'
+    gst_percentage = _decimal(row, 'GST %')
+    document = model(base_amount=base_amount, gst_type=gst_type,
+                     gst_percentage=18 if gst_percentage is None else int(gst_percentage))
+    document.calculate_gst()
+    return {
+        'base_amount': document.base_amount,
+        'gst_type': document.gst_type,
+        'gst_percentage': document.gst_percentage,
+        'gst_amount': document.gst_amount,
+        'amount': document.amount,
+    }
+
+
+def b2c_lead_values(row, lookups=None) -> dict:
+    """B2CLead column values from one row of the lead import sheet."""
+    values = {
+        'enquiry_id': _required_text(row, 'Enquiry ID'),
+        'customer_name': _required_text(row, 'Customer Name'),
+        'contact_no': _required_text(row, 'Contact No'),
+        'email': _email(row),
+        'enquiry_date': _date(row, 'Enquiry Date', required=True),
+        'source': _text(row, 'Source') or None,
+        'services': _text(row, 'Services') or None,
+        'referred_by': _text(row, 'Referred By') or None,
+        'status': _text(row, 'Status') or 'NEW',
+        'comment': _text(row, 'Comment') or None,
+        'customer_id': _text(row, 'Customer ID') or None,
+    }
+    for n in (1, 2, 3):
+        # Unreadable follow-up dates are dropped rather than failing the row
+        try:
+            values[f'followup{n}'] = _date(row, f'Followup {n}')
+        except ImportRowError:
+            values[f'followup{n}'] = None
+        values[f'followup{n}_detail'] = _text(row, f'Followup {n} Detail') or None
+    return values
+
+
+def customer_values(row, lookups) -> dict:
+    """Customer column values from one row of the customer sheet."""
+    return {
+        'customer_code': _text(row, 'Customer Code') or None,
+        'customer_name': _required_text(row, 'Customer Name'),
+        'contact_no': _required_text(row, 'Contact No'),
+        'email': _email(row),
+        'services': _text(row, 'Services') or None,
+        'channel_partner_id': lookups.id_for(ChannelPartner.name, _text(row, 'Channel Partner'), 'Channel Partner'),
+    }
+
+
+def camp_values(row, lookups) -> dict:
+    """Camp column values from one row of the camp sheet."""
+    return {
+        'camp_id': _text(row, 'Camp ID') or None,
+        'camp_date': _date(row, 'Camp Date', required=True),
+        'camp_location': _required_text(row, 'Location'),
+        'org_name': _text(row, 'Org Name') or None,
+        'package': _text(row, 'Package') or None,
+        'diagnostic_partner': _text(row, 'Diagnostic Partner') or None,
+        'patient_name': _required_text(row, 'Patient Name'),
+        'age': _text(row, 'Age') or None,
+        'gender': _text(row, 'Gender') or None,
+        'phone_no': _required_text(row, 'Phone No'),
+        'test_done': _flag(row, 'Test Done'),
+        'staff_id': lookups.id_for(Employee.name, _text(row, 'Staff'), 'Staff'),
+    }
+
+
+def expense_values(row, lookups) -> dict:
+    """Expense column values from one row of the expense sheet."""
+    return {
+        'expense_code': _text(row, 'Expense Code') or None,
+        'date': _date(row, 'Date', required=True),
+        'category': _required_text(row, 'Category'),
+        'sub_category': _text(row, 'Sub Category') or None,
+        'expense_amount': _decimal(row, 'Amount', required=True),
+        'booking_id': lookups.id_for(Booking.booking_code, _text(row, 'Booking'), 'Booking'),
+        'employee_id': lookups.id_for(Employee.name, _text(row, 'Employee'), 'Employee'),
+    }
+
+
+def sale_values(row, lookups) -> dict:
+    """Sale column values from one row of the sales sheet."""
+    customer_name = _required_text(row, 'Customer Name')
+    return {
+        'invoice_number': _required_text(row, 'Invoice Number'),
+        'date': _date(row, 'Date', required=True),
+        'customer_name': customer_name,
+        # Customer names on invoices are free text; link only an unambiguous match
+        'customer_id': lookups.id_for(Customer.customer_name, customer_name, 'Customer', required=False),
+        'product_service': _required_text(row, 'Product/Service'),
+        'payment_status': _text(row, 'Payment Status') or 'Pending',
+        'notes': _text(row, 'Notes') or None,
+        **_gst_values(Sale, row),
+    }
+
+
+def purchase_values(row, lookups) -> dict:
+    """Purchase column values from one row of the purchases sheet."""
+    return {
+        'bill_number': _required_text(row, 'Bill Number'),
+        'date': _date(row, 'Date', required=True),
+        'vendor_name': _required_text(row, 'Vendor Name'),
+        'item_description': _required_text(row, 'Item Description'),
+        'payment_status': _text(row, 'Payment Status') or 'Pending',
+        'notes': _text(row, 'Notes') or None,
+        **_gst_values(Purchase, row),
+    }
+
+
+class SheetImport:
+    """How one workbook sheet maps onto a model.
+
+    Columns use the labels of the matching export, so an exported workbook
+    can be imported again.
+    """
+
+    def __init__(self, name, sheet_names, model, parse_row, key, key_label, code_prefix=None, references=()):
+        """``references`` lists the columns ``parse_row`` looks records up by."""
+        self.name = name
+        self.sheet_names = tuple(sheet_names)
+        self.model = model
+        self.parse_row = parse_row
+        self.key = key
+        self.key_label = key_label
+        self.code_prefix = code_prefix
+        self.references = tuple(references)
+
+
+# In import order: records that later sheets refer to come first
+SHEET_IMPORTS = [
+    SheetImport('customers', ('CustomerMaster', 'Customers'), Customer, customer_values,
+                Customer.customer_code, 'Customer Code', code_prefix='CUST', references=(ChannelPartner.name,)),
+    SheetImport('b2c_leads', ('B2C Leads Master', 'B2C Leads'), B2CLead, b2c_lead_values,
+                B2CLead.enquiry_id, 'Enquiry ID'),
+    SheetImport('camps', ('Camps', 'Camp Master'), Camp, camp_values,
+                Camp.camp_id, 'Camp ID', code_prefix='CAMP', references=(Employee.name,)),
+    SheetImport('expenses', ('Expense Master', 'Expenses'), Expense, expense_values,
+                Expense.expense_code, 'Expense Code', code_prefix='EXP',
+                references=(Booking.booking_code, Employee.name)),
+    SheetImport('sales', ('Sales', 'Sales Master'), Sale, sale_values,
+                Sale.invoice_number, 'Invoice Number', references=(Customer.customer_name,)),
+    SheetImport('purchases', ('Purchases', 'Purchase Master'), Purchase, purchase_values,
+                Purchase.bill_number, 'Bill Number'),
+]
+
+
+def import_b2c_leads_csv(stream, user_id=None, start_row=None) -> ImportResult:
+    """Import B2C leads from a binary CSV stream (see leads_b2c/import.html for the columns)."""
+    return bulk_import(B2CLead, iter_csv_rows(stream), b2c_lead_values, 'Enquiry ID',
+                       user_id=user_id, start_row=start_row, name='b2c_leads')
+
+
+def validate_b2c_leads_csv(stream, start_row=None) -> ImportResult:
+    """Dry run of :func:`import_b2c_leads_csv`."""
+    return validate_import(B2CLead, iter_csv_rows(stream), b2c_lead_values, 'Enquiry ID',
+                           start_row=start_row, name='b2c_leads')
+
+
+def _claim_sheet_codes(sheet, worksheet) -> None:
+    """Advance the code sequence past the highest code in a sheet.
+
+    Rows without a code are numbered as their chunk is written, so without
+    this they could be given a code that a later row of the sheet carries.
+    """
+    numbers = (CodeSequence.parse_code(sheet.code_prefix, _text(row, sheet.key_label))
+               for _, row in iter_sheet_rows(worksheet))
+    highest = max((number for number in numbers if number is not None), default=None)
+    if highest is not None:
+        CodeSequence.claim(sheet.code_prefix, highest)
+        db.session.commit()
+
+
+def import_from_excel(filepath, user_id=None, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, workers=1) -> dict:
+    """Import every recognised sheet of a workbook; returns {import name: ImportResult}.
+
+    Sheet names are matched case-insensitively against SHEET_IMPORTS;
+    other sheets are ignored. With ``dry_run`` the rows are only validated,
+    parsed on ``workers`` processes.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        titles = {title.strip().lower(): title for title in workbook.sheetnames}
+        lookups = Lookups()
+        results = {}
+        for sheet in SHEET_IMPORTS:
+            title = next((titles[name.lower()] for name in sheet.sheet_names if name.lower() in titles), None)
+            if title is None:
+                continue
+            rows = iter_sheet_rows(workbook[title])
+            parse_row = partial(sheet.parse_row, lookups=lookups)
+            if dry_run:
+                lookups.preload(sheet.references)
+                results[sheet.name] = validate_import(
+                    sheet.model, rows, parse_row, sheet.key_label, key=sheet.key,
+                    code_prefix=sheet.code_prefix, chunk_size=chunk_size, workers=workers, name=sheet.name,
+                )
+                continue
+            if sheet.code_prefix:
+                _claim_sheet_codes(sheet, workbook[title])
+            results[sheet.name] = bulk_import(
+                sheet.model, rows, parse_row, sheet.key_label, key=sheet.key,
+                code_prefix=sheet.code_prefix, user_id=user_id, chunk_size=chunk_size, name=sheet.name,
+            )
+            lookups.invalidate(sheet.model)
+        return results
+    finally:
+        workbook.close()
+
+
+def write_error_report(results, f) -> int:
+    """Write the row errors of ImportResults to a text file as CSV; returns the error count."""
+    writer = csv.writer(f)
+    writer.writerow(['Sheet', 'Row', 'Error'])
+    count = 0
+    for result in results:
+        writer.writerows((result.name, row_num, message) for row_num, message in result.problems)
+        count += len(result.problems)
+        if result.failure:
+            writer.writerow((result.name, result.resume_row, result.failure))
+            count += 1
+    return count
+
+
+REPORT_SUBFOLDER = 'import_reports'
+REPORT_NAME_PATTERN = re.compile(r'[0-9a-f]{32}\.csv')
+
+
+def report_folder(app=None) -> str:
+    """Absolute path of the folder holding error reports, created if missing."""
+    app = app or current_app
+    folder = os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], REPORT_SUBFOLDER))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def report_path(name: str):
+    """Path of a saved report, or None if ``name`` is not a report that exists."""
+    if not REPORT_NAME_PATTERN.fullmatch(name or ''):
+        return None
+    path = os.path.join(report_folder(), name)
+    return path if os.path.exists(path) else None
+
+
+def save_error_report(results) -> str:
+    """Save an error report for later download; returns its name.
+
+    Reports older than IMPORT_REPORT_RETENTION_HOURS are deleted on the way.
+    """
+    folder = report_folder()
+    cutoff = time.time() - current_app.config.get('IMPORT_REPORT_RETENTION_HOURS', 24) * 3600
+    for existing in os.listdir(folder):
+        path = os.path.join(folder, existing)
+        if REPORT_NAME_PATTERN.fullmatch(existing) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+    # Unguessable name: the upload folder may be served as static files
+    name = f'{uuid.uuid4().hex}.csv'
+    with open(os.path.join(folder, name), 'w', encoding='utf-8', newline='') as f:
+        write_error_report(results, f)
+    return name
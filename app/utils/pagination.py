@@ -0,0 +1,180 @@
+"""Keyset (seek-method) pagination for list views.
+
+Pages are addressed by an opaque cursor holding the sort key of the last
+(or first) row shown, and fetched with ``WHERE (key) < (cursor) ORDER BY key
+LIMIT n``. Unlike OFFSET, the cost of a page does not grow with its depth,
+as long as the sort key is indexed. Sort keys must end with a unique column
+(usually the primary key) so that every row has a distinct position.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app, request, url_for
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql import operators
+
+from app.utils.cache import cached_query
+
+
+def encode_cursor(values) -> str:
+    """Serialize sort-key values into an opaque, URL-safe cursor."""
+    def dump(value):
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        if isinstance(value, date):
+            return {'d': value.isoformat()}
+        if isinstance(value, Decimal):
+            return {'n': str(value)}
+        return value
+
+    raw = json.dumps([dump(value) for value in values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int):
+    """Inverse of :func:`encode_cursor`; None if the cursor is malformed."""
+    def load(value):
+        if isinstance(value, dict):
+            if 'dt' in value:
+                return datetime.fromisoformat(value['dt'])
+            if 'd' in value:
+                return date.fromisoformat(value['d'])
+            if 'n' in value:
+                return Decimal(value['n'])
+        return value
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = [load(value) for value in json.loads(raw)]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+    return values if len(values) == size else None
+
+
+def split_order(order_by):
+    """[(column, descending)] from columns or column.asc()/column.desc() expressions."""
+    keys = []
+    for clause in order_by:
+        modifier = getattr(clause, 'modifier', None)
+        if modifier in (operators.desc_op, operators.asc_op):
+            keys.append((clause.element, modifier is operators.desc_op))
+        else:
+            keys.append((clause, False))
+    return keys
+
+
+def seek_condition(keys, values, forward: bool):
+    """Condition selecting rows after (``forward``) or before the cursor position."""
+    def beyond(column, descending, value):
+        return column < value if descending == forward else column > value
+
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        columns = tuple_(*[column for column, _ in keys])
+        return beyond(columns, directions.pop(), tuple_(*values))
+
+    # Mixed directions: (a > x) OR (a = x AND b < y) OR ...
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, beyond(column, descending, values[i])))
+    return or_(*clauses)
+
+
+def seek_order(keys, forward: bool):
+    """ORDER BY clauses walking the keys forward, or backward from a cursor."""
+    return [column.desc() if descending == forward else column.asc() for column, descending in keys]
+
+
+def cached_count(query, tables) -> int:
+    """COUNT(*) of a query, cached until one of ``tables`` changes."""
+    statement = query.order_by(None).statement
+    compiled = statement.compile()
+    key = (str(compiled), tuple(sorted((name, repr(value)) for name, value in compiled.params.items())))
+    return cached_query('pagination.count', tables, lambda _key: query.order_by(None).count(), key)
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query."""
+
+    def __init__(self, items, keys, per_page, total, has_next, has_prev, arg_prefix=''):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.arg_prefix = arg_prefix
+        self._keys = keys
+
+    def _cursor(self, item):
+        return encode_cursor([getattr(item, column.key) for column, _ in self._keys])
+
+    @property
+    def next_cursor(self):
+        return self._cursor(self.items[-1]) if self.has_next and self.items else None
+
+    @property
+    def prev_cursor(self):
+        return self._cursor(self.items[0]) if self.has_prev and self.items else None
+
+    def url(self, **cursor) -> str:
+        """URL of the current view with other query arguments kept and the cursor replaced."""
+        own = (f'{self.arg_prefix}after', f'{self.arg_prefix}before')
+        args = {key: value for key, value in request.args.items() if key not in own}
+        args.update({f'{self.arg_prefix}{key}': value for key, value in cursor.items() if value})
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def first_url(self):
+        return self.url()
+
+    @property
+    def next_url(self):
+        return self.url(after=self.next_cursor) if self.has_next else None
+
+    @property
+    def prev_url(self):
+        return self.url(before=self.prev_cursor) if self.has_prev else None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, order_by, tables=None, per_page=None, arg_prefix='') -> KeysetPage:
+    """Fetch the page of ``query`` selected by the ``after``/``before`` request arguments.
+
+    ``order_by`` lists the sort key, e.g. ``(Sale.date.desc(), Sale.id.desc())``;
+    it must be unique per row. ``tables`` enables a total count, cached until
+    one of those tables changes. ``arg_prefix`` renames the cursor arguments
+    (``<prefix>after``/``<prefix>before``) so one view can page several lists.
+    """
+    config = current_app.config
+    if per_page is None:
+        per_page = request.args.get('per_page', type=int) or config.get('ITEMS_PER_PAGE', 25)
+    per_page = max(1, min(per_page, config.get('MAX_ITEMS_PER_PAGE', 100)))
+
+    keys = split_order(order_by)
+    after_arg, before_arg = request.args.get(f'{arg_prefix}after'), request.args.get(f'{arg_prefix}before')
+    after = decode_cursor(after_arg, len(keys)) if after_arg else None
+    before = decode_cursor(before_arg, len(keys)) if before_arg else None
+
+    total = cached_count(query, tables) if tables else None
+    if before is not None:
+        rows = query.filter(seek_condition(keys, before, forward=False))\
+            .order_by(None).order_by(*seek_order(keys, forward=False)).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        return KeysetPage(items, keys, per_page, total, has_next=True, has_prev=has_prev, arg_prefix=arg_prefix)
+
+    if after is not None:
+        query = query.filter(seek_condition(keys, after, forward=True))
+    rows = query.order_by(None).order_by(*seek_order(keys, forward=True)).limit(per_page + 1).all()
+    return KeysetPage(rows[:per_page], keys, per_page, total,
+                      has_next=len(rows) > per_page, has_prev=after is not None, arg_prefix=arg_prefix)
@@ -0,0 +1,137 @@
+"""Global full-text search over the search_document index.
+
+Queries are split into word tokens and every token is matched as a prefix,
+so "pri 9876" finds "Priya Sharma, 98765 43210". Results are ranked (bm25 on
+SQLite FTS5, ts_rank on PostgreSQL) and limited per entity in the same
+query. Databases without either engine fall back to a LIKE scan of the
+index table. Queries that look like a phone number or email also match the
+normalized contact index, whatever format the number was stored in.
+"""
+
+from collections import OrderedDict
+
+from flask import url_for
+from sqlalchemy import inspect, text
+
+from app import db
+from app.models import (SearchDocument, SEARCH_ENTITIES, has_search_index,
+                        ContactIndex, CONTACT_ENTITIES)
+
+# Result group titles, in display order
+SEARCH_CATEGORIES = OrderedDict([
+    ('b2c_lead', 'B2C Leads'),
+    ('b2b_lead', 'B2B Leads'),
+    ('customer', 'Customers'),
+    ('employee', 'Employees'),
+    ('channel_partner', 'Channel Partners'),
+    ('expense', 'Expenses'),
+])
+
+_FTS5_SQL = text("""
+    SELECT entity, entity_id FROM (
+        SELECT entity, entity_id, score,
+               ROW_NUMBER() OVER (PARTITION BY entity ORDER BY score) AS position
+        FROM (
+            SELECT d.entity, d.entity_id, bm25(search_index) AS score
+            FROM search_index JOIN search_document d ON d.id = search_index.rowid
+            WHERE search_index MATCH :query
+        ) matches
+    ) ranked
+    WHERE position <= :limit
+    ORDER BY score
+""")
+
+_TSVECTOR_SQL = text("""
+    SELECT entity, entity_id FROM (
+        SELECT entity, entity_id, score,
+               ROW_NUMBER() OVER (PARTITION BY entity ORDER BY score DESC) AS position
+        FROM (
+            SELECT entity, entity_id, ts_rank(document, to_tsquery('simple', :query)) AS score
+            FROM search_document
+            WHERE document @@ to_tsquery('simple', :query)
+        ) matches
+    ) ranked
+    WHERE position <= :limit
+    ORDER BY score DESC
+""")
+
+
+def _ranked_ids(tokens, limit: int) -> list:
+    """(entity, entity_id) pairs of the best matches, at most ``limit`` per entity."""
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    if dialect == 'sqlite' and has_search_index(connection):
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        return connection.execute(_FTS5_SQL, {'query': query, 'limit': limit}).all()
+    if dialect == 'postgresql':
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        return connection.execute(_TSVECTOR_SQL, {'query': query, 'limit': limit}).all()
+
+    ids = []
+    for entity in SEARCH_ENTITIES:
+        matches = SearchDocument.query.filter(SearchDocument.entity == entity)
+        for token in tokens:
+            matches = matches.filter((' ' + SearchDocument.content).like(f'% {token}%'))
+        ids.extend((entity, entity_id) for (entity_id,) in
+                   matches.with_entities(SearchDocument.entity_id).limit(limit))
+    return ids
+
+
+def global_search(query: str, limit: int = 10) -> OrderedDict:
+    """Search every indexed entity; returns {category title: [records]} in rank order."""
+    tokens = SearchDocument.tokens(query)
+    if not tokens:
+        return OrderedDict()
+
+    # Exact contact matches first, then ranked text matches
+    ranked = {}
+    for entity, entity_id in ContactIndex.find(query) + _ranked_ids(tokens, limit):
+        ids = ranked.setdefault(entity, [])
+        if entity in SEARCH_CATEGORIES and entity_id not in ids and len(ids) < limit:
+            ids.append(entity_id)
+
+    results = OrderedDict()
+    for entity, title in SEARCH_CATEGORIES.items():
+        records = _load_records(SEARCH_ENTITIES[entity][0], ranked.get(entity))
+        if records:
+            results[title] = records
+    return results
+
+
+def _load_records(model, ids) -> list:
+    """Records of ``model`` with the given string primary keys, in the same order."""
+    if not ids:
+        return []
+    pk = inspect(model).primary_key[0]
+    keys = [pk.type.python_type(entity_id) for entity_id in ids]
+    records = {getattr(record, pk.key): record for record in model.query.filter(pk.in_(keys))}
+    return [records[key] for key in keys if key in records]
+
+
+# Entity name -> (label, view URL) of a record, for contact matches
+CONTACT_MATCH_DISPLAY = {
+    'b2c_lead': lambda r: (f'B2C Lead {r.enquiry_id}: {r.customer_name}',
+                           url_for('leads_b2c.view', enquiry_id=r.enquiry_id)),
+    'customer': lambda r: (f'Customer {r.customer_code}: {r.customer_name}',
+                           url_for('customers.view', id=r.id)),
+    'employee': lambda r: (f'Employee {r.employee_code}: {r.name}',
+                           url_for('employees.view', id=r.id)),
+    'channel_partner': lambda r: (f'Channel Partner {r.partner_code}: {r.name}',
+                                  url_for('channel_partners.view', partner_code=r.partner_code)),
+    'camp': lambda r: (f'Camp {r.camp_id}: {r.patient_name}',
+                       url_for('camps.view', camp_id=r.camp_id)),
+}
+
+
+def contact_matches(query: str) -> list:
+    """Every record sharing the phone number or email in ``query``, across all entity types."""
+    ids = {}
+    for entity, entity_id in ContactIndex.find(query):
+        ids.setdefault(entity, []).append(entity_id)
+
+    matches = []
+    for entity, entity_ids in ids.items():
+        for record in _load_records(CONTACT_ENTITIES[entity][0], entity_ids):
+            label, url = CONTACT_MATCH_DISPLAY[entity](record)
+            matches.append({'entity': entity, 'id': str(inspect(record).identity[0]), 'label': label, 'url': url})
+    return matches
@@ -0,0 +1,91 @@
+"""In-process registry of Setting rows (dropdown keys and labels).
+
+Templates translate stored dropdown keys to labels once per cell, so the
+whole ``setting`` table, which is small, is loaded with one query into
+read-only per-group mappings and served from memory. The registry is keyed
+by the ``setting`` table version (see app.utils.cache): any add, edit or
+delete of a Setting bumps it, and the next request in every worker reloads.
+"""
+
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from app import db
+from app.utils.cache import table_versions
+
+SettingOption = namedtuple('SettingOption', 'id group key value sort_order is_active')
+
+_EMPTY = MappingProxyType({})
+
+
+class SettingSnapshot:
+    """Immutable view of the whole setting table at one version."""
+
+    def __init__(self, rows):
+        options = {}
+        values = {}
+        first_values = {}
+        for row in sorted(rows, key=lambda row: (row.group, row.sort_order, row.value, row.id)):
+            options.setdefault(row.group, []).append(row)
+            values.setdefault(row.group, {})[row.key] = row.value
+        for row in sorted(rows, key=lambda row: row.id):
+            first_values.setdefault(row.key, row.value)
+        self.options = MappingProxyType({group: tuple(rows) for group, rows in options.items()})
+        self.values = MappingProxyType({group: MappingProxyType(mapping) for group, mapping in values.items()})
+        # Key -> value across all groups; the oldest row wins a key shared by groups
+        self.any_group = MappingProxyType(first_values)
+
+
+class SettingRegistry:
+    """Thread-safe holder of the current :class:`SettingSnapshot`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshot = None
+
+    @staticmethod
+    def _load() -> SettingSnapshot:
+        from app.models import Setting
+
+        rows = db.session.query(Setting.id, Setting.group, Setting.key, Setting.value,
+                                Setting.sort_order, Setting.is_active).all()
+        return SettingSnapshot([SettingOption(*row) for row in rows])
+
+    def snapshot(self) -> SettingSnapshot:
+        """The snapshot for the current table version, loading it if the table changed."""
+        session = db.session()
+        if 'setting' in session.info.get('changed_tables', ()):
+            # Uncommitted setting writes in this transaction: read them, keep nothing
+            return self._load()
+
+        version = table_versions(('setting',))
+        snapshot = self._snapshot
+        if snapshot is None or self._version != version:
+            snapshot = self._load()
+            with self._lock:
+                self._version, self._snapshot = version, snapshot
+        return snapshot
+
+    def values(self, group: str):
+        """Read-only {key: value} of every setting in a group, active or not."""
+        return self.snapshot().values.get(group, _EMPTY)
+
+    def value(self, key, group=None, default=None):
+        """Value of a setting key, within ``group`` or (without one) in any group."""
+        snapshot = self.snapshot()
+        mapping = snapshot.values.get(group, _EMPTY) if group else snapshot.any_group
+        return mapping.get(key, default)
+
+    def options(self, group: str) -> tuple:
+        """Active settings of a group as SettingOption tuples, by sort order then value."""
+        return tuple(option for option in self.snapshot().options.get(group, ()) if option.is_active)
+
+    def clear(self) -> None:
+        """Drop the loaded snapshot; the next lookup reloads it."""
+        with self._lock:
+            self._version, self._snapshot = None, None
+
+
+settings_registry = SettingRegistry()
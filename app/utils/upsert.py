@@ -0,0 +1,36 @@
+"""Multi-row upserts.
+
+:func:`upsert` writes many rows with one ``INSERT ... ON CONFLICT (keys) DO
+UPDATE`` statement on sqlite and PostgreSQL. Other databases have no
+portable form, so the rows with those keys are deleted and reinserted in the
+caller's transaction instead. Statements run on a Core table and skip the
+ORM unit of work: callers must mark the table changed for the query cache.
+"""
+
+from sqlalchemy import and_, delete, or_
+
+
+def upsert(connection, table, rows, keys, update_columns) -> None:
+    """Insert ``rows``, updating ``update_columns`` of rows whose ``keys`` already exist.
+
+    ``keys`` names the columns of a unique index; columns not listed in
+    ``update_columns`` keep their stored values on conflict.
+    """
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[name] for name in keys],
+            set_={name: statement.excluded[name] for name in update_columns})
+        connection.execute(statement)
+        return
+
+    existing = or_(*[and_(*[table.c[name] == row[name] for name in keys]) for row in rows])
+    connection.execute(delete(table).where(existing))
+    connection.execute(table.insert(), rows)
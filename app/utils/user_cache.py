@@ -0,0 +1,100 @@
+"""Short-TTL cache of logged-in users for Flask-Login's user loader.
+
+Flask-Login loads the current user on every authenticated request. Instead
+of a SELECT each time, the user's column values are kept in process together
+with the ``user`` table version (see app.utils.cache) they were read at.
+Every load compares that version with the current one (one shared read,
+memoized per request): while it matches, the user is rebuilt from the cached
+values without a query; once any user row changed, in any worker process,
+the user is reloaded, so deactivation and role changes apply on the next
+request. ``USER_CACHE_TTL`` only bounds how long an entry lives.
+
+Writes to a user through the ORM (edits, activation toggles, password resets)
+also drop that user's entry in the process that made them at once.
+"""
+
+import time
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app import db
+from app.utils.cache import QueryCache, table_versions
+
+DEFAULT_TTL = 30
+
+
+class UserCache:
+    """Per-process map of user id -> (loaded_at, table version, column values)."""
+
+    def __init__(self, maxsize: int = 1024):
+        self._entries = QueryCache(maxsize)
+
+    @staticmethod
+    def _ttl() -> float:
+        return current_app.config.get('USER_CACHE_TTL', DEFAULT_TTL)
+
+    @staticmethod
+    def _columns(user) -> dict:
+        return {attr.key: getattr(user, attr.key) for attr in inspect(user).mapper.column_attrs}
+
+    @staticmethod
+    def _attach(values):
+        """A session-attached User built from cached values, without a SELECT."""
+        from app.models import User
+
+        existing = db.session.identity_map.get(identity_key(User, values['id']))
+        if existing is not None:
+            return existing
+        user = User(**values)
+        make_transient_to_detached(user)
+        db.session.add(user)
+        return user
+
+    def load(self, user_id: int):
+        """The user with ``user_id`` (None if there is none), from cache when current."""
+        from app.models import User
+
+        ttl = self._ttl()
+        if ttl <= 0:
+            return db.session.get(User, user_id)
+
+        now = time.monotonic()
+        version = table_versions(('user',))
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            loaded_at, entry_version, values = entry
+            if entry_version == version and now - loaded_at < ttl:
+                return self._attach(values)
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            self.forget(user_id)
+            return None
+        self._entries.set(user_id, (now, version, self._columns(user)))
+        return user
+
+    def forget(self, user_id) -> None:
+        """Drop a user's entry; the next request for them reloads it."""
+        self._entries.pop(user_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def _forget_user(mapper, connection, target):
+    user_cache.forget(target.id)
+
+
+def register_user_cache_events(app):
+    """Drop cached users whenever a User row is updated or deleted."""
+    from app.models import User
+
+    if not event.contains(User, 'after_update', _forget_user):
+        event.listen(User, 'after_update', _forget_user)
+        event.listen(User, 'after_delete', _forget_user)
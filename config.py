@@ -28,6 +28,30 @@ class Config:
     ITEMS_PER_PAGE = 25
     MAX_ITEMS_PER_PAGE = 100
     
+    # Query cache settings (number of cached query results kept per process)
+    QUERY_CACHE_SIZE = int(os.environ.get('QUERY_CACHE_SIZE', 512))
+    
+    # Seconds a logged-in user may be served from memory, while the user table
+    # version is unchanged (0 = load from the database every request)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+    
+    # Background export jobs: worker threads per web process (0 = leave jobs to
+    # `flask export-worker`), days a finished file is kept for download and
+    # minutes without progress after which a running job is marked failed
+    EXPORT_JOB_WORKERS = int(os.environ.get('EXPORT_JOB_WORKERS', 1))
+    EXPORT_JOB_RETENTION_DAYS = int(os.environ.get('EXPORT_JOB_RETENTION_DAYS', 7))
+    EXPORT_JOB_TIMEOUT_MINUTES = int(os.environ.get('EXPORT_JOB_TIMEOUT_MINUTES', 30))
+    
+    # Import dry runs: processes that validate rows in parallel for `flask
+    # import-xlsx --dry-run` (0 or 1 = in the command's process; uploads are
+    # always validated in the request process) and hours an error report is
+    # kept for download
+    IMPORT_VALIDATION_WORKERS = int(os.environ.get('IMPORT_VALIDATION_WORKERS', min(4, os.cpu_count() or 1)))
+    IMPORT_REPORT_RETENTION_HOURS = int(os.environ.get('IMPORT_REPORT_RETENTION_HOURS', 24))
+    
+    # Days a daily follow-up digest (flask follow-up-digest) is kept
+    FOLLOW_UP_DIGEST_RETENTION_DAYS = int(os.environ.get('FOLLOW_UP_DIGEST_RETENTION_DAYS', 30))
+    
     # API settings
     API_TOKEN_EXPIRATION = 86400  # 24 hours in seconds
 
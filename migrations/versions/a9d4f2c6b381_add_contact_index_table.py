@@ -0,0 +1,77 @@
+"""add contact_index table
+
+Revision ID: a9d4f2c6b381
+Revises: f3c8a1d5e926
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4f2c6b381'
+down_revision = 'f3c8a1d5e926'
+branch_labels = None
+depends_on = None
+
+
+# entity -> (table, primary key, phone columns, email columns)
+ENTITIES = {
+    'b2c_lead': ('b2c_lead', 'enquiry_id', ('contact_no',), ('email',)),
+    'customer': ('customer', 'id', ('contact_no',), ('email',)),
+    'employee': ('employee', 'id', ('contact_no',), ('email',)),
+    'channel_partner': ('channel_partner', 'id', ('contact_no',), ('email',)),
+    'camp': ('camp', 'id', ('phone_no',), ()),
+}
+
+
+def _normalize_phone(value):
+    digits = re.sub(r'\D', '', str(value or ''))
+    for prefix in ('0091', '91', '0'):
+        if len(digits) == 10 + len(prefix) and digits.startswith(prefix):
+            return digits[len(prefix):]
+    return digits or None
+
+
+def _normalize_email(value):
+    value = str(value or '').strip().lower()
+    return value if '@' in value else None
+
+
+def upgrade():
+    contacts = op.create_table('contact_index',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('entity_id', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(length=8), nullable=False),
+    sa.Column('value', sa.String(length=120), nullable=False),
+    sa.Column('value_reversed', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_contact_index_kind_value', 'contact_index', ['kind', 'value'], unique=False)
+    op.create_index('idx_contact_index_kind_value_reversed', 'contact_index', ['kind', 'value_reversed'], unique=False)
+    op.create_index('idx_contact_index_entity', 'contact_index', ['entity', 'entity_id'], unique=False)
+
+    # Index the existing records
+    bind = op.get_bind()
+    for entity, (table_name, pk, phone_columns, email_columns) in ENTITIES.items():
+        table = sa.table(table_name, *[sa.column(name) for name in (pk,) + phone_columns + email_columns])
+        rows = []
+        for row in bind.execute(sa.select(*table.c)).mappings():
+            entries = [('phone', _normalize_phone(row[name])) for name in phone_columns] + \
+                      [('email', _normalize_email(row[name])) for name in email_columns]
+            rows.extend({'entity': entity, 'entity_id': str(row[pk]), 'kind': kind,
+                         'value': value[:120], 'value_reversed': value[::-1][:120]}
+                        for kind, value in dict.fromkeys(entries) if value)
+        if rows:
+            op.bulk_insert(contacts, rows)
+
+
+def downgrade():
+    op.drop_index('idx_contact_index_entity', table_name='contact_index')
+    op.drop_index('idx_contact_index_kind_value_reversed', table_name='contact_index')
+    op.drop_index('idx_contact_index_kind_value', table_name='contact_index')
+    op.drop_table('contact_index')
@@ -0,0 +1,30 @@
+"""add code_sequence table
+
+Revision ID: b41c7e9a2d15
+Revises: add_camp_id_to_default
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41c7e9a2d15'
+down_revision = 'add_camp_id_to_default'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Counters are seeded lazily on first use or via `flask backfill-code-sequences`
+    op.create_table('code_sequence',
+    sa.Column('prefix', sa.String(length=20), nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('prefix')
+    )
+
+
+def downgrade():
+    op.drop_table('code_sequence')
@@ -0,0 +1,43 @@
+"""add keyset pagination indexes
+
+Revision ID: b7e2d9f4c613
+Revises: a9d4f2c6b381
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2d9f4c613'
+down_revision = 'a9d4f2c6b381'
+branch_labels = None
+depends_on = None
+
+
+# index name -> (table, columns), one per list view sort key
+INDEXES = {
+    'idx_b2c_lead_created_at_enquiry': ('b2c_lead', ['created_at', 'enquiry_id']),
+    'idx_b2b_lead_created_at_id': ('b2b_lead', ['created_at', 'id']),
+    'idx_channel_partner_created_at_id': ('channel_partner', ['created_at', 'id']),
+    'idx_expense_created_at_id': ('expense', ['created_at', 'id']),
+    'idx_camp_date_id': ('camp', ['camp_date', 'id']),
+    'idx_service_created_at_id': ('service', ['created_at', 'id']),
+    'idx_leave_created_at_id': ('leave', ['created_at', 'id']),
+    'idx_task_created_at_id': ('task', ['created_at', 'id']),
+    'idx_sale_date_id': ('sale', ['date', 'id']),
+    'idx_purchase_date_id': ('purchase', ['date', 'id']),
+    'idx_payment_received_date_id': ('payment_received', ['date', 'id']),
+    'idx_payment_made_date_id': ('payment_made', ['date', 'id']),
+}
+
+
+def upgrade():
+    for name, (table, columns) in INDEXES.items():
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, (table, columns) in reversed(list(INDEXES.items())):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,30 @@
+"""add document_series table
+
+Revision ID: c5d2f8a6e317
+Revises: b41c7e9a2d15
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2f8a6e317'
+down_revision = 'b41c7e9a2d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('document_series',
+    sa.Column('series', sa.String(length=20), nullable=False),
+    sa.Column('fiscal_year', sa.String(length=7), nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('series', 'fiscal_year')
+    )
+
+
+def downgrade():
+    op.drop_table('document_series')
@@ -0,0 +1,36 @@
+"""add follow-up agenda indexes
+
+Revision ID: d8a3f6b2c571
+Revises: c3f7a2e8d154
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a3f6b2c571'
+down_revision = 'c3f7a2e8d154'
+branch_labels = None
+depends_on = None
+
+
+# index name -> (table, columns): owner agendas by due date and next step,
+# and each lead's follow-up chain
+INDEXES = {
+    'idx_follow_up_owner_date': ('follow_up', ['owner_id', 'follow_up_on']),
+    'idx_follow_up_owner_next': ('follow_up', ['owner_id', 'next_follow_up_on']),
+    'idx_follow_up_b2c_lead_date': ('follow_up', ['b2c_lead_id', 'follow_up_on']),
+    'idx_follow_up_b2b_lead_date': ('follow_up', ['b2b_lead_id', 'follow_up_on']),
+}
+
+
+def upgrade():
+    for name, (table, columns) in INDEXES.items():
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, (table, columns) in reversed(list(INDEXES.items())):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,55 @@
+"""add finance_monthly_rollup table
+
+Revision ID: e2b9c4d7a165
+Revises: d7a3e1f4b820
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b9c4d7a165'
+down_revision = 'd7a3e1f4b820'
+branch_labels = None
+depends_on = None
+
+
+# metric -> (ledger table, amount column, column that must be NULL)
+METRICS = {
+    'sales': ('sale', 'amount', None),
+    'purchases': ('purchase', 'amount', None),
+    'expenses': ('expense', 'expense_amount', None),
+    'payments_received': ('payment_received', 'amount', None),
+    'standalone_payments': ('payment_received', 'amount', 'sale_id'),
+    'payments_made': ('payment_made', 'amount', None),
+}
+
+
+def upgrade():
+    rollup = op.create_table('finance_monthly_rollup',
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(length=32), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('year', 'month', 'metric')
+    )
+
+    # Backfill from the existing ledgers
+    for metric, (table_name, amount_column, null_column) in METRICS.items():
+        columns = [sa.column('date'), sa.column(amount_column)] + ([sa.column(null_column)] if null_column else [])
+        ledger = sa.table(table_name, *columns)
+        year = sa.cast(sa.extract('year', ledger.c.date), sa.Integer)
+        month = sa.cast(sa.extract('month', ledger.c.date), sa.Integer)
+        query = sa.select(year, month, sa.literal(metric),
+                          sa.func.coalesce(sa.func.sum(ledger.c[amount_column]), 0), sa.func.count())\
+            .group_by(year, month)
+        if null_column:
+            query = query.where(ledger.c[null_column].is_(None))
+        op.execute(rollup.insert().from_select(['year', 'month', 'metric', 'amount', 'count'], query))
+
+
+def downgrade():
+    op.drop_table('finance_monthly_rollup')
@@ -0,0 +1,35 @@
+"""add follow_up_digest table
+
+Revision ID: e5b1c9d4a7f2
+Revises: d8a3f6b2c571
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b1c9d4a7f2'
+down_revision = 'd8a3f6b2c571'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('follow_up_digest',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('digest_date', sa.Date(), nullable=False),
+    sa.Column('overdue', sa.Integer(), nullable=False),
+    sa.Column('due_today', sa.Integer(), nullable=False),
+    sa.Column('due_tomorrow', sa.Integer(), nullable=False),
+    sa.Column('this_week', sa.Integer(), nullable=False),
+    sa.Column('items', sa.Text(), nullable=True),
+    sa.Column('generated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('owner_id', 'digest_date')
+    )
+
+
+def downgrade():
+    op.drop_table('follow_up_digest')
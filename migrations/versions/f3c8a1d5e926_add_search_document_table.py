@@ -0,0 +1,84 @@
+"""add search_document table and full-text index
+
+Revision ID: f3c8a1d5e926
+Revises: e2b9c4d7a165
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a1d5e926'
+down_revision = 'e2b9c4d7a165'
+branch_labels = None
+depends_on = None
+
+
+# entity -> (table, primary key, searchable columns)
+ENTITIES = {
+    'b2c_lead': ('b2c_lead', 'enquiry_id', ('customer_name', 'contact_no', 'email', 'enquiry_id')),
+    'b2b_lead': ('b2b_lead', 'id', ('organization_name', 'organization_email', 't4h_spoc', 'sr_no',
+                                    'location', 'org_poc_name_and_role')),
+    'customer': ('customer', 'id', ('customer_name', 'contact_no', 'email', 'customer_code')),
+    'employee': ('employee', 'id', ('name', 'contact_no', 'email', 'employee_code', 'designation')),
+    'channel_partner': ('channel_partner', 'id', ('name', 'contact_no', 'email', 'partner_code')),
+    'expense': ('expense', 'id', ('expense_code', 'category', 'sub_category')),
+}
+
+DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "content, content='search_document', content_rowid='id', prefix='2 3 4')",
+        "CREATE TRIGGER IF NOT EXISTS search_document_ai AFTER INSERT ON search_document BEGIN "
+        "INSERT INTO search_index(rowid, content) VALUES (new.id, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS search_document_ad AFTER DELETE ON search_document BEGIN "
+        "INSERT INTO search_index(search_index, rowid, content) VALUES ('delete', old.id, old.content); END",
+        "CREATE TRIGGER IF NOT EXISTS search_document_au AFTER UPDATE ON search_document BEGIN "
+        "INSERT INTO search_index(search_index, rowid, content) VALUES ('delete', old.id, old.content); "
+        "INSERT INTO search_index(rowid, content) VALUES (new.id, new.content); END",
+    ],
+    'postgresql': [
+        "ALTER TABLE search_document ADD COLUMN IF NOT EXISTS document tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED",
+        "CREATE INDEX IF NOT EXISTS idx_search_document_document ON search_document USING gin (document)",
+    ],
+}
+
+
+def _content(values):
+    return ' '.join(token for value in values if value is not None
+                    for token in re.findall(r'\w+', str(value).lower()))
+
+
+def upgrade():
+    documents = op.create_table('search_document',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('entity_id', sa.String(length=64), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entity', 'entity_id', name='uq_search_document_entity')
+    )
+
+    bind = op.get_bind()
+    for statement in DDL.get(bind.dialect.name, []):
+        op.execute(statement)
+
+    # Index the existing records
+    for entity, (table_name, pk, columns) in ENTITIES.items():
+        table = sa.table(table_name, *[sa.column(name) for name in dict.fromkeys((pk,) + columns)])
+        rows = bind.execute(sa.select(table.c[pk], *[table.c[name] for name in columns])).all()
+        if rows:
+            op.bulk_insert(documents, [
+                {'entity': entity, 'entity_id': str(row[0]), 'content': _content(row[1:])} for row in rows
+            ])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS search_index')
+    op.drop_table('search_document')